@@ -0,0 +1,3 @@
+"""
+Benchmarks of the geo-hiking-track processing pipeline. Run a benchmark module with `python -m benchmarks.<module>`.
+"""
@@ -0,0 +1,97 @@
+"""
+Command line interface of the benchmark suite.
+
+Usage:
+    python -m benchmarks run [--size 1e3 --size 1e5 ...] [--benchmark <name> ...] [--repeat 3] \
+                             [--seed 0] [--data-dir <folder>] [--output results.json]
+    python -m benchmarks compare <baseline.json> <current.json> [--threshold 0.1]
+    python -m benchmarks generate-gpx <output.gpx> --size 1e6 [--seed 0]
+"""
+
+import sys
+
+import click
+
+from benchmarks.suite import (
+    BENCHMARKS, DEFAULT_SEED, DEFAULT_SIZES, compare_results, load_results, run_benchmarks, save_results,
+    select_benchmarks
+)
+from benchmarks.synthetic_gpx import write_gpx
+
+
+def _parse_size(ctx, param, values):
+    try:
+        return [int(float(value)) for value in values]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.group()
+def cli():
+    """Benchmarks of the geo-hiking-track pipeline on synthetic tracks."""
+
+
+@cli.command()
+@click.option('--size', 'sizes', multiple=True, callback=_parse_size,
+              help=f'Track size in points, e.g. 1e5. Can be given multiple times. [default: {", ".join(map(str, DEFAULT_SIZES))}]')
+@click.option('--benchmark', 'names', multiple=True,
+              help=f'Benchmark to run, all by default. Can be given multiple times. One of: {", ".join(b.name for b in BENCHMARKS)}.')
+@click.option('--repeat', type=int, default=3, show_default=True, help='Timed repetitions of every benchmark.')
+@click.option('--seed', type=int, default=DEFAULT_SEED, show_default=True, help='Seed of the synthetic tracks.')
+@click.option('--data-dir', type=click.Path(file_okay=False), required=False,
+              help='Folder keeping the generated GPX files and images between runs, a temporary folder by default.')
+@click.option('--output', type=click.Path(dir_okay=False), required=False, help='Path to save the results as JSON.')
+def run(sizes, names, repeat, seed, data_dir, output):
+    """Run the benchmarks and print the fastest time of every benchmark."""
+    try:
+        benchmarks = select_benchmarks(list(names))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--benchmark')
+
+    click.echo(f"{'benchmark':<24}{'points':>10}{'min (s)':>11}{'median (s)':>12}{'items/s':>13}")
+
+    def print_result(result):
+        click.echo(f"{result['benchmark']:<24}{result['num_points']:>10}{result['min']:>11.4f}"
+                   f"{result['median']:>12.4f}{result['items_per_second'] or 0:>13.0f}")
+
+    results = run_benchmarks(benchmarks, sizes or DEFAULT_SIZES, repeat, seed, data_dir, progress=print_result)
+    if output:
+        save_results(results, output)
+        click.echo(f"Results saved at {output}")
+
+
+@cli.command()
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', type=float, default=0.1, show_default=True,
+              help='Relative slow down counted as a regression.')
+def compare(baseline, current, threshold):
+    """Compare two results files, exits with status 1 if a benchmark regressed."""
+    baseline_results = load_results(baseline)
+    current_results = load_results(current)
+    click.echo(f"baseline: {baseline_results['metadata'].get('commit')}  current: {current_results['metadata'].get('commit')}")
+    click.echo(f"{'benchmark':<24}{'points':>10}{'baseline (s)':>14}{'current (s)':>13}{'ratio':>8}  verdict")
+
+    comparison = compare_results(baseline_results, current_results, threshold)
+    for entry in comparison:
+        click.echo(f"{entry['benchmark']:<24}{entry['num_points']:>10}{entry['baseline']:>14.4f}"
+                   f"{entry['current']:>13.4f}{entry['ratio']:>8.2f}  {entry['verdict']}")
+
+    if any(entry['verdict'] == 'regression' for entry in comparison):
+        sys.exit(1)
+
+
+@cli.command('generate-gpx')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--size', type=float, default=1e4, show_default=True, help='Number of track points, e.g. 1e6.')
+@click.option('--seed', type=int, default=DEFAULT_SEED, show_default=True, help='Seed of the synthetic track.')
+@click.option('--waypoint-interval', type=int, default=2000, show_default=True,
+              help='A waypoint is placed every this many track points.')
+def generate_gpx(output, size, seed, waypoint_interval):
+    """Write a synthetic GPX file."""
+    num_points, num_waypoints = write_gpx(output, int(size), seed, waypoint_interval)
+    click.echo(f"Wrote {num_points} track points and {num_waypoints} waypoints to {output}")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,110 @@
+"""
+Memory benchmark of the point classes.
+
+Measures the bytes per point of the slotted point classes and of the same attributes stored in a per-instance
+`__dict__`, the layout the point classes had before they declared `__slots__`. Only the point objects are
+measured, the attribute values are created beforehand and shared by both layouts.
+
+Usage:
+    python -m benchmarks.point_memory [--points 100000]
+"""
+
+import datetime
+import functools
+import gc
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import click
+
+from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint, RestTrkPoint, SeedRestPoint
+from src.geo_objects.geo_points.basic_point import BasicPoint
+from src.geo_objects.geo_points.image_points import ImagePoint
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint, WayPoint
+
+_START_TIME = datetime.datetime(2021, 8, 29, 6, 21, 16)
+
+# Factory of one point of every measured class, from the point time, latitude, longitude and elevation
+POINT_FACTORIES: Dict[str, Callable[[datetime.datetime, float, float, float], Any]] = {
+    'BasicPoint': lambda t, lat, lon, elev: BasicPoint(t, lat, lon, elev),
+    'RawTrkPoint': lambda t, lat, lon, elev: RawTrkPoint(t, lat, lon, elev),
+    'WayPoint': lambda t, lat, lon, elev: WayPoint(t, lat, lon, elev, 'note'),
+    'AnalyzedTrkPoint': lambda t, lat, lon, elev: AnalyzedTrkPoint(t, lat, lon, elev, 1.0, 1.0, 0.1, 5.0),
+    'RestTrkPoint': lambda t, lat, lon, elev: RestTrkPoint(t, lat, lon, elev, t, t),
+    'ImagePoint': lambda t, lat, lon, elev: ImagePoint('image.jpg', t, lat, lon, elev),
+    'SeedRestPoint': lambda t, lat, lon, elev: SeedRestPoint(lat, lon, elev, t),
+}
+
+
+def slot_names(point_class: type) -> List[str]:
+    """
+    Return the slot names of a class and all its base classes.
+    """
+    names: List[str] = []
+    for klass in reversed(point_class.__mro__):
+        names.extend(klass.__dict__.get('__slots__', ()))
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def dict_layout_class(point_class: type) -> type:
+    """
+    Return a class keeping its attributes in the instance `__dict__`, one per point class so that the
+    instances of a class share the dict keys like the original point classes did.
+    """
+    return type(f'{point_class.__name__}DictLayout', (), {})
+
+
+def to_dict_layout(point: Any) -> Any:
+    """
+    Copy the attributes of a slotted point into a `__dict__` based object.
+    """
+    copied = dict_layout_class(type(point))()
+    for name in slot_names(type(point)):
+        setattr(copied, name, getattr(point, name))
+    return copied
+
+
+def _measure(create_points: Callable[[], List[Any]]) -> Tuple[List[Any], int]:
+    gc.collect()
+    tracemalloc.start()
+    points = create_points()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return points, allocated
+
+
+def measure_point_memory(point_name: str, num_points: int) -> Dict[str, float]:
+    """
+    Measure the memory of `num_points` points of a point class, in the slotted and in the dict layout.
+
+    :param point_name: Name of the point class, a key of POINT_FACTORIES.
+    :param num_points: Number of points to create.
+    :return: Bytes per point of the dict layout (`before`) and of the slotted layout (`after`).
+    """
+    factory = POINT_FACTORIES[point_name]
+    values = [
+        (_START_TIME + datetime.timedelta(seconds=i), 24.0 + i * 1e-7, 121.0 + i * 1e-7, 1000.0 + i * 1e-3)
+        for i in range(num_points)
+    ]
+
+    slotted_points, slotted_bytes = _measure(lambda: [factory(*v) for v in values])
+    _, dict_bytes = _measure(lambda: [to_dict_layout(p) for p in slotted_points])
+
+    return {'before': dict_bytes / num_points, 'after': slotted_bytes / num_points}
+
+
+@click.command()
+@click.option('--points', 'num_points', type=int, default=100_000, show_default=True,
+              help='Number of points created per class.')
+def main(num_points):
+    """Print the bytes per point of every point class before and after the __slots__ conversion."""
+    click.echo(f"{'point class':<20}{'before (B)':>12}{'after (B)':>12}{'saved':>8}")
+    for point_name in POINT_FACTORIES:
+        result = measure_point_memory(point_name, num_points)
+        saved = 1 - result['after'] / result['before']
+        click.echo(f"{point_name:<20}{result['before']:>12.1f}{result['after']:>12.1f}{saved:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
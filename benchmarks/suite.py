@@ -0,0 +1,353 @@
+"""
+Benchmark suite of the processing pipeline.
+
+Every benchmark prepares its input from a synthetic track of the requested size (see `synthetic_gpx`), then
+times only the benchmarked call. Results are saved as JSON together with the commit and environment they were
+measured on, and two result files can be compared to spot regressions between commits.
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic_gpx import GENERATOR_VERSION, generate_track_frame, write_gpx, write_images
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTracks
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_spatial_index import TrackSpatialIndex
+from src.geoanalyzer.images.image_parser import ImageParser
+from src.geoanalyzer.tracks.gps_parser import LOCAL_TIME_OFFSET, GpxParser, parse_time, parse_time_array
+from src.geoanalyzer.tracks.rest_point_engine import find_rest_point_rle
+from src.geoanalyzer.tracks.track_analyzer import (
+    OnlineTrackAnalyzer, TrackAnalyzer, analyze_track_frame, do_analyzing, find_rest_point, smoothing_tracks
+)
+from src.geoanalyzer.tracks.track_file import TrackFileReader, write_track_file
+from src.geoanalyzer.tracks.track_smoothing import smooth_track_frame
+from src.visualizartion.map_drawer import FoliumMapDrawer
+
+RESULTS_SCHEMA_VERSION = 1
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_SEED = 0
+
+# One image per this many track points for the ImageParser benchmark, within the bounds below
+_POINTS_PER_IMAGE = 1000
+_IMAGES_RANGE = (1, 500)
+
+
+class BenchmarkInput:
+    """
+    Inputs of the benchmarks for one track size, created on first use and shared between the benchmarks.
+
+    :param num_points: Number of track points.
+    :param seed: Seed of the synthetic track.
+    :param data_dir: Folder keeping the generated GPX files and images between runs.
+    """
+
+    def __init__(self, num_points: int, seed: int, data_dir: str):
+        self.num_points = num_points
+        self.seed = seed
+        self._data_dir = data_dir
+        self._cache: Dict[str, Any] = {}
+
+    def _cached(self, key: str, create: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = create()
+        return self._cache[key]
+
+    def _data_path(self, name: str) -> str:
+        os.makedirs(self._data_dir, exist_ok=True)
+        return os.path.join(self._data_dir, f'synthetic-v{GENERATOR_VERSION}-{self.seed}-{self.num_points}{name}')
+
+    def gpx_file(self) -> str:
+        def create():
+            path = self._data_path('.gpx')
+            if not os.path.exists(path):
+                write_gpx(path + '.part', self.num_points, self.seed)
+                os.replace(path + '.part', path)
+            return path
+        return self._cached('gpx_file', create)
+
+    def track_file(self) -> str:
+        def create():
+            path = self._data_path('.gtrk')
+            if not os.path.exists(path):
+                write_track_file(path + '.part', self.raw_frame())
+                os.replace(path + '.part', path)
+            return path
+        return self._cached('track_file', create)
+
+    def image_folder(self) -> str:
+        def create():
+            path = self._data_path('-images')
+            if not os.path.isdir(path):
+                write_images(path + '.part', self.num_images(), self.seed)
+                os.replace(path + '.part', path)
+            return path
+        return self._cached('image_folder', create)
+
+    def num_images(self) -> int:
+        return min(max(self.num_points // _POINTS_PER_IMAGE, _IMAGES_RANGE[0]), _IMAGES_RANGE[1])
+
+    def raw_frame(self) -> TrackFrame:
+        return self._cached('raw_frame', lambda: generate_track_frame(self.num_points, self.seed))
+
+    def raw_track_object(self) -> RawTrackObject:
+        def create():
+            raw_track_object = RawTrackObject()
+            raw_track_object.set_track_frame(self.raw_frame())
+            return raw_track_object
+        return self._cached('raw_track_object', create)
+
+    def time_strings(self) -> List[str]:
+        def create():
+            return [f'{t}Z' for t in np.datetime_as_string(self.raw_frame().time, unit='s')]
+        return self._cached('time_strings', create)
+
+    def time_window(self) -> Tuple[datetime.datetime, datetime.datetime]:
+        """
+        The local time window of the first tenth of the track points, see `GpxPointFilter`.
+        """
+        times = self.raw_frame().time
+        return times[0].item() + LOCAL_TIME_OFFSET, times[len(times) // 10].item() + LOCAL_TIME_OFFSET
+
+    def raw_points(self) -> List[RawTrkPoint]:
+        return self._cached('raw_points', lambda: self.raw_frame().to_points(RawTrkPoint))
+
+    def smoothed_points(self) -> List[RawTrkPoint]:
+        return self._cached('smoothed_points', lambda: smooth_track_frame(self.raw_frame()).to_points(RawTrkPoint))
+
+    def analyzed_frame(self) -> TrackFrame:
+        return self._cached('analyzed_frame', lambda: analyze_track_frame(smooth_track_frame(self.raw_frame())))
+
+    def analyzed_tracks(self) -> AnalyzedTracks:
+        return self._cached('analyzed_tracks', lambda: AnalyzedTracks.from_track_frame(self.analyzed_frame()))
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmarked call.
+
+    `setup` prepares the arguments of `run` from the inputs outside of the timing, it is called before every
+    repetition. Sizes above `max_points` are skipped, for calls which would take too long or too much memory.
+    """
+    name: str
+    setup: Callable[[BenchmarkInput], Any]
+    run: Callable[[Any], Any]
+    max_points: int = 10_000_000
+    items: Optional[Callable[[BenchmarkInput], int]] = None
+
+
+def _new_map_drawer(inputs: BenchmarkInput) -> FoliumMapDrawer:
+    frame = inputs.raw_frame()
+    return FoliumMapDrawer(float(frame.lat[0]), float(frame.lon[0]), zoom_start=15)
+
+
+def _map_with_tracks(inputs: BenchmarkInput) -> FoliumMapDrawer:
+    map_drawer = _new_map_drawer(inputs)
+    map_drawer.add_tracks(inputs.analyzed_tracks(), weight=4, color='blue')
+    return map_drawer
+
+
+def _push_online(raw_frame: TrackFrame, chunk_size: int = 1000) -> None:
+    online_analyzer = OnlineTrackAnalyzer()
+    for start in range(0, len(raw_frame), chunk_size):
+        chunk = raw_frame.slice(start, start + chunk_size)
+        online_analyzer.push_many(chunk.lat, chunk.lon, chunk.elev, chunk.time)
+    online_analyzer.close()
+
+
+def _find_nearest_points(raw_frame: TrackFrame, query_count: int = 1000) -> None:
+    # Query at every n-th point, shifted off the track
+    query_points = raw_frame.take(np.arange(0, len(raw_frame), max(len(raw_frame) // query_count, 1)))
+    TrackSpatialIndex(raw_frame).find_nearest_many(query_points.lat + 1e-4, query_points.lon + 1e-4, k=5)
+
+
+def _save_map(map_drawer: FoliumMapDrawer) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        map_drawer.save(os.path.join(folder, 'map.html'))
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark('gpx_parser.dom', lambda i: i.gpx_file(), lambda path: GpxParser(path), max_points=1_000_000),
+    Benchmark('gpx_parser.stream', lambda i: i.gpx_file(), lambda path: GpxParser(path, mode='stream'),
+              max_points=1_000_000),
+    Benchmark('gpx_parser.columnar', lambda i: i.gpx_file(), lambda path: GpxParser(path, mode='columnar')),
+    Benchmark('gpx_parser.stream_window', lambda i: (i.gpx_file(), i.time_window()),
+              lambda arguments: GpxParser(arguments[0], mode='stream', time_range=arguments[1]), max_points=1_000_000),
+    Benchmark('parse_time', lambda i: i.time_strings(), lambda times: [parse_time(t) for t in times],
+              max_points=1_000_000),
+    Benchmark('parse_time_array', lambda i: i.time_strings(), parse_time_array),
+    Benchmark('track_file.open', lambda i: i.track_file(), TrackFileReader),
+    Benchmark('smoothing_tracks', lambda i: i.raw_points(), smoothing_tracks, max_points=1_000_000),
+    Benchmark('do_analyzing', lambda i: i.smoothed_points(), do_analyzing, max_points=1_000_000),
+    Benchmark('find_rest_point', lambda i: i.analyzed_tracks().get_main_tracks_points_list(), find_rest_point,
+              max_points=1_000_000),
+    Benchmark('find_rest_point_rle', lambda i: i.analyzed_frame(), find_rest_point_rle),
+    Benchmark('track_analyzer', lambda i: i.raw_track_object(), TrackAnalyzer),
+    Benchmark('track_analyzer.chunked', lambda i: i.raw_track_object(),
+              lambda track: TrackAnalyzer(track, chunk_size=100_000, keep_analyzed_points=False)),
+    Benchmark('track_analyzer.pool', lambda i: i.raw_track_object(),
+              lambda track: TrackAnalyzer(track, partition_workers=os.cpu_count() or 1)),
+    Benchmark('online_analyzer', lambda i: i.raw_frame(), _push_online),
+    Benchmark('spatial_index', lambda i: i.raw_frame(), _find_nearest_points),
+    Benchmark('map.add_tracks', lambda i: (_new_map_drawer(i), i.analyzed_tracks()),
+              lambda arguments: arguments[0].add_tracks(arguments[1], weight=4, color='blue'), max_points=1_000_000),
+    Benchmark('map.save', _map_with_tracks, _save_map, max_points=1_000_000),
+    Benchmark('image_parser', lambda i: i.image_folder(), ImageParser, items=lambda i: i.num_images()),
+]
+
+
+def select_benchmarks(names: Optional[List[str]] = None) -> List[Benchmark]:
+    """
+    Select benchmarks by name, a name also selects every benchmark below it, e.g. `gpx_parser`.
+
+    :param names: The names to select, all benchmarks if empty.
+    :return: The selected benchmarks in suite order.
+    :raises ValueError: If a name matches no benchmark.
+    """
+    if not names:
+        return list(BENCHMARKS)
+    for name in names:
+        if not any(b.name == name or b.name.startswith(name + '.') for b in BENCHMARKS):
+            raise ValueError(f"Unknown benchmark: {name}. Available benchmarks are {', '.join(b.name for b in BENCHMARKS)}.")
+    return [b for b in BENCHMARKS if any(b.name == n or b.name.startswith(n + '.') for n in names)]
+
+
+def _git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': dirty}
+
+
+def run_benchmarks(
+        benchmarks: List[Benchmark],
+        sizes=DEFAULT_SIZES,
+        repeat: int = 3,
+        seed: int = DEFAULT_SEED,
+        data_dir: Optional[str] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run the benchmarks for every size.
+
+    :param benchmarks: The benchmarks to run.
+    :param sizes: The track sizes in points.
+    :param repeat: Number of timed repetitions of every benchmark.
+    :param seed: Seed of the synthetic tracks.
+    :param data_dir: Folder keeping the generated input files, a temporary folder if not given.
+    :param progress: Called with every result as soon as it is measured.
+    :return: The results, ready to be saved as JSON.
+    """
+    if repeat < 1:
+        raise ValueError(f"Invalid repeat {repeat}. Must be at least 1.")
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        for num_points in sizes:
+            inputs = BenchmarkInput(int(num_points), seed, data_dir or temporary_dir)
+            for benchmark in benchmarks:
+                if inputs.num_points > benchmark.max_points:
+                    continue
+                times = []
+                for _ in range(repeat):
+                    argument = benchmark.setup(inputs)
+                    start = time.perf_counter()
+                    benchmark.run(argument)
+                    times.append(time.perf_counter() - start)
+                    del argument
+
+                items = benchmark.items(inputs) if benchmark.items else inputs.num_points
+                result = {
+                    'benchmark': benchmark.name,
+                    'num_points': inputs.num_points,
+                    'items': items,
+                    'times': times,
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'items_per_second': items / min(times) if min(times) > 0 else None,
+                }
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {
+        'schema_version': RESULTS_SCHEMA_VERSION,
+        'metadata': {
+            **_git_commit(),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'generator_version': GENERATOR_VERSION,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def save_results(results: Dict[str, Any], output_file: str) -> None:
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(input_file: str) -> Dict[str, Any]:
+    """
+    Load a results file.
+
+    :raises ValueError: If the file was written with another results schema.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get('schema_version') != RESULTS_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported benchmark results schema in {input_file}: {results.get('schema_version')}")
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compare the fastest times of the benchmarks measured in both results.
+
+    :param baseline: The results to compare against.
+    :param current: The new results.
+    :param threshold: Relative slow down above which a benchmark counts as a regression, 0.1 is 10 %.
+    :return: One entry per benchmark and size: the baseline and current time, their ratio and the verdict
+        'regression', 'improvement' or 'unchanged'.
+    """
+    baseline_times = {(r['benchmark'], r['num_points']): r['min'] for r in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        key = (result['benchmark'], result['num_points'])
+        if key not in baseline_times:
+            continue
+        ratio = result['min'] / baseline_times[key] if baseline_times[key] > 0 else float('inf')
+        if ratio > 1 + threshold:
+            verdict = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            verdict = 'improvement'
+        else:
+            verdict = 'unchanged'
+        comparison.append({
+            'benchmark': result['benchmark'],
+            'num_points': result['num_points'],
+            'baseline': baseline_times[key],
+            'current': result['min'],
+            'ratio': ratio,
+            'verdict': verdict,
+        })
+    return comparison
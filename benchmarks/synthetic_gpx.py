@@ -0,0 +1,284 @@
+"""
+Deterministic generator of synthetic hiking tracks.
+
+The generated track alternates walking sections and rests. While walking, the hiker moves at about 1 m/s with
+a slowly drifting heading and climbs or descends with a drifting grade; while resting the true position does
+not change. Every position gets correlated GPS noise of a few meters, so rests look like the drifting point
+clouds real recordings have. Points are sampled every few seconds with jitter and occasional signal gaps, and
+waypoints are placed along the track at a fixed interval.
+
+The track is generated chunk by chunk with a random generator seeded from (seed, chunk index), so the same seed
+always yields the same track and tracks of 1e7 points can be written without holding them in memory.
+"""
+
+import datetime
+import os
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_tracks.track_frame import TIME_DTYPE, TrackFrame
+
+# Bump when the generated tracks change, the benchmark data files are named after it
+GENERATOR_VERSION = 1
+
+START_TIME = datetime.datetime(2021, 8, 28, 22, 21, 17)
+START_LAT = 24.632317
+START_LON = 121.163701
+START_ELEV = 1165.4
+
+CHUNK_SIZE = 100_000
+
+_METERS_PER_DEGREE_LAT = 110574.0
+_METERS_PER_DEGREE_LON = 111320.0 * np.cos(np.radians(START_LAT))
+
+# Walking sections last about 600 points (50 minutes at 5 s sampling), rests 24 to 180 points (2 to 15 minutes)
+_MEAN_WALK_POINTS = 600
+_REST_POINTS_RANGE = (24, 180)
+_SAMPLING_SECONDS = (2, 3, 4, 5, 5, 5, 6, 8, 10)
+_SIGNAL_GAP_PROBABILITY = 0.002
+_SIGNAL_GAP_SECONDS = 60
+_WALK_SPEED = 1.0  # m/s
+_GPS_NOISE = 3.0  # m
+_GPS_NOISE_CORRELATION = 0.9
+
+
+class SyntheticWaypoint(NamedTuple):
+    time: datetime.datetime
+    lat: float
+    lon: float
+    elev: float
+    name: str
+
+
+class _GeneratorState:
+    """
+    State carried from one chunk to the next.
+    """
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.elev = START_ELEV
+        self.heading = 0.7
+        self.grade = 0.1
+        self.noise_x = 0.0
+        self.noise_y = 0.0
+        self.time_us = int((START_TIME - datetime.datetime(1970, 1, 1)).total_seconds()) * 1_000_000
+        self.resting = False
+        self.section_left = 0
+
+
+def _chunk_rng(seed: int, chunk_index: int) -> np.random.Generator:
+    return np.random.default_rng([seed, chunk_index])
+
+
+def _rest_mask(rng: np.random.Generator, state: _GeneratorState, size: int) -> NDArray[np.bool_]:
+    resting = np.empty(size, dtype=np.bool_)
+    filled = 0
+    while filled < size:
+        if state.section_left == 0:
+            state.resting = not state.resting
+            if state.resting:
+                state.section_left = int(rng.integers(_REST_POINTS_RANGE[0], _REST_POINTS_RANGE[1] + 1))
+            else:
+                state.section_left = int(rng.geometric(1 / _MEAN_WALK_POINTS))
+        taken = min(state.section_left, size - filled)
+        resting[filled:filled + taken] = state.resting
+        state.section_left -= taken
+        filled += taken
+    return resting
+
+
+def _correlated_noise(rng: np.random.Generator, initial: float, size: int) -> NDArray[np.float64]:
+    """
+    AR(1) noise with standard deviation _GPS_NOISE, continuing from the initial value.
+    """
+    block_size = 64
+    num_blocks = -(-size // block_size)
+    innovation = np.zeros(num_blocks * block_size)
+    innovation[:size] = rng.normal(0.0, _GPS_NOISE * np.sqrt(1 - _GPS_NOISE_CORRELATION ** 2), size)
+
+    # Solve the recursion inside every block from a zero start with one matrix product,
+    # then add the decaying contribution of the value carried over from the previous block
+    lags = np.arange(block_size)[:, None] - np.arange(block_size)[None, :]
+    weights = np.where(lags >= 0, _GPS_NOISE_CORRELATION ** np.maximum(lags, 0), 0.0)
+    local_noise = innovation.reshape(num_blocks, block_size) @ weights.T
+    powers = _GPS_NOISE_CORRELATION ** np.arange(1, block_size + 1)
+
+    carried = np.empty(num_blocks)
+    value = initial
+    for block, last_value in enumerate(local_noise[:, -1].tolist()):
+        carried[block] = value
+        value = last_value + powers[-1] * value
+    return (local_noise + carried[:, None] * powers).ravel()[:size]
+
+
+def _generate_chunk(seed: int, chunk_index: int, state: _GeneratorState, size: int) -> TrackFrame:
+    rng = _chunk_rng(seed, chunk_index)
+    resting = _rest_mask(rng, state, size)
+
+    interval = rng.choice(_SAMPLING_SECONDS, size).astype(np.int64)
+    interval[rng.random(size) < _SIGNAL_GAP_PROBABILITY] = _SIGNAL_GAP_SECONDS
+    time_us = state.time_us + np.cumsum(interval * 1_000_000)
+
+    heading = state.heading + np.cumsum(rng.normal(0.0, 0.15, size))
+    grade = np.clip(state.grade + np.cumsum(rng.normal(0.0, 0.01, size)), -0.35, 0.35)
+    step = np.where(resting, 0.0, _WALK_SPEED * (1 + 0.3 * rng.standard_normal(size)).clip(0.2) * interval)
+    x = state.x + np.cumsum(step * np.cos(heading))
+    y = state.y + np.cumsum(step * np.sin(heading))
+    elev = state.elev + np.cumsum(step * grade)
+
+    noise_x = _correlated_noise(rng, state.noise_x, size)
+    noise_y = _correlated_noise(rng, state.noise_y, size)
+
+    state.x, state.y, state.elev = float(x[-1]), float(y[-1]), float(elev[-1])
+    state.heading, state.grade = float(heading[-1]), float(grade[-1])
+    state.noise_x, state.noise_y = float(noise_x[-1]), float(noise_y[-1])
+    state.time_us = int(time_us[-1])
+
+    return TrackFrame(
+        START_LAT + (y + noise_y) / _METERS_PER_DEGREE_LAT,
+        START_LON + (x + noise_x) / _METERS_PER_DEGREE_LON,
+        np.round(elev + rng.normal(0.0, 1.0, size), 1),
+        time_us,
+    )
+
+
+def generate_track_chunks(num_points: int, seed: int = 0) -> Iterator[TrackFrame]:
+    """
+    Generate a synthetic track chunk by chunk.
+
+    :param num_points: Number of track points.
+    :param seed: Seed of the track, the same seed always yields the same track.
+    :return: Iterator of TrackFrames of up to CHUNK_SIZE points, times are UTC.
+    """
+    state = _GeneratorState()
+    for chunk_index, start in enumerate(range(0, num_points, CHUNK_SIZE)):
+        # Chunks are always generated in full, so a shorter track is a prefix of a longer one with the same seed
+        chunk = _generate_chunk(seed, chunk_index, state, CHUNK_SIZE)
+        yield chunk if num_points - start >= CHUNK_SIZE else chunk.slice(0, num_points - start)
+
+
+def generate_track_frame(num_points: int, seed: int = 0) -> TrackFrame:
+    """
+    Generate a synthetic track as one TrackFrame.
+
+    :param num_points: Number of track points.
+    :param seed: Seed of the track.
+    :return: The track, times are UTC.
+    :rtype: TrackFrame
+    """
+    chunks = list(generate_track_chunks(num_points, seed))
+    if not chunks:
+        return TrackFrame([], [], [], np.array([], dtype=TIME_DTYPE))
+    return TrackFrame(
+        np.concatenate([c.lat for c in chunks]),
+        np.concatenate([c.lon for c in chunks]),
+        np.concatenate([c.elev for c in chunks]),
+        np.concatenate([c.time for c in chunks]),
+    )
+
+
+def _chunk_waypoints(frame: TrackFrame, first_index: int, waypoint_interval: int) -> List[SyntheticWaypoint]:
+    offset = (-first_index) % waypoint_interval
+    return [
+        SyntheticWaypoint(
+            frame.time[i].item(), float(frame.lat[i]), float(frame.lon[i]), float(frame.elev[i]),
+            f"WP {(first_index + i) // waypoint_interval:05d}"
+        )
+        for i in range(offset, len(frame), waypoint_interval)
+    ]
+
+
+def _format_track_points(frame: TrackFrame) -> str:
+    times = np.datetime_as_string(frame.time.astype('datetime64[s]'), unit='s')
+    return ''.join(
+        f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}">\n<ele>{elev:.1f}</ele>\n<time>{time}Z</time>\n</trkpt>\n'
+        for lat, lon, elev, time in zip(frame.lat.tolist(), frame.lon.tolist(), frame.elev.tolist(), times.tolist())
+    )
+
+
+def write_gpx(
+        output_file: str,
+        num_points: int,
+        seed: int = 0,
+        waypoint_interval: int = 2000
+) -> Tuple[int, int]:
+    """
+    Write a synthetic track as a GPX 1.1 file, with the waypoints placed before the track like GPS loggers do.
+
+    :param output_file: Path of the GPX file.
+    :param num_points: Number of track points.
+    :param seed: Seed of the track.
+    :param waypoint_interval: A waypoint is placed every this many track points.
+    :return: The number of track points and waypoints written.
+    """
+    waypoints: List[SyntheticWaypoint] = []
+    track_file = output_file + '.trk.part'
+    with open(track_file, 'w', encoding='utf-8') as f:
+        first_index = 0
+        for frame in generate_track_chunks(num_points, seed):
+            waypoints.extend(_chunk_waypoints(frame, first_index, waypoint_interval))
+            f.write(_format_track_points(frame))
+            first_index += len(frame)
+
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n'
+                '<gpx xmlns="http://www.topografix.com/GPX/1/1" creator="geo-hiking-track benchmarks" version="1.1">\n'
+                f'<metadata>\n<name>synthetic-{num_points}-{seed}</name>\n</metadata>\n'
+            )
+            for waypoint in waypoints:
+                f.write(
+                    f'<wpt lat="{waypoint.lat:.7f}" lon="{waypoint.lon:.7f}">\n<ele>{waypoint.elev:.1f}</ele>\n'
+                    f'<time>{waypoint.time:%Y-%m-%dT%H:%M:%S}Z</time>\n<name>{waypoint.name}</name>\n</wpt>\n'
+                )
+            f.write(f'<trk>\n<name>synthetic-{num_points}-{seed}</name>\n<trkseg>\n')
+            with open(track_file, 'r', encoding='utf-8') as track_points:
+                while True:
+                    block = track_points.read(1 << 24)
+                    if not block:
+                        break
+                    f.write(block)
+            f.write('</trkseg>\n</trk>\n</gpx>\n')
+    finally:
+        os.remove(track_file)
+
+    return num_points, len(waypoints)
+
+
+def write_images(folder: str, num_images: int, seed: int = 0, num_track_points: Optional[int] = None) -> int:
+    """
+    Write small JPEG images with EXIF GPS position and time taken along a synthetic track.
+
+    :param folder: Folder to write the images to, created if missing.
+    :param num_images: Number of images.
+    :param seed: Seed of the track the images are placed on.
+    :param num_track_points: Length of the track the images are spread over, defaults to 100 points per image.
+    :return: The number of images written.
+    """
+    from PIL import Image
+
+    os.makedirs(folder, exist_ok=True)
+    frame = generate_track_frame(num_track_points or max(num_images * 100, 1), seed)
+    indices = np.linspace(0, len(frame) - 1, num_images).astype(int)
+    for number, index in enumerate(indices.tolist()):
+        image = Image.new('RGB', (16, 16), color=(number % 256, 128, 64))
+        exif = image.getexif()
+        exif[0x0132] = frame.time[index].item().strftime('%Y:%m:%d %H:%M:%S')  # DateTime
+        gps = exif.get_ifd(0x8825)
+        gps[1], gps[2] = 'N', _to_degrees_minutes_seconds(float(frame.lat[index]))
+        gps[3], gps[4] = 'E', _to_degrees_minutes_seconds(float(frame.lon[index]))
+        gps[6] = float(frame.elev[index])
+        image.save(os.path.join(folder, f'IMG_{number:05d}.jpg'), exif=exif)
+    return num_images
+
+
+def _to_degrees_minutes_seconds(value: float) -> Tuple[float, float, float]:
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60, 4)
+    return float(degrees), float(minutes), seconds
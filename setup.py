@@ -15,6 +15,7 @@ setup(
     packages=find_packages(),  # Automatically discover and include all packages
     install_requires=[
         'click',
+        'numpy',
     ],
     python_requires='>=3.10',
     zip_safe=False,
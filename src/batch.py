@@ -0,0 +1,238 @@
+"""
+Batch processing of many GPX files over a pool of worker processes.
+
+Every worker process imports the pipeline once and then processes one GPX file after the other, so the
+interpreter and import startup is paid once per worker instead of once per file. A file which fails is
+recorded with its error and does not stop the batch.
+"""
+
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.geoanalyzer.tracks.gps_parser import is_gpx_file_name, list_gpx_members, strip_gpx_suffix
+
+
+class BatchTask(NamedTuple):
+    """
+    One GPX file of a batch with the paths of its outputs. `member` is the GPX file in a zip archive.
+    """
+    gpx_file: str
+    output_map: str
+    output_report: Optional[str]
+    member: Optional[str] = None
+
+    def get_source(self) -> str:
+        return self.gpx_file if self.member is None else f'{self.gpx_file}:{self.member}'
+
+
+class BatchResult(NamedTuple):
+    """
+    Outcome of one BatchTask. `summary` is the summary returned by the pipeline, `error` is set if it failed.
+    """
+    task: BatchTask
+    succeeded: bool
+    elapsed: float
+    summary: Dict[str, Any]
+    error: Optional[str] = None
+
+
+def _glob_base_dir(pattern: str) -> str:
+    """
+    Return the directory part of a glob pattern before the first wildcard.
+    """
+    base_parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        base_parts.append(part)
+    return os.sep.join(base_parts) or os.curdir
+
+
+def find_gpx_files(inputs: List[str]) -> List[Tuple[str, str]]:
+    """
+    Collect the GPX files of the inputs. A directory input contributes every plain, compressed (.gpx.gz,
+    .gpx.bz2, .gpx.xz) and zipped GPX file below it, any other input is used as a glob pattern.
+
+    :param inputs: Directories or glob patterns.
+    :return: Sorted, de-duplicated (GPX file, base directory) pairs, the output tree mirrors the path of every
+        file relative to its base directory.
+    :raises FileNotFoundError: If an input matches no GPX file.
+    """
+    found: Dict[str, str] = {}
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            base_dir = input_path
+            matches = glob.glob(os.path.join(glob.escape(input_path), '**', '*'), recursive=True)
+            matches = [m for m in matches if is_gpx_file_name(m)]
+        else:
+            base_dir = os.path.dirname(input_path) if not glob.has_magic(input_path) else _glob_base_dir(input_path)
+            matches = glob.glob(input_path, recursive=True)
+        matches = [m for m in matches if os.path.isfile(m)]
+        if not matches:
+            raise FileNotFoundError(f"No GPX file found for {input_path}")
+        for match in matches:
+            found.setdefault(os.path.abspath(match), os.path.abspath(base_dir or os.curdir))
+    return sorted(found.items())
+
+
+def plan_batch(inputs: List[str], output_dir: str, report_format: Optional[str] = 'txt') -> List[BatchTask]:
+    """
+    Plan the outputs of every GPX file of the inputs in the output tree.
+
+    `<base>/trips/day1.gpx` is written to `<output_dir>/trips/day1.html` and `<output_dir>/trips/day1.txt`.
+    Every GPX file of a zip archive is a task of its own, `<base>/trips.zip` holding `day1.gpx.gz` is written to
+    `<output_dir>/trips/day1.html`.
+
+    :param inputs: Directories or glob patterns.
+    :param output_dir: Root of the output tree.
+    :param report_format: Extension of the reports, e.g. 'txt', or None for no report.
+    :return: One task per GPX file.
+    :raises FileNotFoundError: If an input matches no GPX file.
+    :raises ValueError: If two GPX files would be written to the same outputs, e.g. `a.gpx` and `a.gpx.gz`, or a
+        `trips.zip` archive and a `trips` directory holding GPX files of the same names.
+    """
+    tasks = []
+    for gpx_file, base_dir in find_gpx_files(inputs):
+        relative_path = strip_gpx_suffix(os.path.relpath(gpx_file, base_dir))
+        for member in list_gpx_members(gpx_file):
+            output_base = os.path.join(output_dir, relative_path)
+            if member is not None:
+                output_base = os.path.join(output_base, strip_gpx_suffix(member))
+            tasks.append(BatchTask(
+                gpx_file,
+                output_base + '.html',
+                f'{output_base}.{report_format}' if report_format else None,
+                member
+            ))
+
+    # Two workers writing the same outputs would overwrite each other's files
+    sources_by_output: Dict[str, List[str]] = {}
+    for task in tasks:
+        sources_by_output.setdefault(os.path.normcase(task.output_map), []).append(task.get_source())
+    collisions = [sources for sources in sources_by_output.values() if len(sources) > 1]
+    if collisions:
+        raise ValueError(
+            "GPX files would be written to the same outputs: "
+            + '; '.join(', '.join(sources) for sources in collisions)
+            + ". Rename or move one of them."
+        )
+    return tasks
+
+
+def run_batch_task(
+        task: BatchTask,
+        map_layers: List[Dict[str, str]],
+        cache_options: Optional[Dict[str, Any]] = None,
+        filter_options: Optional[Dict[str, Any]] = None
+) -> BatchResult:
+    """
+    Process one GPX file, the messages printed by the pipeline are discarded.
+    Any error is caught and returned in the result.
+
+    :param task: The GPX file and its outputs.
+    :param map_layers: The map layers, see `pipeline.pair_map_layers`.
+    :param cache_options: Keyword arguments of the TrackCache shared by the workers, or None to not use a cache.
+    :param filter_options: The time_range and bbox keyword arguments of `pipeline.process_gpx_file`, or None.
+    """
+    from src.pipeline import process_gpx_file
+    from src.geoanalyzer.tracks.track_cache import TrackCache
+
+    start = time.perf_counter()
+    try:
+        cache = TrackCache(**cache_options) if cache_options else None
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            summary = process_gpx_file(
+                task.gpx_file, task.output_map, map_layers, output_report=task.output_report, cache=cache,
+                member=task.member, **(filter_options or {})
+            )
+    except Exception as e:
+        return BatchResult(task, False, time.perf_counter() - start, {}, f"{type(e).__name__}: {e}")
+    return BatchResult(task, True, time.perf_counter() - start, summary)
+
+
+def _init_worker() -> None:
+    """
+    Import the pipeline once when the worker process starts.
+    """
+    import src.pipeline  # noqa: F401
+
+
+def run_batch(
+        tasks: List[BatchTask],
+        map_layers: List[Dict[str, str]],
+        workers: Optional[int] = None,
+        on_result: Optional[Callable[[BatchResult], None]] = None,
+        cache_options: Optional[Dict[str, Any]] = None,
+        filter_options: Optional[Dict[str, Any]] = None
+) -> List[BatchResult]:
+    """
+    Process the tasks over a pool of worker processes.
+
+    :param tasks: The tasks, see `plan_batch`.
+    :param map_layers: The map layers, see `pipeline.pair_map_layers`.
+    :param workers: Number of worker processes, defaults to the number of CPUs. With 1 worker the tasks run
+        in the current process.
+    :param on_result: Called with every result as soon as it is available.
+    :param cache_options: Keyword arguments of the TrackCache (cache_dir, size_limit), or None to not use a cache.
+    :param filter_options: The time_range and bbox applied to every file, see `pipeline.process_gpx_file`.
+    :return: The results in task order.
+    :raises ValueError: If the number of workers is less than 1.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers {workers}. Must be at least 1.")
+
+    results: Dict[int, BatchResult] = {}
+
+    def collect(index: int, result: BatchResult) -> None:
+        results[index] = result
+        if on_result:
+            on_result(result)
+
+    if workers == 1 or len(tasks) <= 1:
+        for index, task in enumerate(tasks):
+            collect(index, run_batch_task(task, map_layers, cache_options, filter_options))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(run_batch_task, task, map_layers, cache_options, filter_options): index
+                for index, task in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself failed, e.g. it was killed
+                    result = BatchResult(tasks[index], False, 0.0, {}, f"{type(e).__name__}: {e}")
+                collect(index, result)
+
+    return [results[index] for index in range(len(tasks))]
+
+
+def summarize_batch(results: List[BatchResult], wall_time: float) -> Dict[str, Any]:
+    """
+    Aggregate the results of a batch.
+
+    :param results: The batch results.
+    :param wall_time: Wall time of the whole batch in seconds.
+    :return: Counts of files, succeeded and failed files, summed track, rest and waypoint counts,
+        files loaded from the cache, the processing time summed over the files and the wall time.
+    """
+    succeeded = [r for r in results if r.succeeded]
+    return {
+        'files': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'track_points': sum(r.summary.get('track_points', 0) for r in succeeded),
+        'rest_points': sum(r.summary.get('rest_points', 0) for r in succeeded),
+        'waypoints': sum(r.summary.get('waypoints', 0) for r in succeeded),
+        'cache_hits': sum(1 for r in succeeded if r.summary.get('cache_hit')),
+        'processing_time': sum(r.elapsed for r in results),
+        'wall_time': wall_time,
+    }
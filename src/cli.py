@@ -1,156 +1,312 @@
 """
 The CLI tools for the project.
 Usage:
-    cli.py --gpx-file <input_file_path> --output-map <output_file_path> \
+    cli.py --gpx-file <input_file_path> [--gpx-member <member_name>] --output-map <output_file_path> \
            --map-tile <tile1> --map-attr <attr1> [--map-name <name1>] \
            [--map-tile <tile2> --map-attr <attr2> [--map-name <name2>]] ... \
            [--output-report <report_path>] \
-           [--picture-folder <pictures_folder>]
-To run the target GPX with analyzer and show the tracks.
+           [--picture-folder <pictures_folder>] \
+           [--time-range <start> <end>] [--bbox <min_lat> <min_lon> <max_lat> <max_lon>] \
+           [--cache-dir <cache_directory> [--cache-size-limit <megabytes>]] \
+           [--profile] [--profile-memory] [--cprofile-output <stats_file>] [--tracemalloc-output <text_file>]
+To run the target GPX with analyzer and show the tracks. The GPX file may be gzip, bzip2 or xz compressed,
+or a zip archive, --gpx-member selects the GPX file of an archive holding several.
+
+    cli.py batch <directory_or_glob> [<directory_or_glob> ...] --output-dir <output_directory> \
+           [--workers <n>] [--report-format txt|none] [--map-tile <tile1> --map-attr <attr1> ...] \
+           [--time-range <start> <end>] [--bbox <min_lat> <min_lon> <max_lat> <max_lon>] \
+           [--cache-dir <cache_directory> [--cache-size-limit <megabytes>]]
+To process many GPX files over a pool of worker processes, writing a map and a report per file.
+
+    cli.py convert <gpx_file> <track_file> [--gpx-member <member_name>] [--time-range <start> <end>] [--bbox ...]
+To convert a GPX file into a track file, which the analyze command memory maps instead of parsing.
+
+    cli.py follow <gpx_file> [--interval <seconds>] [--max-idle-polls <n>]
+To follow a GPX file while it is being recorded, parsing only the appended bytes on every poll.
 """
 
+import sys
+import time
+from typing import List, Optional, Tuple
+from xml.etree import ElementTree
+
 import click
-import os
-from src.geoanalyzer.tracks import gps_parser
-from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
-from src.geoanalyzer.images.image_parser import ImageParser
-from src.visualizartion.map_drawer import FoliumMapDrawer
-from src.visualizartion.report_generator import ReportGenerator
+from src.batch import BatchResult, plan_batch, run_batch, summarize_batch
+from src.pipeline import check_report_file, pair_map_layers, process_gpx_file
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint
+from src.geoanalyzer.tracks.gps_parser import GpxFollower, GpxParser, GpxPointFilter
+from src.geoanalyzer.tracks.track_analyzer import OnlineTrackAnalyzer
+from src.geoanalyzer.tracks.track_cache import DEFAULT_CACHE_SIZE_LIMIT, TrackCache
+from src.geoanalyzer.tracks.track_file import write_track_file
+from src.instrumentation.profiling import Profiler
+
+TIME_RANGE_FORMATS = ['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S']
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    Command group which runs its default command when the arguments do not start with a command name,
+    so `gpxana --gpx-file ...` keeps working next to `gpxana batch ...`.
+    """
+
+    default_command = 'analyze'
+
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in self.commands and args[0] not in ('--help', '-h'):
+            args = [self.default_command] + list(args)
+        return super().parse_args(ctx, args)
+
+
+def cache_options(command):
+    """
+    Add the --cache-dir and --cache-size-limit options to a command.
+    """
+    command = click.option('--cache-size-limit', type=click.IntRange(min=0), default=DEFAULT_CACHE_SIZE_LIMIT >> 20,
+                           show_default=True,
+                           help='Maximum size of the cache in MB, the least recently used entries are removed.')(command)
+    command = click.option('--cache-dir', type=click.Path(file_okay=False), required=False,
+                           help='Directory caching the parsed and analyzed tracks. An unchanged GPX file is then '
+                                'neither parsed nor analyzed again.')(command)
+    return command
+
 
+def point_filter_options(command):
+    """
+    Add the --time-range and --bbox options to a command, which keep only the points inside them.
+    """
+    command = click.option('--bbox', type=float, nargs=4, required=False,
+                           metavar='MIN_LAT MIN_LON MAX_LAT MAX_LON',
+                           help='Keep only the points inside this bounding box.')(command)
+    command = click.option('--time-range', type=click.DateTime(formats=TIME_RANGE_FORMATS), nargs=2, required=False,
+                           metavar='START END',
+                           help='Keep only the points recorded between START and END (inclusive, local time), '
+                                'e.g. 2023-08-28 2023-08-28T23:59:59.')(command)
+    return command
 
-@click.command()
-@click.option('--gpx-file', type=click.Path(exists=True), required=True, help='Path to the GPX file to load.')
+
+def map_layer_options(command):
+    """
+    Add the --map-tile, --map-attr and --map-name options to a command.
+    """
+    command = click.option('--map-name', type=str, required=False, multiple=True,
+                           help='The display names for the map tiles. Should align with the map tiles.')(command)
+    command = click.option('--map-attr', type=str, required=False, multiple=True,
+                           default=['Map data © OpenStreetMap contributors'],
+                           help='The attributions of the map tiles. Should match the number of map tiles.')(command)
+    command = click.option('--map-tile', type=str, required=False, multiple=True, default=['OpenStreetMap'],
+                           help='The map tile providers or URLs to use. Can be specified multiple times.')(command)
+    return command
+
+
+@click.group(cls=DefaultCommandGroup, context_settings={'help_option_names': ['-h', '--help']})
+def main():
+    """CLI tool for parsing GPX files and generating interactive maps.
+
+    Runs the analyze command unless another command is given."""
+
+
+@main.command()
+@click.option('--gpx-file', type=click.Path(exists=True), required=True,
+              help='Path to the GPX file to load, may be .gpx.gz, .gpx.bz2, .gpx.xz, a .zip archive '
+                   'or a track file written by the convert command.')
+@click.option('--gpx-member', type=str, required=False,
+              help='Name of the GPX file to load from a zip archive holding several GPX files.')
 @click.option('--output-map', type=click.Path(), required=True, help='Path to save the output map HTML file.')
-@click.option('--map-tile', type=str, required=False, multiple=True, default=['OpenStreetMap'],
-              help='The map tile providers or URLs to use. Can be specified multiple times.')
-@click.option('--map-attr', type=str, required=False, multiple=True,
-              default=['Map data © OpenStreetMap contributors'],
-              help='The attributions of the map tiles. Should match the number of map tiles.')
-@click.option('--map-name', type=str, required=False, multiple=True,
-              help='The display names for the map tiles. Should align with the map tiles.')
+@map_layer_options
 @click.option('--output-report', type=click.Path(), required=False, help='Path to save the output report (e.g., .txt or .md).')
 @click.option('--picture-folder', type=click.Path(exists=True), required=False, help='Folder containing pictures to parse.')
-def main(gpx_file, output_map, map_tile, map_attr, map_name, output_report, picture_folder):
-    """CLI tool for parsing GPX files and generating interactive maps."""
+@point_filter_options
+@cache_options
+@click.option('--profile', is_flag=True, default=False, help='Print the time spent in every pipeline stage.')
+@click.option('--profile-memory', is_flag=True, default=False,
+              help='Trace the memory of every pipeline stage with tracemalloc (slower), implies --profile.')
+@click.option('--cprofile-output', type=click.Path(), required=False,
+              help='Record the run with cProfile and save the statistics to this file, implies --profile.')
+@click.option('--tracemalloc-output', type=click.Path(), required=False,
+              help='Save the source lines holding the most memory to this file, implies --profile-memory.')
+def analyze(gpx_file, gpx_member, output_map, map_tile, map_attr, map_name, output_report, picture_folder,
+            time_range, bbox, cache_dir, cache_size_limit, profile, profile_memory, cprofile_output, tracemalloc_output):
+    """Parse and analyze one GPX file and generate its map."""
+
+    cache = TrackCache(cache_dir, cache_size_limit << 20) if cache_dir else None
+
+    profile_memory = profile_memory or bool(tracemalloc_output)
+    if not (profile or profile_memory or cprofile_output):
+        run_pipeline(gpx_file, output_map, map_tile, map_attr, map_name, output_report, picture_folder, cache, gpx_member,
+                     time_range, bbox)
+        return
+
+    with Profiler(trace_memory=profile_memory, use_cprofile=bool(cprofile_output)) as profiler:
+        run_pipeline(gpx_file, output_map, map_tile, map_attr, map_name, output_report, picture_folder, cache, gpx_member,
+                     time_range, bbox)
+
+    click.echo(profiler.format_table())
+    if cprofile_output:
+        profiler.dump_cprofile(cprofile_output)
+        click.echo(f"cProfile statistics saved at {cprofile_output}")
+    if tracemalloc_output:
+        profiler.dump_tracemalloc(tracemalloc_output)
+        click.echo(f"tracemalloc statistics saved at {tracemalloc_output}")
+
+
+def run_pipeline(gpx_file, output_map, map_tile, map_attr, map_name, output_report, picture_folder, cache=None,
+                 gpx_member=None, time_range=None, bbox=None):
+    """
+    Parse and analyze the GPX file, then generate the map and optionally the report.
+    Errors are reported on stderr instead of being raised.
+
+    :param gpx_file: Path to the GPX file to load.
+    :param output_map: Path to save the output map HTML file.
+    :param map_tile: The map tile providers or URLs to use.
+    :param map_attr: The attributions of the map tiles.
+    :param map_name: The display names for the map tiles.
+    :param output_report: Path to save the output report, or None.
+    :param picture_folder: Folder containing pictures to parse, or None.
+    :param cache: The TrackCache of analyzed tracks, or None.
+    :param gpx_member: The name of the GPX file in a zip archive, or None.
+    :param time_range: Process only the points in this (start, end) local time window, or None.
+    :param bbox: Process only the points in this (min lat, min lon, max lat, max lon) bounding box, or None.
+    """
 
     try:
-        # Validate that the number of map tiles and attributions match
-        if len(map_tile) != len(map_attr):
-            click.echo("Error: The number of --map-tile and --map-attr options must be the same.", err=True)
-            return
-
-        # Validate that the number of map names does not exceed map tiles
-        if len(map_name) > len(map_tile):
-            click.echo("Error: The number of --map-name options cannot exceed the number of --map-tile options.", err=True)
-            return
-
-        # Pair map_tiles, map_attrs, and map_names
-        # If a map_name is not provided for a map_tile, use the map_tile URL as its name
-        paired_map_layers = []
-        for i in range(len(map_tile)):
-            tile = map_tile[i]
-            attr = map_attr[i]
-            name = map_name[i] if i < len(map_name) else tile
-            paired_map_layers.append({
-                'tile': tile,
-                'attr': attr,
-                'name': name
-            })
-
-        # Parsing GPX file
-        gpx_parser_obj = gps_parser.GpxParser(gpx_file)
-
-        # Analyzing tracks
-        tracks_object = TrackAnalyzer(gpx_parser_obj.get_raw_track_object())
-        tracks = tracks_object.get_main_track()
-
-        # If provided, parse images and get image points
-        image_points = []
-        if picture_folder:
-            image_parser = ImageParser(picture_folder)
-            image_points = image_parser.get_image_points()
-            processed_files, skipped_non_jpg, skipped_no_gps, errors = image_parser.get_summary()
-
-            # Display summary to the user
-            click.echo(f"Processed {processed_files} JPG files.")
-            click.echo(f"Skipped {skipped_non_jpg} non-JPG files.")
-            click.echo(f"Skipped {skipped_no_gps} JPG files without GPS data.")
-            if errors:
-                click.echo("Errors encountered during image parsing:")
-                for error in errors:
-                    click.echo(f"- {error}")
-
-        # Report Generation
+        map_layers = pair_map_layers(map_tile, map_attr, map_name)
         if output_report:
-            # Ensure the report file has a supported extension (e.g., .txt or .md)
-            if not output_report.endswith(('.txt', '.md')):
-                click.echo("Error: The --output-report file must have a '.txt' or '.md' extension.", err=True)
-                return
-
-            # Ensure the output directory exists
-            file_path, _ = os.path.split(output_report)
-            if not os.path.exists(file_path) and file_path != '':
-                click.echo(f"Directory {file_path} does not exist. Creating directory...", err=True)
-                os.makedirs(file_path)
-
-            reporter = ReportGenerator(tracks_object)
-            reporter.generate_report(saved_file=output_report, saved_format=os.path.splitext(output_report)[1][1:])
-            click.echo(f"Report successfully generated at {output_report}")
-
-        # Generating map
-        # Extract the starting point from the tracks for centering the map
-        start_point = tracks.get_start_point()
-        map_drawer = FoliumMapDrawer(
-            location_x=start_point.lat,
-            location_y=start_point.lon,
-            zoom_start=15,
-            map_tiles=[layer['tile'] for layer in paired_map_layers],
-            map_attrs=[layer['attr'] for layer in paired_map_layers],
-            map_names=[layer['name'] for layer in paired_map_layers]
-        )
-
-        # Add tracks to the map
-        map_drawer.add_tracks(tracks, weight=4, color='blue')
-
-        # Draw rest points as green circles
-        map_drawer.draw_points_on_map(
-            tracks_object.get_rest_point_list(),
-            point_type='circle',
-            point_info='休息點',
-            point_color='green',
-            point_radius=10,
-            alpha=0.3
-        )
-
-        # Draw waypoints as blue markers
-        map_drawer.draw_points_on_map(
-            tracks_object.get_waypoint_list(),
-            point_type='marker',
-            point_info='',
-            point_color='blue',
-            point_radius=None,
-            alpha=None
-        )
-
-        # Add image points to the map as red markers, if any
-        if image_points:
-            map_drawer.draw_points_on_map(
-                image_points,
-                point_type='marker',
-                point_info='',
-                point_color='red',
-                point_radius=None,
-                alpha=None
-            )
-
-        # Save the generated map to the specified output path
-        map_drawer.save(output_map)
-
-        click.echo(f"Map successfully generated at {output_map}")
+            check_report_file(output_report)
+        GpxPointFilter(time_range, bbox)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        return
 
+    try:
+        process_gpx_file(gpx_file, output_map, map_layers, output_report, picture_folder, echo=click.echo, cache=cache,
+                         member=gpx_member, time_range=time_range, bbox=bbox)
     except Exception as e:
         click.echo(f"An error occurred: {str(e)}", err=True)
 
 
+@main.command()
+@click.argument('inputs', nargs=-1, required=True)
+@click.option('--output-dir', type=click.Path(file_okay=False), required=True,
+              help='Root of the output tree, every GPX file gets its map and report at its relative path.')
+@click.option('--workers', type=click.IntRange(min=1), required=False,
+              help='Number of worker processes. Default is the number of CPUs.')
+@click.option('--report-format', type=click.Choice(['txt', 'none']), default='txt', show_default=True,
+              help='Format of the report written next to every map, none to skip the reports.')
+@map_layer_options
+@point_filter_options
+@cache_options
+def batch(inputs, output_dir, workers, report_format, map_tile, map_attr, map_name, time_range, bbox, cache_dir,
+          cache_size_limit):
+    """Process every GPX file of the INPUTS (directories or glob patterns) over a pool of worker processes.
+
+    Compressed GPX files are read directly, every GPX file of a zip archive is processed on its own."""
+    try:
+        map_layers = pair_map_layers(map_tile, map_attr, map_name)
+        GpxPointFilter(time_range, bbox)
+        tasks = plan_batch(list(inputs), output_dir, None if report_format == 'none' else report_format)
+    except (ValueError, FileNotFoundError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(2)
+
+    click.echo(f"Processing {len(tasks)} GPX files...")
+
+    def print_result(result: BatchResult):
+        if result.succeeded:
+            click.echo(f"[ok]     {result.task.get_source()} ({result.elapsed:.2f} s) -> {result.task.output_map}")
+        else:
+            click.echo(f"[failed] {result.task.get_source()}: {result.error}", err=True)
+
+    start = time.perf_counter()
+    cache = {'cache_dir': cache_dir, 'size_limit': cache_size_limit << 20} if cache_dir else None
+    results = run_batch(tasks, map_layers, workers, on_result=print_result, cache_options=cache,
+                        filter_options={'time_range': time_range, 'bbox': bbox})
+    summary = summarize_batch(results, time.perf_counter() - start)
+
+    click.echo(
+        f"\nProcessed {summary['files']} files: {summary['succeeded']} succeeded, {summary['failed']} failed.\n"
+        f"Track points: {summary['track_points']}, rest points: {summary['rest_points']}, "
+        f"waypoints: {summary['waypoints']}, loaded from the cache: {summary['cache_hits']} files.\n"
+        f"Wall time: {summary['wall_time']:.2f} s, processing time summed over files: {summary['processing_time']:.2f} s."
+    )
+    failed = [result for result in results if not result.succeeded]
+    if failed:
+        click.echo("Failed files:", err=True)
+        for result in failed:
+            click.echo(f"- {result.task.get_source()}: {result.error}", err=True)
+        sys.exit(1)
+
+
+@main.command()
+@click.argument('gpx_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('track_file', type=click.Path(dir_okay=False))
+@click.option('--gpx-member', type=str, required=False,
+              help='Name of the GPX file to convert from a zip archive holding several GPX files.')
+@point_filter_options
+def convert(gpx_file, track_file, gpx_member, time_range, bbox):
+    """Convert GPX_FILE into the binary TRACK_FILE (.gtrk), which is memory mapped instead of parsed."""
+    try:
+        raw_track_object = GpxParser(
+            gpx_file, mode='columnar', member=gpx_member, time_range=time_range, bbox=bbox
+        ).get_raw_track_object()
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(2)
+
+    header = write_track_file(track_file, raw_track_object)
+    click.echo(f"Track file successfully written at {track_file}: {header.point_count} track points, "
+               f"{len(raw_track_object.get_waypoint_list())} waypoints.")
+
+
+@main.command()
+@click.argument('gpx_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--interval', type=click.FloatRange(min=0), default=5.0, show_default=True,
+              help='Seconds between two polls of the file.')
+@click.option('--max-idle-polls', type=click.IntRange(min=1), required=False,
+              help='Stop after this many polls without new points. Default is to follow until interrupted.')
+def follow(gpx_file, interval, max_idle_polls):
+    """Follow GPX_FILE while it is being recorded and print the analysis of the points recorded so far.
+
+    The file may be unterminated, every poll parses only the bytes appended since the previous one, and the
+    new points are analyzed incrementally: a rest point is printed as soon as it is final."""
+    follower = GpxFollower(gpx_file)
+    online_analyzer = OnlineTrackAnalyzer()
+    waypoint_count = 0
+    rest_count = 0
+    last_segment: Optional[Tuple[int, int]] = None
+
+    def echo_rest_points(rest_point_list: List[RestTrkPoint]) -> None:
+        nonlocal rest_count
+        for rest_point in rest_point_list:
+            rest_count += 1
+            click.echo(f"Rest point {rest_count} from {rest_point.get_start_time()} to {rest_point.get_end_time()} "
+                       f"at ({rest_point.lat:.6f}, {rest_point.lon:.6f})")
+
+    try:
+        for update in follower.follow(interval, max_idle_polls):
+            waypoint_count += len(update.waypoints)
+            if not len(update.track_frame):
+                continue
+
+            for segment in update.segment_list:
+                if last_segment is not None and (segment.track_index, segment.segment_index) != last_segment:
+                    echo_rest_points(online_analyzer.start_segment())
+                last_segment = (segment.track_index, segment.segment_index)
+                segment_frame = update.track_frame.slice(segment.start, segment.stop)
+                echo_rest_points(online_analyzer.push_many(
+                    segment_frame.lat, segment_frame.lon, segment_frame.elev, segment_frame.time
+                ))
+            click.echo(f"{follower.get_point_count()} track points (+{len(update.track_frame)}), "
+                       f"{rest_count} rest points, "
+                       f"{waypoint_count} waypoints, "
+                       f"last point at {update.track_frame.get_point(-1).time}")
+    except (ValueError, ElementTree.ParseError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
+    echo_rest_points(online_analyzer.close())
+    click.echo(f"Stopped following {gpx_file} at byte {follower.get_offset()}.")
+
+
 if __name__ == '__main__':
     main()
@@ -16,13 +16,15 @@ class AnalyzedTrkPoint(BasicPoint):
     Analyzed track point object is the model to save track point
     """
 
+    __slots__ = ('_dx', '_dy', '_dz', '_dt', '_integral_dst')
+
     def __init__(self, time, lat, lon, elev, dx, dy, dz, dt):
         super(AnalyzedTrkPoint, self).__init__(time, lat, lon, elev)
         self._dx = dx
         self._dy = dy
         self._dz = dz
         self._dt = dt
-        self._integral_dst = 0
+        self._integral_dst: float = 0
 
     def set_point_integral_dst(self, in_dst):
         self._integral_dst = in_dst
@@ -86,6 +88,9 @@ class RestTrkPoint(BasicPoint):
     """
     Rest track point object is the model to save track point
     """
+
+    __slots__ = ('_start_time', '_end_time')
+
     def __init__(self, time, lat, lon, elev, start_time, end_time):
         super(RestTrkPoint, self).__init__(time, lat, lon, elev)
         self._start_time = start_time
@@ -109,6 +114,12 @@ class RestTrkPoint(BasicPoint):
 
 
 class RestTrkPointCandidate:
+
+    __slots__ = (
+        '_start_time', '_point_count', '_accumulated_lat', '_accumulated_lon', '_accumulated_elev',
+        '_tot_delta_x', '_tot_delta_y', '_last_point_time'
+    )
+
     def __init__(self, first_point: AnalyzedTrkPoint):
 
         if not isinstance(first_point, AnalyzedTrkPoint):
@@ -188,6 +199,9 @@ class RestTrkPointCandidate:
 
 
 class SeedRestPoint:
+
+    __slots__ = ('_lat', '_lon', '_elev', '_start_time')
+
     def __init__(self, lat, lon, elev, start_time):
         self._lat = lat
         self._lon = lon
@@ -3,7 +3,14 @@
 class BasicPoint:
     """
     Basic point object provide a template for all other types of geography gps point to save point
+
+    The point classes declare their attributes in `__slots__` instead of keeping a per-instance `__dict__`,
+    which keeps the memory of tracks holding millions of points small. Subclasses must declare `__slots__`
+    for their own attributes as well.
     """
+
+    __slots__ = ('_time', '_lat', '_lon', '_elev', '_is_empty')
+
     def __init__(self, time, lat, lon, elev=None):
         if lat is not None and not (-90 <= lat <= 90):
             raise ValueError(f"Invalid latitude {lat}. Must be between -90 and 90 degrees.")
@@ -16,6 +16,8 @@ class ImagePoint(BasicPoint):
     :param additional_info: Any additional metadata or notes.
     """
 
+    __slots__ = ('_file_name', '_image_url', '_additional_info')
+
     def __init__(self, file_name, time, lat, lon, elev=None, image_url=None, additional_info=None):
         if file_name is None:
             raise TypeError("file_name cannot be None")
@@ -12,6 +12,9 @@ class WayPoint(BasicPoint):
     Way point object is the model to save waypoint
     row information which extracting directory from gpx file.
     """
+
+    __slots__ = ('_note',)
+
     def __init__(self, time=None, lat=None, lon=None, elev=None, note=None):
         super(WayPoint, self).__init__(time, lat, lon, elev)
         self._note = note
@@ -26,5 +29,7 @@ class RawTrkPoint(BasicPoint):
     row information which extracting directory from gpx file.
     """
 
+    __slots__ = ()
+
     def __init__(self, time=None, lat=None, lon=None, elev=None):
         super(RawTrkPoint, self).__init__(time, lat, lon, elev)
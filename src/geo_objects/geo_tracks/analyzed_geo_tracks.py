@@ -1,14 +1,19 @@
 
-from typing import Union
+from typing import List, Optional, Union
 from src.geo_objects.geo_tracks.basic_track import BasicTracks
 from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
 from src.geo_objects.geo_points.basic_point import BasicPoint
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
 from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame, AnalyzedTrkPointView
+from src.geo_objects.geo_tracks.track_distance import TrackDistanceIndex
+from src.geo_objects.geo_tracks.track_statistics import TrackStatistics
 
 
 class AnalyzedTracks(BasicTracks):
 
+    _point_view_class = AnalyzedTrkPointView
+
     def __init__(self):
         """
         Container for hold a Track, composed by the list of AnalyzedTrkPoints.
@@ -21,16 +26,24 @@ class AnalyzedTracks(BasicTracks):
 
     def add_track_point(self, analyzed_trk_point: Union[BasicPoint, RawTrkPoint, AnalyzedTrkPoint]):
         if isinstance(analyzed_trk_point, AnalyzedTrkPoint):
+            self._invalidate_track_frame()
             self._main_track_points_list.append(analyzed_trk_point)
         else:
             print("error, have to append analyzedTrkPoint in this class")
             pass
 
+    def _build_track_frame(self) -> TrackFrame:
+        points = self._main_track_points_list
+        return TrackFrame.from_points(
+            points,
+            dx=[p.get_delta_x() for p in points],
+            dy=[p.get_delta_y() for p in points],
+            dz=[p.get_delta_z() for p in points],
+            dt=[p.get_point_delta_time() for p in points],
+        )
+
     def get_total_integral_xy_displacement(self):
-        tot_dist_integration = 0
-        for i in self._main_track_points_list:
-            tot_dist_integration += i.get_delta_xy()
-        return tot_dist_integration
+        return TrackDistanceIndex(self.get_track_frame()).get_total_distance()
 
 
 class AnalyzedTrackObject(RawTrackObject):
@@ -49,8 +62,11 @@ class AnalyzedTrackObject(RawTrackObject):
         # List of Rest Point
         self._rest_point_list = []
         self._first_point_hours_list = []
+        self._great_turn_list = []
         self._great_turn_point_list = []
         self._great_turn_vector_list = []
+        self._track_statistics: Optional[TrackStatistics] = None
+        self._distance_index: Optional[TrackDistanceIndex] = None
 
         # In analyzed tracks object, setting waypoint list directly,
         # Inheritance from RawTrkObject, get_waypoint_list function() is defined already
@@ -70,12 +86,18 @@ class AnalyzedTrackObject(RawTrackObject):
     def set_every_hour_first_point_list(self, input_list):
         self._first_point_hours_list = input_list
 
+    def set_great_turn_list(self, input_list):
+        self._great_turn_list = input_list
+
     def set_great_turn_point_list(self, input_list):
         self._great_turn_point_list = input_list
 
     def set_great_turn_vector_list(self, input_list):
         self._great_turn_vector_list = input_list
 
+    def set_track_statistics(self, track_statistics: Optional[TrackStatistics]):
+        self._track_statistics = track_statistics
+
     # ===================== #
     # Get function series   #
     # ===================== #
@@ -86,11 +108,43 @@ class AnalyzedTrackObject(RawTrackObject):
     def get_every_hour_first_point_list(self):
         return self._first_point_hours_list
 
+    def get_great_turn_list(self):
+        return self._great_turn_list
+
     def get_great_turn_point_list(self):
         return self._great_turn_point_list
 
     def get_great_turn_vector_list(self):
         return self._great_turn_vector_list
 
-    def get_total_integral_distance(self):
-        return [i.get_point_integral_dst for i in self._main_tracks]
+    def get_track_statistics(self) -> TrackStatistics:
+        """
+        Return the statistics set by the analyzer, or reduce them from the analyzed points if none were set.
+        """
+        if self._track_statistics is not None:
+            return self._track_statistics
+        return TrackStatistics.from_track_frame(self._main_tracks.get_track_frame())
+
+    def get_distance_index(self) -> TrackDistanceIndex:
+        """
+        Return the distance queries over the analyzed points, built once per track frame.
+        """
+        track_frame = self._main_tracks.get_track_frame()
+        if self._distance_index is None or self._distance_index.get_track_frame() is not track_frame:
+            self._distance_index = TrackDistanceIndex(track_frame)
+        return self._distance_index
+
+    def get_total_integral_distance(self, dimension: str = 'xy') -> float:
+        return self.get_distance_index().get_total_distance(dimension)
+
+    def get_waypoint_distance_list(self, dimension: str = 'xy') -> List[float]:
+        """
+        Return the distance travelled up to every waypoint, in meters, see `TrackDistanceIndex.get_distances_at_points`.
+        """
+        return self.get_distance_index().get_distances_at_points(self._waypoint_list, dimension)
+
+    def get_rest_point_distance_list(self, dimension: str = 'xy') -> List[float]:
+        """
+        Return the distance travelled up to the start of every rest point, in meters.
+        """
+        return self.get_distance_index().get_distances_at_points(self._rest_point_list, dimension)
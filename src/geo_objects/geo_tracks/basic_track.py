@@ -1,7 +1,10 @@
-from typing import Union
+from typing import Optional, Type, Union
 from src.geo_objects.geo_points.basic_point import BasicPoint
 from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame, TrackFramePointList, TrackPointView
+from src.geo_objects.geo_tracks.track_spatial_index import TrackSpatialIndex
+from src.geo_objects.geo_tracks.track_time_index import TrackTimeIndex
 
 
 class BasicTracks:
@@ -9,15 +12,43 @@ class BasicTracks:
     The BasicTracks class serves as a base class for other track classes.
     It provides basic functionality for managing a list of track points.
 
+    The track points can either be held as a list of point objects, or the track can wrap a columnar
+    TrackFrame, in which case the point list is a sequence of lightweight point views over the frame.
+
     :ivar _main_track_points_list: List of track points
     :vartype _main_track_points_list: list
+    :ivar _track_frame: Columnar representation of the track points, built on demand for list based tracks
+    :vartype _track_frame: Optional[TrackFrame]
+    :ivar _time_index: Time index of the track points, built on demand and dropped with the track frame
+    :vartype _time_index: Optional[TrackTimeIndex]
+    :ivar _spatial_index: Spatial index of the track points, built on demand and dropped with the track frame
+    :vartype _spatial_index: Optional[TrackSpatialIndex]
     """
 
+    # Point view class handed out for tracks wrapping a TrackFrame
+    _point_view_class: Type[BasicPoint] = TrackPointView
+
     def __init__(self):
         """
         Initializes a new instance of the BasicTracks class.
         """
         self._main_track_points_list = []
+        self._track_frame: Optional[TrackFrame] = None
+        self._time_index: Optional[TrackTimeIndex] = None
+        self._spatial_index: Optional[TrackSpatialIndex] = None
+
+    @classmethod
+    def from_track_frame(cls, track_frame: TrackFrame):
+        """
+        Create a track wrapping the given TrackFrame.
+
+        :param track_frame: The columnar track points.
+        :type track_frame: TrackFrame
+        :return: The new track instance.
+        """
+        tracks = cls()
+        tracks.set_track_frame(track_frame)
+        return tracks
 
     def __iter__(self):
         """
@@ -30,8 +61,71 @@ class BasicTracks:
         return iter(self._main_track_points_list)
 
     def add_track_point(self, trk_point: Union[BasicPoint, RawTrkPoint, AnalyzedTrkPoint]):
+        self._invalidate_track_frame()
         self._main_track_points_list.append(trk_point)
 
+    def set_track_frame(self, track_frame: TrackFrame):
+        """
+        Wrap the given TrackFrame, replacing the current track points.
+
+        :param track_frame: The columnar track points.
+        :type track_frame: TrackFrame
+        """
+        self._track_frame = track_frame
+        self._time_index = None
+        self._spatial_index = None
+        self._main_track_points_list = TrackFramePointList(track_frame, self._point_view_class)  # type: ignore[assignment]
+
+    def get_track_frame(self) -> TrackFrame:
+        """
+        Return the columnar representation of the track points.
+        For list based tracks the frame is built on first access and kept until a point is added.
+
+        :return: The TrackFrame of the track points.
+        :rtype: TrackFrame
+        """
+        if self._track_frame is None:
+            self._track_frame = self._build_track_frame()
+        return self._track_frame
+
+    def _build_track_frame(self) -> TrackFrame:
+        return TrackFrame.from_points(self._main_track_points_list)
+
+    def _invalidate_track_frame(self):
+        """
+        Called before the point list is modified. A wrapped TrackFrame is materialised into a list of point views,
+        so points can be appended, and the cached frame is dropped.
+        """
+        if isinstance(self._main_track_points_list, TrackFramePointList):
+            self._main_track_points_list = list(self._main_track_points_list)
+        self._track_frame = None
+        self._time_index = None
+        self._spatial_index = None
+
+    def get_time_index(self) -> TrackTimeIndex:
+        """
+        Return the time index of the track points, answering point-at-time queries in O(log n).
+        It is built on first access and kept until a point is added.
+
+        :return: The time index, its indices are those of `get_track_point`.
+        :rtype: TrackTimeIndex
+        """
+        if self._time_index is None:
+            self._time_index = TrackTimeIndex(self.get_track_frame())
+        return self._time_index
+
+    def get_spatial_index(self) -> TrackSpatialIndex:
+        """
+        Return the spatial index of the track points, answering nearest point and radius queries without a scan
+        over every point. It is built on first access and kept until a point is added.
+
+        :return: The spatial index, its indices are those of `get_track_point`.
+        :rtype: TrackSpatialIndex
+        """
+        if self._spatial_index is None:
+            self._spatial_index = TrackSpatialIndex(self.get_track_frame())
+        return self._spatial_index
+
     def get_track_point(self, i):
         return self._main_track_points_list[i]
 
@@ -1,11 +1,15 @@
-from typing import Union
+from typing import List, Union
 from src.geo_objects.geo_tracks.basic_track import BasicTracks
 from src.geo_objects.geo_points.basic_point import BasicPoint
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint, WayPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame, RawTrkPointView
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
 
 
 class RawTracks(BasicTracks):
 
+    _point_view_class = RawTrkPointView
+
     def __init__(self):
         """
         Container for hold a Track, composed by the list of RowTrkPoints
@@ -17,6 +21,7 @@ class RawTracks(BasicTracks):
     def add_track_point(self, raw_track_point: Union[BasicPoint, RawTrkPoint]):
 
         if isinstance(raw_track_point, RawTrkPoint):
+            self._invalidate_track_frame()
             self._main_track_points_list.append(raw_track_point)
         else:
             print("error, have to append RawTrkPoint in this class")
@@ -29,6 +34,7 @@ class RawTrackObject:
 
         self._main_tracks: BasicTracks = RawTracks()
         self._waypoint_list = []
+        self._segment_list: List[TrackSegment] = []
 
     def add_track_point(self, new_track_point):
         if isinstance(new_track_point, RawTrkPoint):
@@ -49,8 +55,55 @@ class RawTrackObject:
     def get_track_point(self, i):
         return self._main_tracks.get_track_point(i)
 
+    def set_track_frame(self, track_frame: TrackFrame):
+        """
+        Let the main tracks wrap the given columnar track points.
+
+        :param track_frame: The columnar track points.
+        :type track_frame: TrackFrame
+        """
+        self._main_tracks.set_track_frame(track_frame)
+
+    def get_track_frame(self) -> TrackFrame:
+        return self._main_tracks.get_track_frame()
+
     def get_waypoint_list(self):
         return self._waypoint_list
 
+    def set_segment_list(self, segment_list: List[TrackSegment]):
+        """
+        Set the track segments of the track points, see `TrackSegment`.
+
+        :param segment_list: The segments, covering the track points in order.
+        :type segment_list: List[TrackSegment]
+        """
+        self._segment_list = segment_list
+
+    def get_segment_list(self) -> List[TrackSegment]:
+        """
+        Return the track segments of the track points. Without recorded segments, e.g. for a track object
+        built point by point, all track points form one segment. Points added after the segments were recorded
+        continue the last segment.
+
+        :return: The segments, covering the track points in order.
+        :rtype: List[TrackSegment]
+        """
+        point_count = len(self._main_tracks.get_main_tracks_points_list())
+        if self._segment_list:
+            last_segment = self._segment_list[-1]
+            if last_segment.stop < point_count:
+                self._segment_list = self._segment_list[:-1] + [last_segment._replace(stop=point_count)]
+            return self._segment_list
+        return [TrackSegment(0, 0, 0, point_count)] if point_count else []
+
+    def get_segment_track_frames(self) -> List[TrackFrame]:
+        """
+        Return the track points of every segment, the arrays are views of the track frame.
+
+        :rtype: List[TrackFrame]
+        """
+        track_frame = self.get_track_frame()
+        return [track_frame.slice(segment.start, segment.stop) for segment in self.get_segment_list()]
+
     def get_main_tracks(self):
         return self._main_tracks
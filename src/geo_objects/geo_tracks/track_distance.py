@@ -0,0 +1,140 @@
+"""
+Cumulative distance along an analyzed track.
+
+The horizontal and 3D step of every analyzed point (from its dx, dy and dz) are summed once into prefix arrays,
+the `integral_dst` and `integral_dst_3d` columns: the value of a point is the distance travelled from the start
+of the track up to and including the point. The distance between any two points is then the difference of two
+prefix values, and the distance at any time is interpolated between the prefix values of the points around it.
+"""
+
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.basic_point import BasicPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_time_index import to_epoch_time
+
+DISTANCE_DIMENSIONS = ('xy', '3d')
+
+_DIMENSION_COLUMNS = {'xy': 'integral_dst', '3d': 'integral_dst_3d'}
+
+
+def cumulative_distances(analyzed_frame: TrackFrame) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Sum the horizontal and the 3D steps of the analyzed points, a step which is not a number counts as 0.
+
+    :param analyzed_frame: The analyzed points, providing the dx, dy and dz columns.
+    :return: The cumulative horizontal and 3D distances in meters, one per point.
+    """
+    delta_x = analyzed_frame.get_column('dx')
+    delta_y = analyzed_frame.get_column('dy')
+    delta_z = analyzed_frame.get_column('dz')
+    step_xy = np.hypot(delta_x, delta_y)
+    step_3d = np.sqrt(delta_x * delta_x + delta_y * delta_y + delta_z * delta_z)
+    return np.nancumsum(step_xy), np.nancumsum(step_3d)
+
+
+def add_cumulative_distances(analyzed_frame: TrackFrame) -> TrackFrame:
+    """
+    Return the analyzed points with the `integral_dst` and `integral_dst_3d` columns, see `cumulative_distances`.
+    """
+    integral_dst, integral_dst_3d = cumulative_distances(analyzed_frame)
+    return analyzed_frame.with_columns(integral_dst=integral_dst, integral_dst_3d=integral_dst_3d)
+
+
+class TrackDistanceIndex:
+    """
+    Distance queries on an analyzed track, answered from its cumulative distance columns.
+
+    The columns are read from the frame if the analyzer stored them, otherwise they are computed once. The
+    distance between two point indices takes constant time; the distance at a time is looked up with a binary
+    search over the point times, which have to be in order.
+
+    :param analyzed_frame: The analyzed points, providing the dx, dy and dz columns.
+    """
+
+    def __init__(self, analyzed_frame: TrackFrame):
+        self._track_frame = analyzed_frame
+        if all(analyzed_frame.has_column(column) for column in _DIMENSION_COLUMNS.values()):
+            integral_dst = analyzed_frame.get_column('integral_dst')
+            integral_dst_3d = analyzed_frame.get_column('integral_dst_3d')
+        else:
+            integral_dst, integral_dst_3d = cumulative_distances(analyzed_frame)
+        self._integral_dst = {'xy': integral_dst, '3d': integral_dst_3d}
+
+        # Points without a time can not be found by time
+        timed = ~np.isnat(analyzed_frame.time)
+        self._timed_epoch_time = analyzed_frame.get_epoch_time()[timed].astype(np.float64)
+        self._timed_integral_dst = {dimension: values[timed] for dimension, values in self._integral_dst.items()}
+
+    def get_track_frame(self) -> TrackFrame:
+        return self._track_frame
+
+    def _get_integral_dst(self, dimension: str) -> NDArray[np.float64]:
+        if dimension not in DISTANCE_DIMENSIONS:
+            raise ValueError(
+                f"Invalid distance dimension: {dimension}. Supported dimensions are {', '.join(DISTANCE_DIMENSIONS)}."
+            )
+        return self._integral_dst[dimension]
+
+    def get_cumulative_distances(self, dimension: str = 'xy') -> NDArray[np.float64]:
+        """
+        Return the distance travelled up to and including every point, in meters.
+        """
+        return self._get_integral_dst(dimension)
+
+    def get_total_distance(self, dimension: str = 'xy') -> float:
+        """
+        Return the distance of the whole track in meters, 0 for an empty track.
+
+        :param dimension: 'xy' for the horizontal distance, '3d' to include the elevation changes.
+        """
+        integral_dst = self._get_integral_dst(dimension)
+        return float(integral_dst[-1]) if len(integral_dst) else 0.0
+
+    def get_distance(self, start_index: int, end_index: int, dimension: str = 'xy') -> float:
+        """
+        Return the distance travelled from the point at `start_index` to the point at `end_index`, in meters.
+
+        :param start_index: Index of the first point, negative indices count from the end.
+        :param end_index: Index of the last point, negative indices count from the end.
+        :param dimension: 'xy' for the horizontal distance, '3d' to include the elevation changes.
+        :raises IndexError: If an index is out of range.
+        """
+        integral_dst = self._get_integral_dst(dimension)
+        return float(integral_dst[end_index] - integral_dst[start_index])
+
+    def get_distance_at_time(self, time: Any, dimension: str = 'xy') -> Any:
+        """
+        Return the distance travelled up to a local time, interpolated between the points around it.
+        Times before the first point give 0, times after the last point the total distance.
+
+        :param time: A datetime, or a sequence of datetimes to look up at once.
+        :param dimension: 'xy' for the horizontal distance, '3d' to include the elevation changes.
+        :return: The distance in meters, a float or an array matching the times.
+        """
+        self._get_integral_dst(dimension)  # Validates the dimension
+        timed_integral_dst = self._timed_integral_dst[dimension]
+        if not len(timed_integral_dst):
+            return np.zeros(np.shape(time)) if np.ndim(time) else 0.0
+        distances = np.interp(to_epoch_time(time).astype(np.float64), self._timed_epoch_time, timed_integral_dst)
+        return distances if np.ndim(distances) else float(distances)
+
+    def get_distance_between_times(self, start_time: Any, end_time: Any, dimension: str = 'xy') -> float:
+        """
+        Return the distance travelled between two local times, in meters.
+        """
+        return float(self.get_distance_at_time(end_time, dimension) - self.get_distance_at_time(start_time, dimension))
+
+    def get_distances_at_points(self, points: Sequence[BasicPoint], dimension: str = 'xy') -> List[float]:
+        """
+        Return the distance travelled up to the time of every point, e.g. of the waypoints, in meters.
+        Rest points are located at their time, the start of the rest. A point without a time gives NaN.
+        """
+        times = [point.time for point in points]
+        timed = [time is not None for time in times]
+        distances = np.full(len(points), np.nan)
+        distances[timed] = self.get_distance_at_time([time for time in times if time is not None], dimension)
+        return distances.tolist()
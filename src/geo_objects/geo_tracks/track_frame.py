@@ -0,0 +1,376 @@
+"""
+Columnar (struct-of-arrays) representation of a track.
+
+Instead of holding one point object per track point, the TrackFrame keeps latitude, longitude, elevation
+and time of the whole track in contiguous numpy arrays, together with any number of additional named
+columns (e.g. the displacement information of an analyzed track). Existing callers which work on point
+objects are served by lightweight views, which read their values from the frame on access.
+"""
+
+import datetime
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, Union, overload
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.basic_point import BasicPoint
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint
+
+# Time column is saved as microseconds since epoch, missing time is NaT
+TIME_DTYPE = np.dtype('datetime64[us]')
+
+
+class TrackFrame:
+    """
+    Container for a track saved as columns of equal length.
+
+    The base columns are `lat`, `lon`, `elev` (float64, missing elevation is NaN) and `time`
+    (datetime64[us], missing time is NaT). Additional float64 columns can be attached by name.
+    Input arrays which already have the right dtype are taken over without copying.
+
+    :param lat: Latitude of every point.
+    :param lon: Longitude of every point.
+    :param elev: Elevation of every point.
+    :param time: Time of every point, as datetime64 or integer microseconds since epoch.
+    :param extra_columns: Additional named columns.
+    :raises ValueError: If the columns are not 1-D or differ in length.
+    """
+
+    BASE_COLUMNS = ('lat', 'lon', 'elev', 'time')
+
+    def __init__(self, lat, lon, elev, time, **extra_columns):
+
+        time_array = np.asarray(time)
+        if time_array.dtype == np.int64:
+            time_array = time_array.view(TIME_DTYPE)
+        else:
+            time_array = time_array.astype(TIME_DTYPE, copy=False)
+
+        self._columns: Dict[str, NDArray[Any]] = {
+            'lat': np.asarray(lat, dtype=np.float64),
+            'lon': np.asarray(lon, dtype=np.float64),
+            'elev': np.asarray(elev, dtype=np.float64),
+            'time': time_array,
+        }
+        for name, values in extra_columns.items():
+            self._columns[name] = np.asarray(values, dtype=np.float64)
+
+        lengths = {column.shape for column in self._columns.values()}
+        if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+            raise ValueError("All columns of a TrackFrame must be 1-D arrays of the same length.")
+
+    @classmethod
+    def from_points(cls, points: Iterable[BasicPoint], **extra_columns) -> 'TrackFrame':
+        """
+        Build a TrackFrame from a sequence of point objects.
+
+        :param points: The point objects, providing time, lat, lon and elev.
+        :param extra_columns: Additional named columns, aligned with the points.
+        :return: The TrackFrame holding the values of the points.
+        :rtype: TrackFrame
+        """
+        points = list(points)
+        return cls(
+            np.fromiter((p.lat for p in points), dtype=np.float64, count=len(points)),
+            np.fromiter((p.lon for p in points), dtype=np.float64, count=len(points)),
+            np.fromiter((np.nan if p.elev is None else p.elev for p in points), dtype=np.float64, count=len(points)),
+            np.array([p.time for p in points], dtype=TIME_DTYPE),
+            **extra_columns
+        )
+
+    @classmethod
+    def concat(cls, frames: List['TrackFrame']) -> 'TrackFrame':
+        """
+        Join the points of several frames with the same columns into one frame.
+
+        :param frames: The frames, at least one.
+        :return: The new TrackFrame holding the points of all frames in order.
+        :raises ValueError: If no frame is given or the frames have different columns.
+        """
+        if not frames:
+            raise ValueError("At least one TrackFrame is required.")
+        names = frames[0].get_column_names()
+        if any(frame.get_column_names() != names for frame in frames):
+            raise ValueError("All TrackFrames must have the same columns.")
+        return cls(**{name: np.concatenate([frame.get_column(name) for frame in frames]) for name in names})
+
+    def __len__(self):
+        return len(self._columns['lat'])
+
+    # ================ #
+    # Column access    #
+    # ================ #
+    @property
+    def lat(self) -> NDArray[np.float64]:
+        return self._columns['lat']
+
+    @property
+    def lon(self) -> NDArray[np.float64]:
+        return self._columns['lon']
+
+    @property
+    def elev(self) -> NDArray[np.float64]:
+        return self._columns['elev']
+
+    @property
+    def time(self) -> NDArray[np.datetime64]:
+        return self._columns['time']
+
+    def has_column(self, name: str) -> bool:
+        return name in self._columns
+
+    def get_column(self, name: str) -> NDArray[Any]:
+        """
+        Return the column with the given name.
+
+        :param name: The column name.
+        :return: The column array.
+        :raises KeyError: If the column does not exist.
+        """
+        if name not in self._columns:
+            raise KeyError(f"TrackFrame has no column '{name}'.")
+        return self._columns[name]
+
+    def get_column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def get_extra_columns(self) -> Dict[str, NDArray[Any]]:
+        """
+        Return the additional columns, i.e. every column except lat, lon, elev and time.
+
+        :return: Mapping of the column name to its array.
+        """
+        return {name: values for name, values in self._columns.items() if name not in self.BASE_COLUMNS}
+
+    def get_epoch_time(self) -> NDArray[np.int64]:
+        """
+        Return the time column as int64 microseconds since epoch, without copying.
+        """
+        return self.time.view(np.int64)
+
+    def get_epoch_seconds(self) -> NDArray[np.float64]:
+        """
+        Return the time column as float64 seconds since epoch, missing time is NaN.
+        """
+        seconds = self.get_epoch_time() / 1e6
+        seconds[np.isnat(self.time)] = np.nan
+        return seconds
+
+    def get_nbytes(self) -> int:
+        """
+        Return the memory used by the column data in bytes.
+        """
+        return sum(column.nbytes for column in self._columns.values())
+
+    # ========================= #
+    # Derived frames / points   #
+    # ========================= #
+    def with_columns(self, **columns) -> 'TrackFrame':
+        """
+        Return a new TrackFrame sharing the arrays of this frame, with columns added or replaced.
+        """
+        merged = dict(self._columns)
+        merged.update(columns)
+        return TrackFrame(**merged)
+
+    def slice(self, start: Optional[int] = None, stop: Optional[int] = None) -> 'TrackFrame':
+        """
+        Return the points in [start, stop) as a new TrackFrame, the arrays are views of this frame.
+        """
+        return TrackFrame(**{name: values[start:stop] for name, values in self._columns.items()})
+
+    def take(self, indices: NDArray[Any]) -> 'TrackFrame':
+        """
+        Return the points selected by integer indices or a boolean mask as a new TrackFrame, the arrays are copies.
+        """
+        return TrackFrame(**{name: values[indices] for name, values in self._columns.items()})
+
+    def to_points(self, point_class: Type[BasicPoint] = RawTrkPoint) -> List[BasicPoint]:
+        """
+        Materialise the frame as a list of independent point objects.
+
+        :param point_class: The point class to create, taking (time, lat, lon, elev).
+        :return: The list of point objects.
+        """
+        times = self.time.astype(object)
+        elevations = [None if np.isnan(e) else e for e in self.elev.tolist()]
+        return [
+            point_class(time, lat, lon, elev)
+            for time, lat, lon, elev in zip(times, self.lat.tolist(), self.lon.tolist(), elevations)
+        ]
+
+    def get_point(self, index: int, view_class: Optional[Type[BasicPoint]] = None) -> BasicPoint:
+        """
+        Return a lightweight view of the point at the index.
+
+        :param index: The point index.
+        :param view_class: The view class to create, defaults to RawTrkPointView.
+        :return: The point view.
+        """
+        return TrackFramePointList(self, view_class or RawTrkPointView)[index]
+
+
+# Attributes of a point view, the point values themselves are read from the frame
+_VIEW_SLOTS = ('_frame', '_index')
+
+
+class _TrackFramePointView:
+    """
+    Mixin turning a point class into a view of one row of a TrackFrame.
+
+    The point attributes read by the point class (`_time`, `_lat`, `_lon`, `_elev`, ...) are served from
+    the frame, so every existing property and getter of the point class keeps working unchanged.
+    The mixin has no slots of its own, so it can be combined with the slotted point classes; every view
+    class declares the `_frame` and `_index` slots.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, frame: TrackFrame, index: int):
+        # The slots are provided by the view class and the point class the mixin is combined with
+        self._frame = frame  # type: ignore[misc]
+        self._index = index  # type: ignore[misc]
+        self._is_empty = bool(np.isnat(frame.time[index]))  # type: ignore[misc]
+
+    @property
+    def frame_index(self) -> int:
+        return self._index
+
+    @property
+    def _time(self) -> Optional[datetime.datetime]:
+        value = self._frame.time[self._index]
+        return None if np.isnat(value) else value.item()
+
+    @property
+    def _lat(self) -> float:
+        return float(self._frame.lat[self._index])
+
+    @property
+    def _lon(self) -> float:
+        return float(self._frame.lon[self._index])
+
+    @property
+    def _elev(self) -> Optional[float]:
+        value = float(self._frame.elev[self._index])
+        return None if np.isnan(value) else value
+
+    def _get_column_value(self, name: str) -> float:
+        return float(self._frame.get_column(name)[self._index])
+
+
+class TrackPointView(_TrackFramePointView, BasicPoint):
+    """
+    View of a TrackFrame row as a BasicPoint.
+    """
+
+    __slots__ = _VIEW_SLOTS
+
+
+class RawTrkPointView(_TrackFramePointView, RawTrkPoint):
+    """
+    View of a TrackFrame row as a RawTrkPoint.
+    """
+
+    __slots__ = _VIEW_SLOTS
+
+
+class AnalyzedTrkPointView(_TrackFramePointView, AnalyzedTrkPoint):
+    """
+    View of a TrackFrame row as an AnalyzedTrkPoint, the displacement is read from the dx, dy, dz and dt columns,
+    and the speed from the speed_x, speed_y, speed_z and speed_xy columns if present.
+    """
+
+    __slots__ = _VIEW_SLOTS
+
+    @property
+    def _dx(self) -> float:
+        return self._get_column_value('dx')
+
+    @property
+    def _dy(self) -> float:
+        return self._get_column_value('dy')
+
+    @property
+    def _dz(self) -> float:
+        return self._get_column_value('dz')
+
+    @property
+    def _dt(self) -> float:
+        return self._get_column_value('dt')
+
+    # The speeds are read from the speed columns when the analyzer stored them alongside the deltas
+    def get_speed_x(self):
+        if self._frame.has_column('speed_x'):
+            return self._get_column_value('speed_x')
+        return super().get_speed_x()
+
+    def get_speed_y(self):
+        if self._frame.has_column('speed_y'):
+            return self._get_column_value('speed_y')
+        return super().get_speed_y()
+
+    def get_speed_z(self):
+        if self._frame.has_column('speed_z'):
+            return self._get_column_value('speed_z')
+        return super().get_speed_z()
+
+    def get_speed_xy(self):
+        if self._frame.has_column('speed_xy'):
+            return self._get_column_value('speed_xy')
+        return super().get_speed_xy()
+
+    @property
+    def _integral_dst(self) -> float:
+        if not self._frame.has_column('integral_dst'):
+            return 0
+        return self._get_column_value('integral_dst')
+
+    @_integral_dst.setter
+    def _integral_dst(self, in_dst: float):
+        if not self._frame.has_column('integral_dst'):
+            raise AttributeError("The TrackFrame of this point has no integral_dst column.")
+        self._frame.get_column('integral_dst')[self._index] = in_dst
+
+
+class TrackFramePointList(Sequence[BasicPoint]):
+    """
+    Read-only sequence of point views over a TrackFrame.
+
+    It is used in place of the list of point objects by tracks wrapping a TrackFrame. Indexing returns a view,
+    slicing returns a list of views like slicing a list of points does.
+
+    :param frame: The TrackFrame to view.
+    :param view_class: The view class created for every accessed point.
+    """
+
+    def __init__(self, frame: TrackFrame, view_class: Type[BasicPoint]):
+        self._frame = frame
+        self._view_class = view_class
+
+    def __len__(self):
+        return len(self._frame)
+
+    @overload
+    def __getitem__(self, index: int) -> BasicPoint: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[BasicPoint]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BasicPoint, List[BasicPoint]]:
+        if isinstance(index, slice):
+            return [self._view_class(self._frame, i) for i in range(*index.indices(len(self)))]  # type: ignore[call-arg]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TrackFrame point index out of range")
+        return self._view_class(self._frame, index)  # type: ignore[call-arg]
+
+    def __iter__(self) -> Iterator[BasicPoint]:
+        for i in range(len(self)):
+            yield self._view_class(self._frame, i)  # type: ignore[call-arg]
+
+    def get_track_frame(self) -> TrackFrame:
+        return self._frame
@@ -0,0 +1,68 @@
+"""
+The track and segment structure of a GPX file.
+
+A GPX file holds tracks (`trk`), each made of segments (`trkseg`) of track points. The points of a track
+object are kept in one flat sequence; a TrackSegment marks the range of the points of one segment in it.
+Segments are recorded separately because there is no movement between them: the gap between two segments
+is a pause of the recording, not a step to analyze.
+"""
+
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class TrackSegment(NamedTuple):
+    """
+    The points [start, stop) of the flat point sequence form the segment `segment_index` of the track
+    `track_index`, both counted from 0 in document order.
+    """
+    track_index: int
+    segment_index: int
+    start: int
+    stop: int
+    track_name: Optional[str] = None
+
+    def get_point_count(self) -> int:
+        return self.stop - self.start
+
+
+def relayout_segments(segments: List[TrackSegment], point_counts: List[int]) -> List[TrackSegment]:
+    """
+    Lay out the segments consecutively with new point counts, e.g. after every segment was shortened by
+    smoothing. The track and segment indices and names are kept.
+
+    :param segments: The segments.
+    :param point_counts: The new number of points of every segment.
+    :return: The segments with their new point ranges.
+    """
+    relaid = []
+    start = 0
+    for segment, point_count in zip(segments, point_counts):
+        relaid.append(segment._replace(start=start, stop=start + point_count))
+        start += point_count
+    return relaid
+
+
+def filter_segment_list(segments: List[TrackSegment], kept: NDArray[np.bool_]) -> List[TrackSegment]:
+    """
+    Lay out the segments over the points left after dropping points, e.g. the points outside a time window.
+
+    Segments without kept points are left out. A segment whose kept points are not consecutive is split into
+    one segment per run of kept points, all with the track and segment index of the original segment, so the
+    dropped points become a gap instead of one long step.
+
+    :param segments: The segments over all points.
+    :param kept: Whether every point is kept.
+    :return: The segments over the kept points.
+    """
+    kept = np.asarray(kept, dtype=np.bool_)
+    new_index: NDArray[np.int64] = np.cumsum(kept, dtype=np.int64) - kept
+    filtered = []
+    for segment in segments:
+        edges = np.flatnonzero(np.diff(kept[segment.start:segment.stop].view(np.int8), prepend=0, append=0))
+        for run_start, run_stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            start = int(new_index[segment.start + run_start])
+            filtered.append(segment._replace(start=start, stop=start + run_stop - run_start))
+    return filtered
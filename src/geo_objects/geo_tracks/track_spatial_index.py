@@ -0,0 +1,181 @@
+"""
+Spatial index of a track.
+
+The points of a track are projected to meters on a plane around the track, scaled by the length of a degree at
+the middle latitude of the track (see `geodesy.meters_per_degree`), and bucketed into a uniform grid of
+square cells. The points are sorted by cell, column by column, so the points of a run of cells in one grid column
+are a contiguous slice found by binary search. A query then only measures the points in the cells around the
+query location instead of every point of the track: the points within a radius, and the k nearest points, found
+by widening the searched square of cells until it holds k points and measuring the points within the distance of
+the k-th of them.
+
+Points without a position are not part of the index, and query locations without a position find no points.
+Every query has a batch variant taking arrays of locations.
+"""
+
+import math
+from typing import Any, List, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.point_vector.geodesy import meters_per_degree
+
+DEFAULT_CELL_SIZE = 50.0
+
+
+class TrackSpatialIndex:
+    """
+    Nearest point and radius queries on the points of a track.
+
+    :param track_frame: The track points.
+    :param cell_size: The edge length of the grid cells in meters. Queries are fastest with a few points per cell.
+    :raises ValueError: If the cell size is not positive.
+    """
+
+    def __init__(self, track_frame: TrackFrame, cell_size: float = DEFAULT_CELL_SIZE):
+        if not cell_size > 0:
+            raise ValueError(f"Invalid cell size {cell_size}. Must be positive.")
+        self._track_frame = track_frame
+        self._cell_size = float(cell_size)
+
+        located = np.flatnonzero(~np.isnan(track_frame.lat) & ~np.isnan(track_frame.lon))
+        self._origin = (
+            (float(track_frame.lon[located].min()), float(track_frame.lat[located].min())) if len(located) else (0.0, 0.0)
+        )
+        middle_lat = (track_frame.lat[located].max() + self._origin[1]) / 2 if len(located) else 0.0
+        self._meters_per_degree = tuple(float(scale) for scale in meters_per_degree(middle_lat))
+        x, y = self.project(track_frame.lat[located], track_frame.lon[located])
+        cell_x = (x // self._cell_size).astype(np.int64)
+        cell_y = (y // self._cell_size).astype(np.int64)
+        self._column_count = int(cell_x.max()) + 1 if len(located) else 0
+        self._row_count = int(cell_y.max()) + 1 if len(located) else 0
+
+        cell_key = cell_x * self._row_count + cell_y
+        order = np.argsort(cell_key, kind='stable')
+        self._indices: NDArray[np.intp] = located[order]
+        self._cell_key = cell_key[order]
+        self._x = x[order]
+        self._y = y[order]
+
+    def __len__(self):
+        return len(self._indices)
+
+    def get_track_frame(self) -> TrackFrame:
+        return self._track_frame
+
+    def get_cell_size(self) -> float:
+        return self._cell_size
+
+    def project(self, lat: Any, lon: Any) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        Return the plane coordinates in meters of the locations, the distances of the queries are measured on them.
+        """
+        x = (np.asarray(lon, dtype=np.float64) - self._origin[0]) * self._meters_per_degree[0]
+        y = (np.asarray(lat, dtype=np.float64) - self._origin[1]) * self._meters_per_degree[1]
+        return x, y
+
+    def _find_candidates(self, x: float, y: float, ring: int) -> NDArray[np.intp]:
+        """
+        Return the positions of the points in the square of cells `ring` cells around the cell holding (x, y).
+        """
+        cell_x = math.floor(x / self._cell_size)
+        cell_y = math.floor(y / self._cell_size)
+        first_column, last_column = max(cell_x - ring, 0), min(cell_x + ring, self._column_count - 1)
+        first_row, last_row = max(cell_y - ring, 0), min(cell_y + ring, self._row_count - 1)
+        if first_column > last_column or first_row > last_row:
+            return np.empty(0, dtype=np.intp)
+
+        # The cells of a column are consecutive keys, so their points are one slice of the sorted points
+        column_keys = np.arange(first_column, last_column + 1) * self._row_count
+        starts = np.searchsorted(self._cell_key, column_keys + first_row, side='left')
+        stops = np.searchsorted(self._cell_key, column_keys + last_row, side='right')
+        lengths = stops - starts
+        offsets = np.cumsum(lengths) - lengths
+        return np.repeat(starts - offsets, lengths).astype(np.intp) + np.arange(lengths.sum(), dtype=np.intp)
+
+    def _measure(self, x: float, y: float, positions: NDArray[np.intp]) -> NDArray[np.float64]:
+        return np.hypot(self._x[positions] - x, self._y[positions] - y)
+
+    def _find_within(self, x: float, y: float, radius: float) -> Tuple[NDArray[np.intp], NDArray[np.float64]]:
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        # No ring reaching past the far edge of the grid is needed, which also bounds an infinite radius
+        cell_x = math.floor(x / self._cell_size)
+        cell_y = math.floor(y / self._cell_size)
+        grid_ring = max(cell_x, self._column_count - 1 - cell_x, cell_y, self._row_count - 1 - cell_y, 0)
+        ring = min(radius / self._cell_size, grid_ring)
+        positions = self._find_candidates(x, y, math.ceil(ring))
+        distances = self._measure(x, y, positions)
+        inside = distances <= radius
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((self._indices[positions], distances))
+        return self._indices[positions[order]], distances[order]
+
+    def _find_nearest(self, x: float, y: float, k: int) -> Tuple[NDArray[np.intp], NDArray[np.float64]]:
+        if not (len(self._indices) and math.isfinite(x) and math.isfinite(y)):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        k = min(k, len(self._indices))
+        # Widen the searched square until it holds k points, the k-th nearest is at most as far as the k-th of them
+        ring = 0
+        while True:
+            positions = self._find_candidates(x, y, ring)
+            if len(positions) >= k:
+                break
+            ring = ring * 2 + 1
+        radius = np.partition(self._measure(x, y, positions), k - 1)[k - 1]
+        indices, distances = self._find_within(x, y, radius)
+        return indices[:k], distances[:k]
+
+    def find_within_many(
+            self, lats: Any, lons: Any, radius: float
+    ) -> List[Tuple[NDArray[np.intp], NDArray[np.float64]]]:
+        """
+        Return the points within a radius of every query location.
+
+        :param lats: The latitudes of the query locations.
+        :param lons: The longitudes of the query locations.
+        :param radius: The radius in meters.
+        :return: The point indices and their distances in meters per query location, nearest first.
+        :raises ValueError: If the radius is negative.
+        """
+        if not radius >= 0:
+            raise ValueError(f"Invalid radius {radius}. Must not be negative.")
+        x, y = self.project(np.atleast_1d(lats), np.atleast_1d(lons))
+        return [self._find_within(float(qx), float(qy), radius) for qx, qy in zip(x, y)]
+
+    def find_within(self, lat: float, lon: float, radius: float) -> Tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """
+        Return the indices of the points within a radius of the location and their distances, see `find_within_many`.
+        """
+        return self.find_within_many([lat], [lon], radius)[0]
+
+    def find_nearest_many(self, lats: Any, lons: Any, k: int = 1) -> Tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """
+        Return the k points nearest to every query location, the point with the lower index on a tie.
+
+        :param lats: The latitudes of the query locations.
+        :param lons: The longitudes of the query locations.
+        :param k: The number of points per query location, fewer if the track has fewer points.
+        :return: The point indices and their distances in meters, arrays of one row per query location, nearest first.
+            A query location without a position gives the index -1 and the distance NaN.
+        :raises ValueError: If k is less than 1.
+        """
+        if k < 1:
+            raise ValueError(f"Invalid number of points {k}. Must be at least 1.")
+        x, y = self.project(np.atleast_1d(lats), np.atleast_1d(lons))
+        found_count = min(k, len(self._indices))
+        indices = np.full((len(x), found_count), -1, dtype=np.intp)
+        distances = np.full((len(x), found_count), np.nan)
+        for i, (qx, qy) in enumerate(zip(x, y)):
+            row_indices, row_distances = self._find_nearest(float(qx), float(qy), k)
+            indices[i, :len(row_indices)], distances[i, :len(row_distances)] = row_indices, row_distances
+        return indices, distances
+
+    def find_nearest(self, lat: float, lon: float, k: int = 1) -> Tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """
+        Return the indices of the k points nearest to the location and their distances, see `find_nearest_many`.
+        """
+        indices, distances = self.find_nearest_many([lat], [lon], k)
+        return indices[0], distances[0]
@@ -0,0 +1,62 @@
+"""
+Aggregated statistics of an analyzed track.
+
+The statistics are reduced from the dx, dy, dz and speed_xy columns of the analyzed points, and statistics of
+consecutive parts of a track combine into those of the whole track. This lets a track analyzed chunk by chunk
+keep its statistics without keeping its analyzed points.
+"""
+
+from typing import List, NamedTuple
+
+import numpy as np
+
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+
+
+class TrackStatistics(NamedTuple):
+    """
+    `distance_xy` is the horizontal distance in meters, `ascent` and `descent` the summed elevation gain and loss
+    in meters and `max_speed_xy` the highest finite horizontal speed in m/s, NaN for a track without any.
+    """
+    point_count: int = 0
+    distance_xy: float = 0.0
+    ascent: float = 0.0
+    descent: float = 0.0
+    max_speed_xy: float = float('nan')
+
+    @classmethod
+    def from_track_frame(cls, analyzed_frame: TrackFrame) -> 'TrackStatistics':
+        """
+        Reduce the analyzed points, providing the dx, dy, dz and speed_xy (or dt) columns.
+        """
+        if not len(analyzed_frame):
+            return cls()
+        delta_xy = np.hypot(analyzed_frame.get_column('dx'), analyzed_frame.get_column('dy'))
+        delta_z = analyzed_frame.get_column('dz')
+        if analyzed_frame.has_column('speed_xy'):
+            speed_xy = analyzed_frame.get_column('speed_xy')
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                speed_xy = delta_xy / analyzed_frame.get_column('dt')
+        finite_speed = speed_xy[np.isfinite(speed_xy)]
+        return cls(
+            point_count=len(analyzed_frame),
+            distance_xy=float(np.nansum(delta_xy)),
+            ascent=float(np.nansum(np.where(delta_z > 0, delta_z, 0.0))),
+            descent=float(-np.nansum(np.where(delta_z < 0, delta_z, 0.0))),
+            max_speed_xy=float(finite_speed.max()) if len(finite_speed) else float('nan'),
+        )
+
+    @classmethod
+    def combine(cls, statistics_list: List['TrackStatistics']) -> 'TrackStatistics':
+        """
+        Combine the statistics of consecutive parts of a track into those of the whole track.
+        """
+        max_speeds = [s.max_speed_xy for s in statistics_list if not np.isnan(s.max_speed_xy)]
+        return cls(
+            point_count=sum(s.point_count for s in statistics_list),
+            distance_xy=sum(s.distance_xy for s in statistics_list),
+            ascent=sum(s.ascent for s in statistics_list),
+            descent=sum(s.descent for s in statistics_list),
+            max_speed_xy=max(max_speeds) if max_speeds else float('nan'),
+        )
@@ -0,0 +1,157 @@
+"""
+Sorted time index of a track.
+
+The times of the points of a track are kept as a sorted array of microseconds since epoch, so the points at or
+around any time are found by binary search in O(log n) instead of a walk over the track: the nearest point, the
+pair of points bracketing the time and the position interpolated between them. Every query has a batch variant
+taking an array of times, answered with one vectorized search.
+
+Points without a time are not part of the index. Recorded tracks are in time order already, then the index only
+wraps the time column; otherwise the points are sorted by time once, and the queries still return the indices
+of the points in the track.
+"""
+
+import datetime
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TIME_DTYPE, TrackFrame
+
+
+def to_epoch_time(time: Any) -> NDArray[np.int64]:
+    """
+    Convert a datetime, datetime64 or a sequence of them to int64 microseconds since epoch.
+    """
+    return np.asarray(time, dtype=TIME_DTYPE).view(np.int64)
+
+
+class TrackTimeIndex:
+    """
+    Time queries on the points of a track.
+
+    :param track_frame: The track points.
+    """
+
+    def __init__(self, track_frame: TrackFrame):
+        self._track_frame = track_frame
+        epoch_time = track_frame.get_epoch_time()
+        timed = np.flatnonzero(~np.isnat(track_frame.time))
+        if len(timed) == len(epoch_time) and np.all(epoch_time[1:] >= epoch_time[:-1]):
+            self._order: Optional[NDArray[np.intp]] = None
+            self._sorted_time = epoch_time
+        else:
+            self._order = timed[np.argsort(epoch_time[timed], kind='stable')]
+            self._sorted_time = epoch_time[self._order]
+
+    def __len__(self):
+        return len(self._sorted_time)
+
+    def get_track_frame(self) -> TrackFrame:
+        return self._track_frame
+
+    def _to_track_indices(self, positions: NDArray[np.intp]) -> NDArray[np.intp]:
+        return positions if self._order is None else self._order[positions]
+
+    def find_nearest_many(self, times: Any) -> NDArray[np.intp]:
+        """
+        Return the index of the point nearest in time to every query time, the earlier point on a tie.
+
+        :param times: The local query times.
+        :return: The point indices.
+        :raises ValueError: If no point of the track has a time.
+        """
+        if not len(self._sorted_time):
+            raise ValueError("No point of the track has a time.")
+        query_time = to_epoch_time(times)
+        if len(self._sorted_time) == 1:
+            return self._to_track_indices(np.zeros(np.shape(query_time), dtype=np.intp))
+        after = np.clip(np.searchsorted(self._sorted_time, query_time, side='left'), 1, len(self._sorted_time) - 1)
+        before = after - 1
+        nearest = np.where(
+            np.abs(query_time - self._sorted_time[before]) <= np.abs(self._sorted_time[after] - query_time), before, after
+        )
+        return self._to_track_indices(nearest)
+
+    def find_nearest(self, time: Any) -> int:
+        """
+        Return the index of the point nearest in time, see `find_nearest_many`.
+        """
+        return int(self.find_nearest_many(time))
+
+    def find_bracket_many(self, times: Any) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+        """
+        Return, for every query time, the last point at or before it and the first point after it.
+
+        :param times: The local query times.
+        :return: The indices of the points before and after every time, -1 where there is no such point.
+        """
+        query_time = to_epoch_time(times)
+        after = np.searchsorted(self._sorted_time, query_time, side='right')
+        before = after - 1
+        at_start = before < 0
+        at_end = after >= len(self._sorted_time)
+        before_indices = self._to_track_indices(np.where(at_start, 0, before)) if len(self._sorted_time) else before
+        after_indices = self._to_track_indices(np.where(at_end, 0, after)) if len(self._sorted_time) else after
+        return np.where(at_start, -1, before_indices), np.where(at_end, -1, after_indices)
+
+    def find_bracket(self, time: Any) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Return the index of the last point at or before the time and of the first point after it, or None.
+        """
+        before, after = self.find_bracket_many(time)
+        return (None if before < 0 else int(before)), (None if after < 0 else int(after))
+
+    def interpolate_many(self, times: Any) -> TrackFrame:
+        """
+        Return the positions at the query times, linearly interpolated between the points bracketing every time.
+        A time matching a point gives its position, a time outside the time range of the track gives NaN.
+
+        :param times: The local query times.
+        :return: One point per query time, with the query time as its time.
+        """
+        query_time = np.atleast_1d(to_epoch_time(times))
+        after = np.searchsorted(self._sorted_time, query_time, side='left')
+        inside = (after < len(self._sorted_time)) & (query_time >= (self._sorted_time[0] if len(self) else 0))
+        after = np.where(inside, after, 0)
+        before = np.where(inside, np.maximum(after - 1, 0), 0)
+
+        columns = []
+        if len(self._sorted_time):
+            time_span = (self._sorted_time[after] - self._sorted_time[before]).astype(np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.where(time_span > 0, (query_time - self._sorted_time[before]) / time_span, 1.0)
+            before_indices, after_indices = self._to_track_indices(before), self._to_track_indices(after)
+            for values in (self._track_frame.lat, self._track_frame.lon, self._track_frame.elev):
+                interpolated = values[before_indices] + weight * (values[after_indices] - values[before_indices])
+                columns.append(np.where(inside, interpolated, np.nan))
+        else:
+            columns = [np.full(len(query_time), np.nan) for _ in range(3)]
+        return TrackFrame(columns[0], columns[1], columns[2], query_time)
+
+    def interpolate(self, time: datetime.datetime) -> Optional[RawTrkPoint]:
+        """
+        Return the position at the time as a RawTrkPoint, see `interpolate_many`, or None outside the track.
+        """
+        interpolated = self.interpolate_many([time])
+        if np.isnan(interpolated.lat[0]):
+            return None
+        elev = float(interpolated.elev[0])
+        return RawTrkPoint(time, float(interpolated.lat[0]), float(interpolated.lon[0]), None if np.isnan(elev) else elev)
+
+    def find_period_first_indices(self, period: datetime.timedelta = datetime.timedelta(hours=1)) -> NDArray[np.intp]:
+        """
+        Return the index of the first point of every clock period holding points, e.g. of every hour.
+
+        :param period: The period length, periods are counted from midnight.
+        :return: The point indices in time order.
+        :raises ValueError: If the period is not positive.
+        """
+        period_us = period // datetime.timedelta(microseconds=1)
+        if period_us <= 0:
+            raise ValueError(f"Invalid period {period}. Must be positive.")
+        period_number = self._sorted_time // period_us
+        first = np.flatnonzero(np.concatenate(([True], period_number[1:] != period_number[:-1])))[:len(period_number)]
+        return self._to_track_indices(first)
@@ -0,0 +1,174 @@
+"""
+Distances and displacements between geographic positions, computed for whole arrays of positions at once.
+
+Every function takes the latitudes and longitudes in degrees as scalars or arrays, and a geodesic mode trading
+precision for speed:
+
+    - 'legacy': the fixed 101751 meters per degree of longitude and 110757 meters per degree of latitude the
+      analysis has always used, and the 110751 meters per degree of longitude of its rest seed check (see
+      `seed_displacements`). Right around 24° N only, and the default, so the results of existing analyses do
+      not change.
+    - 'equirectangular': a sphere with the mean earth radius, the degrees of longitude scaled by the cosine of
+      the mean latitude of the two positions. One cosine per pair, accurate to about 0.5 % for the short steps of
+      a track, off by the flattening of the earth.
+    - 'haversine': the great circle distance on the same sphere, exact on the sphere at any distance. The east
+      and north components keep the direction of the equirectangular displacement.
+    - 'ellipsoidal': the lengths of a degree of latitude and of longitude on the WGS84 ellipsoid at the mean
+      latitude of the two positions, from their series in multiples of the latitude. Accurate to millimeters for
+      the steps of a track anywhere on earth. Around 24° N it gives about the lengths of a degree of the 'legacy'
+      mode, but not the seed check scale, so the end times of some rests differ from the 'legacy' ones.
+"""
+
+from typing import Any, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+GEODESIC_MODES = ('legacy', 'equirectangular', 'haversine', 'ellipsoidal')
+
+DEFAULT_GEODESIC_MODE = 'legacy'
+
+# Mean radius of the earth in meters
+EARTH_RADIUS = 6_371_008.8
+
+# Meters per degree of longitude and latitude of the 'legacy' mode, and of longitude of its rest seed check
+LEGACY_METERS_PER_DEGREE = (101751.0, 110757.0)
+LEGACY_SEED_METERS_PER_DEGREE_LON = 110751.0
+
+# Meters per degree of latitude and longitude on WGS84, as series in the cosines of multiples of the latitude
+_LAT_DEGREE_SERIES = (111132.954, -559.822, 1.175)  # 1, cos 2φ, cos 4φ
+_LON_DEGREE_SERIES = (111412.84, -93.5, 0.118)  # cos φ, cos 3φ, cos 5φ
+
+# The same series as polynomials in cos²φ, expanding the multiple angle cosines
+_LAT_DEGREE_POLYNOMIAL = (
+    _LAT_DEGREE_SERIES[0] - _LAT_DEGREE_SERIES[1] + _LAT_DEGREE_SERIES[2],
+    2 * _LAT_DEGREE_SERIES[1] - 8 * _LAT_DEGREE_SERIES[2],
+    8 * _LAT_DEGREE_SERIES[2],
+)
+_LON_DEGREE_POLYNOMIAL = (  # times cos φ
+    _LON_DEGREE_SERIES[0] - 3 * _LON_DEGREE_SERIES[1] + 5 * _LON_DEGREE_SERIES[2],
+    4 * _LON_DEGREE_SERIES[1] - 20 * _LON_DEGREE_SERIES[2],
+    16 * _LON_DEGREE_SERIES[2],
+)
+
+
+def check_geodesic_mode(geodesic_mode: str) -> None:
+    """
+    :raises ValueError: If the geodesic mode is not one of `GEODESIC_MODES`.
+    """
+    if geodesic_mode not in GEODESIC_MODES:
+        raise ValueError(
+            f"Invalid geodesic mode: {geodesic_mode}. Supported modes are {', '.join(GEODESIC_MODES)}."
+        )
+
+
+def meters_per_degree(lat: Any, geodesic_mode: str = DEFAULT_GEODESIC_MODE) -> Tuple[Any, Any]:
+    """
+    Return the length of a degree of longitude and of a degree of latitude at the latitudes.
+
+    :param lat: The latitudes in degrees.
+    :param geodesic_mode: One of `GEODESIC_MODES`, 'haversine' scales like 'equirectangular'.
+    :return: The meters per degree of longitude and of latitude.
+    :raises ValueError: If the geodesic mode is not supported.
+    """
+    check_geodesic_mode(geodesic_mode)
+    if geodesic_mode == 'legacy':
+        zeros = np.zeros_like(lat, dtype=np.float64)
+        return zeros + LEGACY_METERS_PER_DEGREE[0], zeros + LEGACY_METERS_PER_DEGREE[1]
+    cos_lat = np.cos(np.radians(lat))
+    if geodesic_mode == 'ellipsoidal':
+        cos_lat_2 = cos_lat * cos_lat
+        lon_scale = cos_lat * (
+            _LON_DEGREE_POLYNOMIAL[0] + cos_lat_2 * (_LON_DEGREE_POLYNOMIAL[1] + cos_lat_2 * _LON_DEGREE_POLYNOMIAL[2])
+        )
+        lat_scale = _LAT_DEGREE_POLYNOMIAL[0] + cos_lat_2 * (
+            _LAT_DEGREE_POLYNOMIAL[1] + cos_lat_2 * _LAT_DEGREE_POLYNOMIAL[2]
+        )
+        return lon_scale, lat_scale
+    degree = EARTH_RADIUS * np.pi / 180
+    return degree * cos_lat, degree + np.zeros_like(cos_lat)
+
+
+def _longitude_difference(lon_1: Any, lon_2: Any) -> Any:
+    """
+    Return lon_2 - lon_1 in degrees, taking the short way across the antimeridian.
+    """
+    delta_lon = np.subtract(lon_2, lon_1, dtype=np.float64)
+    crossing = np.abs(delta_lon) > 180
+    if not np.any(crossing):
+        return delta_lon
+    return np.where(crossing, (delta_lon + 180) % 360 - 180, delta_lon)
+
+
+def displacements(
+        lat_1: Any, lon_1: Any, lat_2: Any, lon_2: Any, geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[Any, Any]:
+    """
+    Return the displacement from the first to the second positions, in meters to the east and to the north.
+
+    :param lat_1: The latitudes of the first positions in degrees.
+    :param lon_1: The longitudes of the first positions in degrees.
+    :param lat_2: The latitudes of the second positions in degrees.
+    :param lon_2: The longitudes of the second positions in degrees.
+    :param geodesic_mode: One of `GEODESIC_MODES`.
+    :return: The east and north components, float64 scalars or arrays.
+    :raises ValueError: If the geodesic mode is not supported.
+    """
+    mean_lat = (np.asarray(lat_1, dtype=np.float64) + lat_2) / 2
+    lon_scale, lat_scale = meters_per_degree(mean_lat, geodesic_mode)
+    delta_lon = _longitude_difference(lon_1, lon_2)
+    delta_x = delta_lon * lon_scale
+    delta_y = np.subtract(lat_2, lat_1, dtype=np.float64) * lat_scale
+    if geodesic_mode == 'haversine':
+        length = np.hypot(delta_x, delta_y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(length > 0, _haversine(lat_1, lat_2, delta_lon) / length, 1.0)
+        delta_x, delta_y = delta_x * scale, delta_y * scale
+    return delta_x, delta_y
+
+
+def _haversine(lat_1: Any, lat_2: Any, delta_lon: Any) -> Any:
+    phi_1 = np.radians(lat_1)
+    phi_2 = np.radians(lat_2)
+    sin_half_delta_phi = np.sin((phi_2 - phi_1) / 2)
+    sin_half_delta_lambda = np.sin(np.radians(delta_lon) / 2)
+    a = sin_half_delta_phi * sin_half_delta_phi + \
+        np.cos(phi_1) * np.cos(phi_2) * sin_half_delta_lambda * sin_half_delta_lambda
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distances(lat_1: Any, lon_1: Any, lat_2: Any, lon_2: Any, geodesic_mode: str = DEFAULT_GEODESIC_MODE) -> Any:
+    """
+    Return the distance between the first and the second positions in meters, see `displacements`.
+    """
+    check_geodesic_mode(geodesic_mode)
+    if geodesic_mode == 'haversine':
+        return _haversine(lat_1, lat_2, _longitude_difference(lon_1, lon_2))
+    delta_x, delta_y = displacements(lat_1, lon_1, lat_2, lon_2, geodesic_mode)
+    return np.hypot(delta_x, delta_y)
+
+
+def seed_displacements(
+        lat_1: Any, lon_1: Any, lat_2: Any, lon_2: Any, geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[Any, Any]:
+    """
+    Return the displacement from a rest seed to positions, checked against the rest drift limit, see
+    `displacements`. The 'legacy' mode scales the degrees of longitude by `LEGACY_SEED_METERS_PER_DEGREE_LON`
+    like the seed check of the rest point search always did.
+    """
+    delta_x, delta_y = displacements(lat_1, lon_1, lat_2, lon_2, geodesic_mode)
+    if geodesic_mode == 'legacy':
+        delta_x = _longitude_difference(lon_1, lon_2) * LEGACY_SEED_METERS_PER_DEGREE_LON
+    return delta_x, delta_y
+
+
+def step_displacements(
+        lat: NDArray[np.float64], lon: NDArray[np.float64], geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Return the displacement of every step between consecutive positions, `len(lat) - 1` of them.
+    """
+    if len(lat) < 2:
+        check_geodesic_mode(geodesic_mode)
+        return np.empty(0), np.empty(0)
+    return displacements(lat[:-1], lon[:-1], lat[1:], lon[1:], geodesic_mode)
@@ -1,23 +1,31 @@
 import math
 
+from src.geo_objects.point_vector.geodesy import DEFAULT_GEODESIC_MODE, displacements
+
 
 class TrackPointVector:
 
-    def __init__(self, track_point_1, track_point_2):
+    def __init__(self, track_point_1, track_point_2, geodesic_mode: str = DEFAULT_GEODESIC_MODE):
         """
         Provide two track points and get the vector (point2 - point1)
         :param track_point_1: vector start point
         :param track_point_2: vector end point
+        :param geodesic_mode: distance computation, see `geodesy.GEODESIC_MODES`
         """
 
         self._track_point_1 = track_point_1
         self._track_point_2 = track_point_2
+        delta_x, delta_y = displacements(
+            track_point_1.lat, track_point_1.lon, track_point_2.lat, track_point_2.lon, geodesic_mode
+        )
+        self._x_component = float(delta_x)
+        self._y_component = float(delta_y)
 
     def get_x_component(self):
-        return (self._track_point_2.lon - self._track_point_1.lon) * 101751
+        return self._x_component
 
     def get_y_component(self):
-        return (self._track_point_2.lat - self._track_point_1.lat) * 110757
+        return self._y_component
 
     def get_length(self):
         return math.sqrt(math.pow(self.get_x_component(), 2) + math.pow(self.get_y_component(), 2))
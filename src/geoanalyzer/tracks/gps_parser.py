@@ -1,38 +1,230 @@
+import bz2
+import contextlib
 import datetime
+import gzip
+import io
+import lzma
 import os
 import logging
-from typing import Optional, List
+import re
+import time
+import zipfile
+from typing import IO, Any, BinaryIO, Iterator, NamedTuple, Optional, List, Sequence, Tuple, Union, cast
 
 from xml.dom import minidom
 from xml.dom.minidom import Node, Element, Text
+from xml.etree import ElementTree
 # from src.geoanalyzer.tracks import track_objects
 
+import numpy as np
+from numpy.typing import NDArray
 
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint, WayPoint
 from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
+from src.geo_objects.geo_tracks.track_frame import TrackFrame, TIME_DTYPE
+from src.geo_objects.geo_tracks.track_segment import TrackSegment, filter_segment_list
 # from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject
 
 
-def parse_gpx(input_gpx_file: str) -> minidom.Document:
+# GPX time is recorded in UTC, the parsed time is shifted to the local time (UTC+8)
+LOCAL_TIME_OFFSET = datetime.timedelta(hours=8)
+
+# Streaming decompressors of the compressed GPX files, detected by the magic bytes at the start of the file
+_DECOMPRESSORS: Tuple[Tuple[bytes, Any], ...] = (
+    (b'\x1f\x8b', lambda f: gzip.GzipFile(fileobj=f, mode='rb')),
+    (b'BZh', lambda f: bz2.BZ2File(f, mode='rb')),
+    (b'\xfd7zXZ\x00', lambda f: lzma.LZMAFile(f, mode='rb')),
+)
+_ZIP_MAGIC = b'PK\x03\x04'
+
+# Suffixes of the GPX files, plain or compressed, which are looked for in a zip archive or a directory
+GPX_FILE_SUFFIXES = ('.gpx', '.gpx.gz', '.gpx.bz2', '.gpx.xz')
+GPX_ARCHIVE_SUFFIXES = ('.zip',)
+
+
+def is_gpx_file_name(file_name: str) -> bool:
+    """
+    Whether the file name has the suffix of a plain or compressed GPX file, or of a zip archive of GPX files.
+
+    :param file_name: The file name or path.
+    :type file_name: str
+    :rtype: bool
+    """
+    return file_name.lower().endswith(GPX_FILE_SUFFIXES + GPX_ARCHIVE_SUFFIXES)
+
+
+def strip_gpx_suffix(file_name: str) -> str:
+    """
+    Remove the GPX, compression or archive suffix of a file name, e.g. 'day1.gpx.gz' -> 'day1'.
+
+    :param file_name: The file name or path.
+    :type file_name: str
+    :return: The file name without its GPX suffix, unchanged if it has none.
+    :rtype: str
+    """
+    for suffix in sorted(GPX_FILE_SUFFIXES + GPX_ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if file_name.lower().endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def _decompressing(binary_file: IO[bytes]) -> BinaryIO:
+    """
+    Wrap a buffered binary file with the streaming decompressor of its format, or return it if not compressed.
+    """
+    magic = cast(io.BufferedReader, binary_file).peek(6)[:6]
+    for prefix, decompressor in _DECOMPRESSORS:
+        if magic.startswith(prefix):
+            return cast(BinaryIO, decompressor(binary_file))
+    return cast(BinaryIO, binary_file)
+
+
+def _is_zip_file(input_gpx_file: str) -> bool:
+    with open(input_gpx_file, 'rb') as f:
+        return f.read(len(_ZIP_MAGIC)) == _ZIP_MAGIC
+
+
+def list_gpx_members(input_gpx_file: str) -> List[Optional[str]]:
+    """
+    List the GPX files of a zip archive, in archive order. A file which is not a zip archive is its own
+    single member, listed as None.
+
+    :param input_gpx_file: The file path to the zip archive or GPX file.
+    :type input_gpx_file: str
+    :return: The names of the plain or compressed GPX members.
+    :rtype: List[Optional[str]]
+    :raises FileNotFoundError: If the specified file does not exist.
+    """
+    if not os.path.exists(input_gpx_file):
+        raise FileNotFoundError("GPX file not found")
+    if not _is_zip_file(input_gpx_file):
+        return [None]
+    with zipfile.ZipFile(input_gpx_file) as archive:
+        return [
+            info.filename for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(GPX_FILE_SUFFIXES)
+        ]
+
+
+@contextlib.contextmanager
+def open_gpx(input_gpx_file: str, member: Optional[str] = None) -> Iterator[BinaryIO]:
+    """
+    Open a plain, compressed or zipped GPX file for reading its XML content.
+
+    The format is detected from the first bytes of the file: gzip, bzip2 and xz files are decompressed while
+    they are read, so the XML content is never written out or held in memory as a whole. A zip archive is
+    read from its member, which may be compressed as well.
+
+    :param input_gpx_file: The file path to the GPX file or zip archive.
+    :type input_gpx_file: str
+    :param member: The name of the GPX file in the zip archive, may be left out if it holds only one.
+    :type member: Optional[str]
+    :return: A context manager of the binary file object of the XML content.
+    :rtype: Iterator[BinaryIO]
+    :raises FileNotFoundError: If the specified file does not exist.
+    :raises ValueError: If the member is given for a file which is not a zip archive, or the member is left
+        out for a zip archive which holds no or several GPX files.
+    """
+    if not os.path.exists(input_gpx_file):
+        raise FileNotFoundError("GPX file not found")
+
+    if not _is_zip_file(input_gpx_file):
+        if member is not None:
+            raise ValueError(f"{input_gpx_file} is not a zip archive, it has no member {member}.")
+        with open(input_gpx_file, 'rb') as f, _decompressing(f) as content:
+            yield content
+        return
+
+    with zipfile.ZipFile(input_gpx_file) as archive:
+        if member is None:
+            members = [name for name in list_gpx_members(input_gpx_file) if name is not None]
+            if len(members) != 1:
+                raise ValueError(
+                    f"{input_gpx_file} holds {len(members)} GPX files, select one of them: {', '.join(members)}."
+                )
+            member = members[0]
+        with archive.open(member) as member_file, _decompressing(member_file) as member_content:
+            yield member_content
+
+
+def parse_gpx(input_gpx_file: str, member: Optional[str] = None) -> minidom.Document:
     """
     Parse a GPX file and return its XML document representation.
 
     Reads a GPX file from the given file path, parses it into an XML document using the
     `minidom` parser, and returns the document object for further processing. Raises a
-    FileNotFoundError if the specified GPX file does not exist.
+    FileNotFoundError if the specified GPX file does not exist. Compressed and zipped GPX files
+    are read through `open_gpx`.
 
     :param input_gpx_file: The file path to the GPX file to be parsed.
     :type input_gpx_file: str
+    :param member: The name of the GPX file in a zip archive, see `open_gpx`.
+    :type member: Optional[str]
     :return: The parsed XML document object of the GPX file.
     :rtype: minidom.Document
     :raises FileNotFoundError: If the specified GPX file does not exist.
     """
     if not os.path.exists(input_gpx_file):
         raise FileNotFoundError("GPX file not found")
-    xmldoc = minidom.parse(input_gpx_file)
+    with open_gpx(input_gpx_file, member) as content:
+        xmldoc = minidom.parse(content)
     return xmldoc
 
 
+def _local_name(tag: str) -> str:
+    """
+    Strip the XML namespace from an ElementTree tag, e.g. '{http://www.topografix.com/GPX/1/1}trkpt' -> 'trkpt'.
+
+    :param tag: The (possibly namespace qualified) tag of an element.
+    :type tag: str
+    :return: The tag name without namespace.
+    :rtype: str
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def iterparse_gpx(
+        input_gpx_file: Union[str, BinaryIO],
+        tag_names: Tuple[str, ...] = ('wpt', 'trkpt')
+) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """
+    Incrementally parse a GPX file and yield its point elements one at a time.
+
+    Unlike `parse_gpx`, the document is never built as a whole. The file is walked with
+    `ElementTree.iterparse` and every element whose tag is listed in `tag_names` is yielded once it is
+    complete, together with its namespace-free tag name. As soon as the consumer resumes the generator
+    the element is cleared and detached from its parent, so the memory held by the parser stays
+    constant regardless of the file size.
+
+    :param input_gpx_file: The file path to the GPX file to be parsed, or a binary file object to read it from.
+        A file path may point to a compressed or zipped GPX file, see `open_gpx`.
+    :type input_gpx_file: Union[str, BinaryIO]
+    :param tag_names: The tag names of the point elements to yield. Default is ('wpt', 'trkpt').
+    :type tag_names: Tuple[str, ...]
+    :return: An iterator of (tag name, element) pairs in document order.
+    :rtype: Iterator[Tuple[str, ElementTree.Element]]
+    :raises FileNotFoundError: If the specified GPX file does not exist.
+    """
+    if isinstance(input_gpx_file, str):
+        with open_gpx(input_gpx_file) as content:
+            yield from iterparse_gpx(content, tag_names)
+        return
+
+    open_elements: List[ElementTree.Element] = []
+    for event, element in ElementTree.iterparse(input_gpx_file, events=('start', 'end')):
+        if event == 'start':
+            open_elements.append(element)
+            continue
+
+        open_elements.pop()
+        tag_name = _local_name(element.tag)
+        if tag_name in tag_names:
+            yield tag_name, element
+            element.clear()
+            if open_elements:
+                open_elements[-1].remove(element)
+
+
 def extract_waypoint_from_xmldoc(xmldoc: minidom.Document, tag_name='wpt') -> List[minidom.Node]:
     """
     Extracts all waypoints from the given GPX XML document.
@@ -63,31 +255,407 @@ def extract_track_point_from_xmldoc(xmldoc: minidom.Document, tag_name: str = 't
     return list(xmldoc.getElementsByTagName(tag_name))
 
 
+def _child_text(node: Element, tag_name: str) -> Optional[str]:
+    """
+    Return the text of the first direct child element with the tag name, or None.
+    """
+    for child in node.childNodes:
+        if isinstance(child, Element) and child.tagName == tag_name:
+            text = child.firstChild
+            return text.data if isinstance(text, Text) else None
+    return None
+
+
+def check_segment_list(segment_list: List[TrackSegment], point_count: int) -> List[TrackSegment]:
+    """
+    Validate that the segments cover all track points. Track points outside of a `trk`/`trkseg` element,
+    which malformed files have, cannot be assigned to a segment; all track points then form one segment.
+
+    :param segment_list: The segments of the track points, in document order.
+    :type segment_list: List[TrackSegment]
+    :param point_count: The number of track points.
+    :type point_count: int
+    :return: The segments, or the single segment of all track points.
+    :rtype: List[TrackSegment]
+    """
+    if sum(segment.get_point_count() for segment in segment_list) == point_count:
+        return segment_list
+    return [TrackSegment(0, 0, 0, point_count)] if point_count else []
+
+
+def _element_position(node: Element, tag_name: str) -> int:
+    """
+    Return the position of the element among the sibling elements with the tag name.
+    """
+    siblings = [c for c in node.parentNode.childNodes if isinstance(c, Element) and c.tagName == tag_name]
+    return siblings.index(node)
+
+
+def extract_segment_list_from_track_points(track_points: List[minidom.Node]) -> List[TrackSegment]:
+    """
+    Extracts the track and segment structure of the track points of a GPX document.
+
+    Consecutive track points of the same `trkseg` element form one segment; its track and segment index are
+    the positions of the `trk` and `trkseg` elements among their siblings, so they match the indices of
+    `iter_gpx_segments`. Segments without track points are left out.
+
+    :param track_points: The track point nodes, see `extract_track_point_from_xmldoc`.
+    :return: The segments, see `check_segment_list`.
+    :rtype: List[TrackSegment]
+    """
+    segment_list: List[TrackSegment] = []
+    current_segment = None
+    for index, track_point in enumerate(track_points):
+        segment = getattr(track_point, 'parentNode', None)
+        if not segment_list or segment is not current_segment:
+            track = getattr(segment, 'parentNode', None)
+            if not isinstance(segment, Element) or segment.tagName != 'trkseg' or \
+                    not isinstance(track, Element) or track.tagName != 'trk':
+                return check_segment_list([], len(track_points))
+            segment_list.append(TrackSegment(
+                _element_position(track, 'trk'), _element_position(segment, 'trkseg'), index, index,
+                _child_text(track, 'name')
+            ))
+            current_segment = segment
+        segment_list[-1] = segment_list[-1]._replace(stop=index + 1)
+    return check_segment_list(segment_list, len(track_points))
+
+
+class GpxSegment(NamedTuple):
+    """
+    The track points of one segment of a GPX file, see `iter_gpx_segments`.
+    """
+    track_index: int
+    segment_index: int
+    track_name: Optional[str]
+    track_frame: TrackFrame
+
+
+def iter_gpx_segments(
+        input_gpx_file: str,
+        member: Optional[str] = None,
+        track_index: Optional[int] = None,
+        segment_index: Optional[int] = None
+) -> Iterator[GpxSegment]:
+    """
+    Lazily stream the segments of a GPX file, one TrackFrame per `trkseg`.
+
+    Every segment is yielded as soon as its closing tag is parsed, so only one segment is held in memory.
+    Segments without track points are yielded as well, with an empty TrackFrame.
+    With `track_index` and/or `segment_index` only the matching segments are yielded: the track points of the
+    other segments are skipped without converting them, and parsing stops as soon as no further segment can
+    match. Loading one segment of a long multi-day file therefore converts only that segment and reads the
+    file only up to its end.
+
+    :param input_gpx_file: The file path to the GPX file, which may be compressed or a zip archive.
+    :type input_gpx_file: str
+    :param member: The name of the GPX file in a zip archive, see `open_gpx`.
+    :type member: Optional[str]
+    :param track_index: Yield only the segments of this track, counted from 0.
+    :type track_index: Optional[int]
+    :param segment_index: Yield only the segments with this index within their track, counted from 0.
+    :type segment_index: Optional[int]
+    :return: An iterator of the segments in document order.
+    :rtype: Iterator[GpxSegment]
+    :raises FileNotFoundError: If the specified GPX file does not exist.
+    :raises ValueError: If a coordinate, elevation or time value of a yielded segment cannot be parsed.
+    """
+    current_track = -1
+    current_segment = -1
+    track_name: Optional[str] = None
+    collector: Optional[_GpxColumnCollector] = None
+    open_elements: List[ElementTree.Element] = []
+
+    with open_gpx(input_gpx_file, member) as content:
+        for event, element in ElementTree.iterparse(content, events=('start', 'end')):
+            tag_name = _local_name(element.tag)
+            if event == 'start':
+                open_elements.append(element)
+                if tag_name == 'trk':
+                    current_track += 1
+                    current_segment = -1
+                    track_name = None
+                elif tag_name == 'trkseg':
+                    current_segment += 1
+                    selected = (track_index is None or track_index == current_track) and \
+                        (segment_index is None or segment_index == current_segment)
+                    collector = _GpxColumnCollector() if selected else None
+                continue
+
+            open_elements.pop()
+            parent_tag_name = _local_name(open_elements[-1].tag) if open_elements else None
+            if tag_name == 'name' and parent_tag_name == 'trk':
+                track_name = element.text
+            elif tag_name == 'trkpt' and collector is not None:
+                collector.add_track_point_element(element)
+            elif tag_name == 'trkseg' and collector is not None:
+                yield GpxSegment(current_track, current_segment, track_name, collector.to_track_frame())
+                collector = None
+                if track_index is not None and segment_index is not None:
+                    return
+            elif tag_name == 'trk' and track_index is not None and current_track >= track_index:
+                return
+
+            if tag_name in ('trkpt', 'wpt', 'trkseg') and open_elements:
+                element.clear()
+                open_elements[-1].remove(element)
+
+
+# ISO 8601 date and time of the GPX time fields, with optional fractional seconds and UTC offset
+_ISO_8601_PATTERN = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d+))?(Z|[+-]\d{2}(?::?\d{2})?)?'
+)
+_UTC_OFFSET_SUFFIX_PATTERN = re.compile(r'[+-]\d{2}(?::?\d{2})?$')
+
+
+def _parse_utc_offset(offset: str) -> datetime.timedelta:
+    """
+    Convert a UTC offset designator, 'Z', '+08', '+0800' or '-08:00', into a timedelta.
+    """
+    if offset == 'Z':
+        return datetime.timedelta(0)
+    digits = offset[1:].replace(':', '')
+    minutes = int(digits[:2]) * 60 + (int(digits[2:]) if len(digits) > 2 else 0)
+    return datetime.timedelta(minutes=minutes if offset[0] == '+' else -minutes)
+
+
 def parse_time(input_time: str) -> datetime.datetime:
     """
     Parses a time string from a GPX file into a datetime object.
 
-    Converts a time string in the format "%Y-%m-%dT%H:%M:%SZ" from the GPX file to
-    a datetime object, adjusting for the timezone if necessary. The implementation
-    should be adapted to handle timezone information more dynamically.
+    Converts an ISO 8601 time string from the GPX file to a datetime object in the local time (see
+    `LOCAL_TIME_OFFSET`). The "%Y-%m-%dT%H:%M:%SZ" layout written by most devices, with or without
+    fractional seconds, takes a fast path. Other strings may have a UTC offset such as "+08:00"; a time
+    without offset is taken as UTC, like the GPX format specifies. Fractional seconds are truncated to
+    microseconds.
 
-    :param input_time: The input time string in "%Y-%m-%dT%H:%M:%SZ" format.
+    :param input_time: The input time string, e.g. "2023-08-28T01:00:00Z" or "2023-08-28T09:00:00.123+08:00".
     :type input_time: str
     :return: The parsed datetime object.
     :rtype: datetime.datetime
     :raises ValueError: If there is an error parsing the datetime.
     """
     try:
-        parse_date_and_time = datetime.datetime.strptime(
-            input_time,
-            "%Y-%m-%dT%H:%M:%SZ"
+        if input_time[-1:] == 'Z' and input_time[10:11] == 'T':
+            # Fast path of "%Y-%m-%dT%H:%M:%SZ", with fractional seconds as written by e.g. Garmin devices
+            fraction = input_time[20:-1]
+            if len(input_time) == 20:
+                return datetime.datetime.fromisoformat(input_time[:19]) + LOCAL_TIME_OFFSET
+            if input_time[19] == '.' and fraction.isdigit():
+                # Padded to the six digits fromisoformat accepts on every supported Python version
+                return datetime.datetime.fromisoformat(input_time[:20] + fraction[:6].ljust(6, '0')) + LOCAL_TIME_OFFSET
+
+        match = _ISO_8601_PATTERN.fullmatch(input_time)
+        if match is None:
+            raise ValueError(f"Invalid GPX time: {input_time}")
+        year, month, day, hour, minute, second, fraction, offset = match.groups()
+        parsed = datetime.datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            int(fraction[:6].ljust(6, '0')) if fraction else 0
         )
-        parse_date_and_time = parse_date_and_time + datetime.timedelta(hours=8)
-        return parse_date_and_time
+        if offset:
+            parsed -= _parse_utc_offset(offset)
+        return parsed + LOCAL_TIME_OFFSET
     except Exception as e:
         raise ValueError from e
 
 
+def parse_time_array(input_times: Sequence[Optional[str]]) -> NDArray[np.int64]:
+    """
+    Parses many time strings of a GPX file in one call into local times as microseconds since epoch.
+
+    The bulk variant of `parse_time`, accepting the same strings. Strings without UTC offset, including the
+    common "Z" suffix, are converted by numpy in one vectorized call; only strings with an offset such as
+    "+08:00" are parsed one by one. Missing times, None or empty strings, are NaT.
+
+    :param input_times: The input time strings.
+    :type input_times: Sequence[Optional[str]]
+    :return: The local times as int64 microseconds since epoch, see `TrackFrame.get_epoch_time`.
+    :rtype: NDArray[np.int64]
+    :raises ValueError: If a time string cannot be parsed.
+    """
+    naive_times = []
+    offset_times = {}
+    for index, input_time in enumerate(input_times):
+        if not input_time:
+            naive_times.append('NaT')
+        elif input_time[-1] == 'Z':
+            naive_times.append(input_time[:-1])
+        elif len(input_time) > 19 and _UTC_OFFSET_SUFFIX_PATTERN.search(input_time, 19):
+            naive_times.append('NaT')
+            offset_times[index] = input_time
+        else:
+            naive_times.append(input_time)
+
+    try:
+        times = np.array(naive_times, dtype=TIME_DTYPE) + np.timedelta64(LOCAL_TIME_OFFSET)
+    except Exception as e:
+        raise ValueError from e
+    for index, input_time in offset_times.items():
+        times[index] = parse_time(input_time)
+    return times.view(np.int64)
+
+
+class GpxPointFilter:
+    """
+    The time window and bounding box the points of a GPX file must lie in, applied while the file is parsed.
+
+    The bounds are inclusive. The times are local times, like the parsed point times (see `parse_time`), and
+    a point without time is outside any time window. Either bound of the time window may be None to leave it
+    open.
+
+    :param time_range: The (start, end) time window, or None for no time filter.
+    :type time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]]
+    :param bbox: The (min lat, min lon, max lat, max lon) bounding box, or None for no location filter.
+    :type bbox: Optional[Tuple[float, float, float, float]]
+    :raises ValueError: If a lower bound is greater than its upper bound.
+    """
+
+    def __init__(
+            self,
+            time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]] = None,
+            bbox: Optional[Tuple[float, float, float, float]] = None
+    ):
+        if time_range is not None:
+            start, end = time_range
+            if start is not None and end is not None and start > end:
+                raise ValueError(f"Invalid time range: the start {start} is after the end {end}.")
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            if not (min_lat <= max_lat and min_lon <= max_lon):
+                raise ValueError(f"Invalid bounding box {bbox}: expected (min lat, min lon, max lat, max lon).")
+        self._time_range = time_range
+        self._bbox = bbox
+
+    def get_time_range(self) -> Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]]:
+        return self._time_range
+
+    def get_bbox(self) -> Optional[Tuple[float, float, float, float]]:
+        return self._bbox
+
+    def has_time_range(self) -> bool:
+        return self._time_range is not None
+
+    def contains_location(self, lat: float, lon: float) -> bool:
+        """
+        Whether the location lies in the bounding box, always True without a bounding box.
+        """
+        if self._bbox is None:
+            return True
+        min_lat, min_lon, max_lat, max_lon = self._bbox
+        return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+    def contains_time(self, time: Optional[datetime.datetime]) -> bool:
+        """
+        Whether the time lies in the time window, always True without a time window.
+        """
+        if self._time_range is None:
+            return True
+        if time is None:
+            return False
+        start, end = self._time_range
+        return (start is None or start <= time) and (end is None or time <= end)
+
+    def get_mask(self, frame: TrackFrame) -> NDArray[np.bool_]:
+        """
+        Return whether every point of the frame passes the filter, evaluated on the whole columns at once.
+        """
+        mask = np.ones(len(frame), dtype=np.bool_)
+        if self._bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = self._bbox
+            mask &= (frame.lat >= min_lat) & (frame.lat <= max_lat) & (frame.lon >= min_lon) & (frame.lon <= max_lon)
+        if self._time_range is not None:
+            start, end = self._time_range
+            mask &= ~np.isnat(frame.time)
+            if start is not None:
+                mask &= frame.time >= np.datetime64(start, 'us')
+            if end is not None:
+                mask &= frame.time <= np.datetime64(end, 'us')
+        return mask
+
+    def apply(self, raw_track_object: RawTrackObject) -> RawTrackObject:
+        """
+        Filter a track object which is already loaded, e.g. from a track file.
+
+        :param raw_track_object: The track object.
+        :return: A new track object with the track points, segments and waypoints passing the filter.
+        :rtype: RawTrackObject
+        """
+        kept_mask = self.get_mask(raw_track_object.get_track_frame())
+        filtered = RawTrackObject()
+        filtered.set_track_frame(raw_track_object.get_track_frame().take(kept_mask))
+        filtered.set_segment_list(filter_segment_list(raw_track_object.get_segment_list(), kept_mask))
+        for waypoint in raw_track_object.get_waypoint_list():
+            if self.contains_location(waypoint.lat, waypoint.lon) and self.contains_time(waypoint.time):
+                filtered.add_way_point(waypoint)
+        return filtered
+
+
+class _GpxColumnCollector:
+    """
+    Collects the raw attribute and child texts of streamed track point elements, and converts them into
+    columns in bulk once all points are seen, without creating a point object or parsing a time per point.
+    """
+
+    def __init__(self):
+        self._lat: List[str] = []
+        self._lon: List[str] = []
+        self._elev: List[str] = []
+        self._time: List[str] = []
+
+    def add_track_point_element(self, element: ElementTree.Element) -> None:
+        elevation = 'nan'
+        time = ''
+        for child in element:
+            tag_name = _local_name(child.tag)
+            if tag_name == 'ele' and child.text:
+                elevation = child.text
+            elif tag_name == 'time' and child.text:
+                time = child.text
+
+        self._lat.append(element.get('lat', ''))
+        self._lon.append(element.get('lon', ''))
+        self._elev.append(elevation)
+        self._time.append(time)
+
+    def to_track_frame(self) -> TrackFrame:
+        try:
+            time = parse_time_array(self._time)
+            return TrackFrame(
+                np.array(self._lat, dtype=np.float64),
+                np.array(self._lon, dtype=np.float64),
+                np.array(self._elev, dtype=np.float64),
+                time,
+            )
+        except Exception as e:
+            raise ValueError from e
+
+
+def load_gpx_track_frame(input_gpx: Union[str, bytes, BinaryIO]) -> TrackFrame:
+    """
+    Load the track points of a GPX file directly into a columnar TrackFrame.
+
+    This is the bulk loading path for jobs which never look at individual point objects. The file is
+    streamed, the lat/lon/ele/time texts of every track point are collected as strings and converted in one
+    go into float64 lat/lon/elev arrays (missing elevation is NaN) and a datetime64[us] time array, which is an
+    int64 epoch time underneath (see `TrackFrame.get_epoch_time`). The times are parsed with
+    `parse_time_array`, which applies the local time offset as one vector add. Waypoints are ignored.
+
+    :param input_gpx: The file path to the GPX file, the GPX content as bytes, or a binary file object.
+    :type input_gpx: Union[str, bytes, BinaryIO]
+    :return: The track points of the GPX file.
+    :rtype: TrackFrame
+    :raises FileNotFoundError: If the specified GPX file does not exist.
+    :raises ValueError: If a coordinate, elevation or time value cannot be parsed.
+    """
+    source = io.BytesIO(input_gpx) if isinstance(input_gpx, bytes) else input_gpx
+
+    collector = _GpxColumnCollector()
+    for _, element in iterparse_gpx(source, tag_names=('trkpt',)):
+        collector.add_track_point_element(element)
+    return collector.to_track_frame()
+
+
 class GpxParser:
     """
     Parser class for extracting data from GPX files.
@@ -96,20 +664,70 @@ class GpxParser:
     track points. The extracted data is used to populate a RawTrackObject with instances of WayPoint
     and RawTrkPoint, which can then be further processed or analyzed.
 
+    Three parsing modes are supported. The default "dom" mode loads the whole document with `minidom`.
+    The "stream" mode walks the file incrementally with `iterparse_gpx` and frees every element once its
+    point has been created, which keeps the peak memory constant in the file size. Both modes produce
+    the same RawTrackObject. The "columnar" mode streams the file as well, but loads the track points in
+    bulk into a TrackFrame (see `load_gpx_track_frame`), which the main tracks of the RawTrackObject wrap.
+
+    Gzip, bzip2 and xz compressed GPX files and zip archives are read directly, see `open_gpx`. Every GPX
+    file of a zip archive is parsed with `iter_gpx_track_objects`.
+
+    With `time_range` and/or `bbox` only the points inside the time window and the bounding box are kept
+    (see `GpxPointFilter`), for the waypoints and the track points alike. The filter is applied while parsing:
+    the location of a point is checked before its time is parsed, and no point object is created for a point
+    outside the filter. The columnar mode applies the filter to the whole columns at once. A segment whose
+    points leave and re-enter the filter is split into one segment per run of kept points, see
+    `filter_segment_list`.
+
     :ivar _infile: Path to the input GPX file.
+    :ivar _mode: The parsing mode, either "dom" or "stream".
     :ivar _target_track_object: Container for the extracted waypoints and track points.
 
     :param gpx_file: The file path to the GPX file to be processed.
     :type gpx_file: str
+    :param mode: The parsing mode, "dom" (default), "stream" or "columnar".
+    :type mode: str
+    :param member: The name of the GPX file in a zip archive, may be left out if it holds only one.
+    :type member: Optional[str]
+    :param time_range: Keep only the points in this (start, end) local time window, either bound may be None.
+    :type time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]]
+    :param bbox: Keep only the points in this (min lat, min lon, max lat, max lon) bounding box.
+    :type bbox: Optional[Tuple[float, float, float, float]]
+    :raises ValueError: If the parsing mode is not supported, or the time range or bounding box is invalid.
     """
 
-    def __init__(self, gpx_file):
+    SUPPORTED_MODES = ('dom', 'stream', 'columnar')
+
+    def __init__(
+            self,
+            gpx_file,
+            mode: str = 'dom',
+            member: Optional[str] = None,
+            time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]] = None,
+            bbox: Optional[Tuple[float, float, float, float]] = None
+    ):
+
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"Invalid parsing mode: {mode}. Supported modes are {', '.join(self.SUPPORTED_MODES)}.")
 
         self._infile = gpx_file
+        self._mode = mode
+        self._point_filter = None if time_range is None and bbox is None else GpxPointFilter(time_range, bbox)
 
         self._target_track_object = RawTrackObject()
+        # Whether every track point passed the point filter, in document order
+        self._kept_track_points: List[bool] = []
 
-        xmldoc = parse_gpx(self._infile)
+        if mode in ('stream', 'columnar'):
+            # Nodes are released while streaming, nothing is kept for later inspection
+            self._extract_waypoint: List[minidom.Node] = []
+            self._extract_track_point: List[minidom.Node] = []
+            with open_gpx(self._infile, member) as content:
+                self.processing_gpx_stream(content, columnar=(mode == 'columnar'))
+            return
+
+        xmldoc = parse_gpx(self._infile, member)
 
         self._extract_waypoint = extract_waypoint_from_xmldoc(xmldoc)
         self._extract_track_point = extract_track_point_from_xmldoc(xmldoc)
@@ -117,6 +735,11 @@ class GpxParser:
         self.processing_waypoint_list(self._extract_waypoint)
         self.processing_track_point_list(self._extract_track_point)
 
+        segment_list = extract_segment_list_from_track_points(self._extract_track_point)
+        if self._point_filter is not None:
+            segment_list = filter_segment_list(segment_list, np.array(self._kept_track_points, dtype=np.bool_))
+        self._target_track_object.set_segment_list(segment_list)
+
     def processing_waypoint_list(self, input_list_: List[minidom.Node]) -> None:
         """
         Processes a list of waypoint nodes and adds them to the track object.
@@ -129,16 +752,23 @@ class GpxParser:
                 logging.error("Node is not an Element.")
                 continue
 
+            lat, lon = float(s.getAttribute("lat")), float(s.getAttribute("lon"))
+            if self._point_filter is not None and not self._point_filter.contains_location(lat, lon):
+                continue
+
             point_time_str_utc = self._gpx_extract_point_time_str_utc(s)
             point_parsed_datetime = None if point_time_str_utc is None else parse_time(point_time_str_utc)
+            if self._point_filter is not None and not self._point_filter.contains_time(point_parsed_datetime):
+                continue
+
             elevation = self._gpx_extract_point_elevation(s)
             waypoint_note = self._gpx_extract_point_note(s)
 
             # Creating the point object
             extract_waypoint = WayPoint(
                 point_parsed_datetime,
-                float(s.getAttribute("lat")),
-                float(s.getAttribute("lon")),
+                lat,
+                lon,
                 elevation,
                 waypoint_note
             )
@@ -155,19 +785,120 @@ class GpxParser:
 
             if not isinstance(s, Element):
                 logging.error("Node is not an Element.")
+                self._kept_track_points.append(False)
+                continue
+
+            lat, lon = float(s.getAttribute("lat")), float(s.getAttribute("lon"))
+            if self._point_filter is not None and not self._point_filter.contains_location(lat, lon):
+                self._kept_track_points.append(False)
                 continue
 
             point_time_str_utc = self._gpx_extract_point_time_str_utc(s)
             point_parsed_datetime = None if point_time_str_utc is None else parse_time(point_time_str_utc)
+            if self._point_filter is not None and not self._point_filter.contains_time(point_parsed_datetime):
+                self._kept_track_points.append(False)
+                continue
+
             elevation = self._gpx_extract_point_elevation(s)
 
             extract_point = RawTrkPoint(
                 point_parsed_datetime,
-                float(s.getAttribute("lat")),
-                float(s.getAttribute("lon")),
+                lat,
+                lon,
                 elevation
             )
             self._target_track_object.add_track_point(extract_point)
+            self._kept_track_points.append(True)
+
+    def processing_gpx_stream(self, input_gpx_file: Union[str, BinaryIO], columnar: bool = False) -> None:
+        """
+        Streams the GPX file and adds every waypoint and track point to the track object as it is parsed.
+        The track and segment structure of the track points is recorded as the segment list of the track object.
+
+        :param input_gpx_file: The file path to the GPX file to be processed, or a binary file object of its content.
+        :type input_gpx_file: Union[str, BinaryIO]
+        :param columnar: Collect the track points in bulk into a TrackFrame instead of creating RawTrkPoints.
+        :type columnar: bool
+        """
+        collector = _GpxColumnCollector() if columnar else None
+
+        # Track and segment structure, the segments of a track get its name once the track is complete
+        point_count = 0
+        segment_start = 0
+        segment_list: List[TrackSegment] = []
+        track_index = 0
+        segment_index = 0
+        track_segments: List[TrackSegment] = []
+
+        for tag_name, element in iterparse_gpx(input_gpx_file, tag_names=('wpt', 'trkpt', 'trkseg', 'trk')):
+
+            if tag_name == 'trkseg':
+                if point_count > segment_start:
+                    track_segments.append(TrackSegment(track_index, segment_index, segment_start, point_count))
+                segment_start = point_count
+                segment_index += 1
+                continue
+            if tag_name == 'trk':
+                track_name = next((child.text for child in element if _local_name(child.tag) == 'name'), None)
+                segment_list.extend(segment._replace(track_name=track_name) for segment in track_segments)
+                track_segments = []
+                track_index += 1
+                segment_index = 0
+                continue
+
+            if tag_name == 'trkpt':
+                point_count += 1
+                if collector is not None:
+                    collector.add_track_point_element(element)
+                    continue
+
+            lat, lon = float(element.get("lat", "")), float(element.get("lon", ""))
+            if self._point_filter is not None and not self._point_filter.contains_location(lat, lon):
+                if tag_name == 'trkpt':
+                    self._kept_track_points.append(False)
+                continue
+
+            point_time_str_utc = self._etree_extract_point_time_str_utc(element)
+            point_parsed_datetime = None if point_time_str_utc is None else parse_time(point_time_str_utc)
+            if self._point_filter is not None and not self._point_filter.contains_time(point_parsed_datetime):
+                if tag_name == 'trkpt':
+                    self._kept_track_points.append(False)
+                continue
+
+            elevation = self._etree_extract_point_elevation(element)
+
+            if tag_name == 'wpt':
+                self._target_track_object.add_way_point(
+                    WayPoint(
+                        point_parsed_datetime,
+                        lat,
+                        lon,
+                        elevation,
+                        self._etree_extract_point_note(element)
+                    )
+                )
+            else:
+                self._target_track_object.add_track_point(
+                    RawTrkPoint(
+                        point_parsed_datetime,
+                        lat,
+                        lon,
+                        elevation
+                    )
+                )
+                self._kept_track_points.append(True)
+
+        segment_list = check_segment_list(segment_list + track_segments, point_count)
+        if collector is not None:
+            track_frame = collector.to_track_frame()
+            if self._point_filter is not None:
+                kept_mask = self._point_filter.get_mask(track_frame)
+                track_frame = track_frame.take(kept_mask)
+                segment_list = filter_segment_list(segment_list, kept_mask)
+            self._target_track_object.set_track_frame(track_frame)
+        elif self._point_filter is not None:
+            segment_list = filter_segment_list(segment_list, np.array(self._kept_track_points, dtype=np.bool_))
+        self._target_track_object.set_segment_list(segment_list)
 
     def get_raw_track_object(self) -> RawTrackObject:
         """
@@ -259,3 +990,277 @@ class GpxParser:
             return None
 
         return note_node.data
+
+    @staticmethod
+    def _etree_find_child(s: ElementTree.Element, tag_name: str) -> Optional[ElementTree.Element]:
+        """
+        Finds the first descendant of a streamed GPX point element with the given tag name, ignoring namespaces.
+
+        :param s: GPX point element to search in.
+        :type s: ElementTree.Element
+        :param tag_name: The namespace-free tag name to look for.
+        :type tag_name: str
+        :return: The first matching descendant element, or None if not found.
+        :rtype: Optional[ElementTree.Element]
+        """
+        for child in s.iter():
+            if child is not s and _local_name(child.tag) == tag_name:
+                return child
+        return None
+
+    @staticmethod
+    def _etree_extract_point_time_str_utc(s: ElementTree.Element) -> Optional[str]:
+        """
+        Extracts the time string from a streamed GPX point element and returns it.
+
+        :param s: GPX point element from which to extract the time string.
+        :type s: ElementTree.Element
+        :return: The extracted time string, or None if not found.
+        :rtype: Optional[str]
+        """
+        time_element = GpxParser._etree_find_child(s, "time")
+        if time_element is None:
+            logging.error("Time tag not found in GPX point.")
+            return None
+
+        if not time_element.text:
+            logging.error("Time element's first child is not text.")
+            return None
+
+        return time_element.text
+
+    @staticmethod
+    def _etree_extract_point_elevation(s: ElementTree.Element) -> Optional[float]:
+        """
+        Extracts and returns the elevation float value from a streamed GPX point element.
+
+        :param s: GPX point element from which to extract the elevation.
+        :type s: ElementTree.Element
+        :return: The elevation value, or None if not found or invalid.
+        :rtype: Optional[float]
+        """
+        elevation_element = GpxParser._etree_find_child(s, "ele")
+        if elevation_element is None:
+            logging.error("Elevation tag not found in GPX point.")
+            return None
+
+        if not elevation_element.text:
+            logging.error("Elevation element's first child is not text.")
+            return None
+
+        try:
+            return float(elevation_element.text)
+        except ValueError:
+            logging.error("Elevation value is not a valid float.")
+            return None
+
+    @staticmethod
+    def _etree_extract_point_note(s: ElementTree.Element) -> Optional[str]:
+        """
+        Extracts and returns the note string from a streamed GPX point element.
+
+        :param s: GPX point element from which to extract the note.
+        :type s: ElementTree.Element
+        :return: The note string, or None if not found.
+        :rtype: Optional[str]
+        """
+        note_element = GpxParser._etree_find_child(s, "name")
+        if note_element is None:
+            logging.error("Note tag not found in GPX point.")
+            return None
+
+        if not note_element.text:
+            logging.error("Note element's first child is not text.")
+            return None
+
+        return note_element.text
+
+
+def iter_gpx_track_objects(input_gpx_file: str, mode: str = 'stream') -> Iterator[Tuple[Optional[str], RawTrackObject]]:
+    """
+    Parse every GPX file of a zip archive, one after the other, each into its own RawTrackObject.
+    A plain or compressed GPX file yields its single track object.
+
+    :param input_gpx_file: The file path to the zip archive or GPX file.
+    :type input_gpx_file: str
+    :param mode: The parsing mode of GpxParser. Default is "stream".
+    :type mode: str
+    :return: An iterator of (member name, track object) pairs, the member name is None for a file which is
+        not a zip archive.
+    :rtype: Iterator[Tuple[Optional[str], RawTrackObject]]
+    :raises FileNotFoundError: If the specified file does not exist.
+    """
+    for member in list_gpx_members(input_gpx_file):
+        yield member, GpxParser(input_gpx_file, mode=mode, member=member).get_raw_track_object()
+
+
+class GpxFollowUpdate(NamedTuple):
+    """
+    The points completed in a followed GPX file since the previous poll. `segment_list` marks the segments of
+    the new track points in `track_frame`; its first segment continues the last segment of the previous update
+    if both have the same track and segment index. `offset` is the byte offset the next poll reads from.
+    """
+    track_frame: TrackFrame
+    waypoints: List[WayPoint]
+    segment_list: List[TrackSegment]
+    offset: int
+
+
+class GpxFollower:
+    """
+    Tail-follow parser of a GPX file which is still being recorded.
+
+    A GPX logger appends to its file while recording, so the document stays unterminated until the recording
+    stops and `parse_gpx` fails on it. The follower feeds the file to an `ElementTree.XMLPullParser`, which never
+    requires the document to be closed. Every `poll` reads only the bytes appended since the previous poll,
+    starting at the remembered byte offset, and returns the track points and waypoints completed by them. An
+    element cut off at the end of the file stays buffered in the parser until the rest of it is appended.
+    Completed elements are released once they are converted, so the memory held does not grow with the file.
+
+    The track points of a poll are converted in bulk like in the columnar mode of GpxParser. Compressed files
+    and zip archives cannot be followed.
+
+    :param gpx_file: The file path to the GPX file.
+    :type gpx_file: str
+    :param read_size: Number of bytes read and parsed at a time.
+    :type read_size: int
+    :raises FileNotFoundError: If the specified GPX file does not exist.
+    """
+
+    def __init__(self, gpx_file: str, read_size: int = 1 << 20):
+        if not os.path.exists(gpx_file):
+            raise FileNotFoundError("GPX file not found")
+
+        self._infile = gpx_file
+        self._read_size = read_size
+        self._offset = 0
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._open_elements: List[ElementTree.Element] = []
+
+        # Track and segment structure of all track points so far
+        self._point_count = 0
+        self._track_index = -1
+        self._segment_index = -1
+        self._track_name: Optional[str] = None
+        self._segment_list: List[TrackSegment] = []
+
+    def get_offset(self) -> int:
+        return self._offset
+
+    def get_point_count(self) -> int:
+        return self._point_count
+
+    def get_segment_list(self) -> List[TrackSegment]:
+        """
+        Return the segments of all track points completed so far, the last segment may still grow.
+
+        :rtype: List[TrackSegment]
+        """
+        return list(self._segment_list)
+
+    def poll(self) -> GpxFollowUpdate:
+        """
+        Parse the bytes appended to the file since the previous poll.
+
+        :return: The track points and waypoints completed by the appended bytes, empty if nothing was appended.
+        :rtype: GpxFollowUpdate
+        :raises ValueError: If the file got shorter than the bytes already parsed, e.g. it was replaced, or a
+            coordinate, elevation or time value cannot be parsed.
+        :raises ElementTree.ParseError: If the appended content is not well-formed XML.
+        """
+        if os.path.getsize(self._infile) < self._offset:
+            raise ValueError(f"{self._infile} got shorter than the {self._offset} bytes already parsed.")
+
+        first_point = self._point_count
+        collector = _GpxColumnCollector()
+        waypoints: List[WayPoint] = []
+        with open(self._infile, 'rb') as f:
+            f.seek(self._offset)
+            while True:
+                data = f.read(self._read_size)
+                if not data:
+                    break
+                self._offset += len(data)
+                self._parser.feed(data)
+                for event, element in self._parser.read_events():
+                    self._process_event(event, cast(ElementTree.Element, element), collector, waypoints)
+
+        segment_list = [
+            segment._replace(start=max(segment.start, first_point) - first_point, stop=segment.stop - first_point)
+            for segment in self._segment_list if segment.stop > first_point
+        ]
+        return GpxFollowUpdate(collector.to_track_frame(), waypoints, segment_list, self._offset)
+
+    def _process_event(
+            self,
+            event: str,
+            element: ElementTree.Element,
+            collector: _GpxColumnCollector,
+            waypoints: List[WayPoint]
+    ) -> None:
+        tag_name = _local_name(element.tag)
+        if event == 'start':
+            self._open_elements.append(element)
+            if tag_name == 'trk':
+                self._track_index += 1
+                self._segment_index = -1
+                self._track_name = None
+            elif tag_name == 'trkseg':
+                self._segment_index += 1
+            return
+
+        self._open_elements.pop()
+        parent_tag_name = _local_name(self._open_elements[-1].tag) if self._open_elements else None
+        if tag_name == 'name' and parent_tag_name == 'trk':
+            self._track_name = element.text
+        elif tag_name == 'trkpt':
+            collector.add_track_point_element(element)
+            self._add_track_point()
+        elif tag_name == 'wpt':
+            point_time_str_utc = GpxParser._etree_extract_point_time_str_utc(element)
+            waypoints.append(WayPoint(
+                None if point_time_str_utc is None else parse_time(point_time_str_utc),
+                float(element.get("lat", "")),
+                float(element.get("lon", "")),
+                GpxParser._etree_extract_point_elevation(element),
+                GpxParser._etree_extract_point_note(element)
+            ))
+
+        if tag_name in ('trkpt', 'wpt', 'trkseg') and self._open_elements:
+            element.clear()
+            self._open_elements[-1].remove(element)
+
+    def _add_track_point(self) -> None:
+        track_index, segment_index = max(self._track_index, 0), max(self._segment_index, 0)
+        last = self._segment_list[-1] if self._segment_list else None
+        if last is not None and (last.track_index, last.segment_index) == (track_index, segment_index):
+            self._segment_list[-1] = last._replace(stop=self._point_count + 1)
+        else:
+            self._segment_list.append(
+                TrackSegment(track_index, segment_index, self._point_count, self._point_count + 1, self._track_name)
+            )
+        self._point_count += 1
+
+    def follow(self, interval: float = 5.0, max_idle_polls: Optional[int] = None) -> Iterator[GpxFollowUpdate]:
+        """
+        Poll the file every `interval` seconds and yield every update holding new points.
+
+        :param interval: Seconds between two polls.
+        :type interval: float
+        :param max_idle_polls: Stop after this many consecutive polls without new points, or None to follow the
+            file until the consumer stops.
+        :type max_idle_polls: Optional[int]
+        :return: An iterator of the updates with new track points or waypoints.
+        :rtype: Iterator[GpxFollowUpdate]
+        """
+        idle_polls = 0
+        while True:
+            update = self.poll()
+            if len(update.track_frame) or update.waypoints:
+                idle_polls = 0
+                yield update
+            else:
+                idle_polls += 1
+                if max_idle_polls is not None and idle_polls >= max_idle_polls:
+                    return
+            time.sleep(interval)
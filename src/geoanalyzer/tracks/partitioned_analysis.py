@@ -0,0 +1,199 @@
+"""
+Analysis of one large track segment over a pool of worker processes.
+
+The analyzed points are split into consecutive partitions. Every worker smooths and analyzes the raw points of
+its partition, extended by the `smoothing_window + 1` points the smoothing window and the central differences
+need after it, so every analyzed point is computed from the same raw points as by the serial analysis. The raw
+and analyzed columns live in shared memory: the workers read the raw columns and write the analyzed columns in
+place, and only the names of the shared memory blocks and the partition bounds are sent to them.
+
+Every worker also scans its partition for rests, starting idle at its first point. That scan is exact from the
+first position on at which the exact scan of the previous points is idle as well. The parent process continues
+the exact scan of the previous partitions into every partition until that position, usually within the first
+rest or movement of the partition, and takes the closed rests of the worker over from there. The 120 s merge
+rule is applied to the joined closed rests at the end, so rests crossing a partition boundary are merged like
+in the serial analysis.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.point_vector.geodesy import DEFAULT_GEODESIC_MODE, check_geodesic_mode
+from src.geoanalyzer.tracks.rest_point_engine import ClosedRest, RestRunScanner, merge_rest_events
+from src.geoanalyzer.tracks.track_analyzer import analyze_segment_frame, analyze_track_frame
+from src.geoanalyzer.tracks.track_smoothing import smooth_track_frame, smooth_values
+
+# Fewest analyzed points per partition by default, smaller partitions do not pay for the worker processes
+MIN_PARTITION_SIZE = 100_000
+
+_RAW_COLUMNS = ('lat', 'lon', 'elev', 'time')
+_ANALYZED_COLUMNS = ('lat', 'lon', 'elev', 'time', 'dx', 'dy', 'dz', 'dt', 'speed_x', 'speed_y', 'speed_z', 'speed_xy')
+
+
+class _SharedColumns(NamedTuple):
+    """
+    Columns of `length` 8 byte values each, stored one after the other in the shared memory block `name`.
+    The time column holds int64 microseconds since epoch, every other column float64 values.
+    """
+    name: str
+    columns: Tuple[str, ...]
+    length: int
+
+    def get_arrays(self, shm: shared_memory.SharedMemory) -> Dict[str, NDArray[np.generic]]:
+        return {
+            column: np.ndarray(
+                (self.length,), dtype=np.int64 if column == 'time' else np.float64, buffer=shm.buf,
+                offset=i * self.length * 8
+            )
+            for i, column in enumerate(self.columns)
+        }
+
+
+def _create_shared_columns(columns: Tuple[str, ...], length: int) -> Tuple[shared_memory.SharedMemory, _SharedColumns]:
+    shm = shared_memory.SharedMemory(create=True, size=max(len(columns) * length * 8, 1))
+    return shm, _SharedColumns(shm.name, columns, length)
+
+
+class _PartitionScan(NamedTuple):
+    """
+    The rest scan of a partition, started idle at its first point, with the positions recorded.
+    """
+    closed_rests: List[ClosedRest]
+    scanner: RestRunScanner
+
+
+def _analyze_partition(
+        raw_block: _SharedColumns,
+        analyzed_block: _SharedColumns,
+        start: int,
+        stop: int,
+        smoothing_kernel: str,
+        smoothing_window: int,
+        geodesic_mode: str
+) -> _PartitionScan:
+    """
+    Analyze the points [start, stop) of the analyzed track in a worker process and scan them for rests.
+    """
+    raw_shm = shared_memory.SharedMemory(name=raw_block.name)
+    analyzed_shm = shared_memory.SharedMemory(name=analyzed_block.name)
+    try:
+        raw_frame = TrackFrame(**raw_block.get_arrays(raw_shm)).slice(start, stop + smoothing_window + 1)
+        analyzed_frame = analyze_track_frame(
+            smooth_track_frame(raw_frame, smoothing_kernel, smoothing_window), geodesic_mode
+        )
+        for column, values in analyzed_block.get_arrays(analyzed_shm).items():
+            values[start:stop] = analyzed_frame.get_epoch_time() if column == 'time' else analyzed_frame.get_column(column)
+
+        scanner = RestRunScanner(record_positions=True, geodesic_mode=geodesic_mode)
+        scanner.feed(analyzed_frame)
+        # Release the views of the shared memory before closing it
+        del raw_frame, analyzed_frame, values
+        return _PartitionScan(scanner.pop_closed_rests(), scanner)
+    finally:
+        raw_shm.close()
+        analyzed_shm.close()
+
+
+def join_partition_scans(
+        analyzed_frame: TrackFrame,
+        partition_starts: List[int],
+        partition_scans: List[_PartitionScan]
+) -> List[ClosedRest]:
+    """
+    Join the rest scans of consecutive partitions into the closed rests of a single scan of the whole track.
+
+    :param analyzed_frame: The analyzed points of the whole track.
+    :param partition_starts: The first position of every partition, the first partition starts at 0.
+    :param partition_scans: The scan of every partition, started idle at its first point.
+    :return: The closed rests, the same as a single scan of the track finds.
+    """
+    closed_rests = list(partition_scans[0].closed_rests)
+    scanner = partition_scans[0].scanner
+    partition_stops = partition_starts[1:] + [len(analyzed_frame)]
+    for start, stop, partition_scan in zip(partition_starts[1:], partition_stops[1:], partition_scans[1:]):
+        # Continue the exact scan until it is idle at a position at which the partition scan is idle as well
+        joined_at = scanner.feed_until_idle(analyzed_frame.slice(start, stop), partition_scan.scanner.get_idle_ranges())
+        closed_rests += scanner.pop_closed_rests()
+        if joined_at is None:
+            continue
+
+        # From there on both scans are alike, the partition scan holds the closed rests and the final state
+        closed_rests += [
+            closed_rest
+            for closed_rest, position in zip(partition_scan.closed_rests, partition_scan.scanner.get_closed_positions())
+            if position >= joined_at
+        ]
+        scanner = partition_scan.scanner
+    return closed_rests
+
+
+def analyze_segment_frame_partitioned(
+        raw_frame: TrackFrame,
+        workers: int,
+        smoothing_kernel: str = 'box',
+        smoothing_window: int = 5,
+        partition_size: Optional[int] = None,
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[TrackFrame, List[RestTrkPoint]]:
+    """
+    Smooth and analyze the track points of one segment over a pool of worker processes and find its rest points.
+
+    :param raw_frame: The raw track points of the segment.
+    :param workers: Number of worker processes.
+    :param smoothing_kernel: The kernel used to smooth the track, see `track_smoothing.SMOOTHING_KERNELS`.
+    :param smoothing_window: The window size of the smoothing kernel.
+    :param partition_size: Number of analyzed points per partition. Default is an even split over the workers
+        with at least `MIN_PARTITION_SIZE` points per partition.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The analyzed track points and the rest points of the segment, the same as `analyze_segment_frame`
+        returns with the 'rle' engine.
+    :raises ValueError: If the kernel, window, number of workers, partition size or geodesic mode is not supported.
+    """
+    # Validates the kernel and the window
+    smooth_values(np.empty(0), smoothing_kernel, smoothing_window)
+    check_geodesic_mode(geodesic_mode)
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers {workers}. Must be at least 1.")
+    if partition_size is not None and partition_size < 1:
+        raise ValueError(f"Invalid partition size {partition_size}. Must be at least 1.")
+
+    analyzed_count = max(len(raw_frame) - smoothing_window - 1, 0)
+    if partition_size is None:
+        partition_size = max(-(-analyzed_count // workers), MIN_PARTITION_SIZE)
+    partition_starts = list(range(0, analyzed_count, partition_size))
+    if workers == 1 or len(partition_starts) <= 1:
+        return analyze_segment_frame(raw_frame, smoothing_kernel, smoothing_window, geodesic_mode=geodesic_mode)
+
+    raw_shm, raw_block = _create_shared_columns(_RAW_COLUMNS, len(raw_frame))
+    analyzed_shm, analyzed_block = _create_shared_columns(_ANALYZED_COLUMNS, analyzed_count)
+    try:
+        for column, values in raw_block.get_arrays(raw_shm).items():
+            values[:] = raw_frame.get_epoch_time() if column == 'time' else raw_frame.get_column(column)
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(partition_starts))) as executor:
+            futures = [
+                executor.submit(
+                    _analyze_partition, raw_block, analyzed_block, start, min(start + partition_size, analyzed_count),
+                    smoothing_kernel, smoothing_window, geodesic_mode
+                )
+                for start in partition_starts
+            ]
+            partition_scans = [future.result() for future in futures]
+
+        analyzed_frame = TrackFrame(
+            **{column: values.copy() for column, values in analyzed_block.get_arrays(analyzed_shm).items()}
+        )
+        del values
+    finally:
+        raw_shm.close()
+        raw_shm.unlink()
+        analyzed_shm.close()
+        analyzed_shm.unlink()
+
+    return analyzed_frame, merge_rest_events(join_partition_scans(analyzed_frame, partition_starts, partition_scans))
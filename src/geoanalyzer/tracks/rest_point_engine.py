@@ -0,0 +1,382 @@
+"""
+Mask and run based engine for finding the rest points of an analyzed track.
+
+It applies the same rules as the per-point state machine of `track_analyzer.find_rest_point`
+(Rest Point Candidate => SeedPoint => RestTrkPoint), but works on the columns of an analyzed TrackFrame:
+
+    - the low speed mask (speed_xy < 0.1) is computed once, and the start of the next low speed run is
+      looked up in the run starts instead of visiting every point in between,
+    - a candidate is grown over a whole window of points at once, the 20 m drift and the 60 s duration rules
+      are evaluated for the window with cumulative sums and the first point breaking the candidate is located
+      with a single search,
+    - once a seed is found, the first fast point leaving the 20 m box around the seed is located with a single
+      search as well.
+
+The scanner only emits "closed rest" events, the 120 s merge rule is applied afterwards by `merge_rest_events`.
+Sums are accumulated in the same order as the state machine does, so both engines return the same rest points.
+The scanner keeps its state between calls of `feed`, so a track can be scanned chunk by chunk, and its closed
+rests can be drained with `pop_closed_rests` to keep its memory bounded.
+"""
+
+import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.point_vector.geodesy import DEFAULT_GEODESIC_MODE, check_geodesic_mode, seed_displacements
+
+REST_SPEED_THRESHOLD = 0.1  # m/s, slower points are rest point candidates
+REST_DRIFT_LIMIT = 20  # meters, allowed drift of a candidate and radius of a seed
+REST_MIN_DURATION = 60  # seconds, time a candidate needs to become a seed
+REST_MERGE_GAP = 120  # seconds, rest points closer than this are merged
+
+_IDLE, _CANDIDATE, _SEED = range(3)
+
+# First number of points searched at once, doubled while nothing is found
+_INITIAL_SEARCH_WINDOW = 64
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class ClosedRest(NamedTuple):
+    """
+    A seed which has been left, i.e. a rest point before the merge rule is applied. Times are epoch microseconds.
+    """
+    start_time: int
+    lat: float
+    lon: float
+    elev: float
+    end_time: int
+
+
+def _timedelta_seconds(delta_us: Any) -> Any:
+    """
+    Same as `datetime.timedelta(microseconds=delta_us).seconds`, for scalars and arrays of int64 microseconds.
+    """
+    return (delta_us // 1_000_000) % 86400
+
+
+def is_rest_merge_gap(gap_us: int) -> bool:
+    """
+    The 120 s merge rule: whether a rest starting `gap_us` microseconds after the end of the previous rest point
+    is the same rest. The gap is the elapsed time, so rests a day or more apart are never merged.
+    """
+    return 0 <= gap_us < REST_MERGE_GAP * 1_000_000
+
+
+def _sequential_sum(initial: float, values: NDArray[np.float64]) -> float:
+    """
+    Add the values one by one to the initial value, in the same order as a python loop would.
+    """
+    return float(np.cumsum(np.concatenate((np.array([initial]), values)))[-1])
+
+
+def epoch_us_to_datetime(epoch_us: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=int(epoch_us))
+
+
+class RestRunScanner:
+    """
+    Incremental scanner for the closed rests of an analyzed track.
+
+    Feed the analyzed track, in one piece or in consecutive chunks, and read the closed rests with
+    `get_closed_rests`.
+
+    With `record_positions`, the scanner also records the positions (counted over all fed points) of the points
+    closing the rests and the ranges of positions at which it is idle, i.e. scanning from the point at that
+    position on does not depend on any earlier point. Two scanners idle at the same position scan the rest of the
+    track alike, which lets scans of consecutive parts of a track started independently be joined exactly, see
+    `feed_until_idle`.
+
+    :param record_positions: Whether to record the closing positions and idle ranges.
+    :param geodesic_mode: The distance computation between a point and the seed, see `geodesy.GEODESIC_MODES`.
+    :raises ValueError: If the geodesic mode is not supported.
+    """
+
+    def __init__(self, record_positions: bool = False, geodesic_mode: str = DEFAULT_GEODESIC_MODE):
+        check_geodesic_mode(geodesic_mode)
+        self._geodesic_mode = geodesic_mode
+        self._state = _IDLE
+        self._closed_rests: List[ClosedRest] = []
+        self._record_positions = record_positions
+        self._position = 0
+        self._closed_positions: List[int] = []
+        self._idle_ranges: List[Tuple[int, int]] = []
+
+        # Rest Point Candidate
+        self._candidate_start_time = 0
+        self._candidate_count = 0
+        self._candidate_sums = (0.0, 0.0, 0.0)
+        self._candidate_tot_delta = (0.0, 0.0)
+
+        # SeedPoint: lat, lon, elev and start time
+        self._seed: Tuple[float, float, float, int] = (0.0, 0.0, 0.0, 0)
+
+    def get_closed_rests(self) -> List[ClosedRest]:
+        return self._closed_rests
+
+    def pop_closed_rests(self) -> List[ClosedRest]:
+        """
+        Return the rests closed since the previous call and forget them.
+        """
+        closed_rests, self._closed_rests = self._closed_rests, []
+        return closed_rests
+
+    def get_closed_positions(self) -> List[int]:
+        """
+        Return the positions of the points closing the rests of `get_closed_rests`, if recorded.
+        """
+        return self._closed_positions
+
+    def get_idle_ranges(self) -> List[Tuple[int, int]]:
+        """
+        Return the [start, stop) ranges of the positions at which the scanner was idle, if recorded.
+        """
+        return self._idle_ranges
+
+    def is_idle(self) -> bool:
+        return self._state == _IDLE
+
+    def get_open_start_time(self) -> Optional[int]:
+        """
+        Return the start time (epoch microseconds) of the current candidate or seed, which is the start time of
+        the next closed rest unless the candidate is dropped, or None if the scanner is idle.
+        """
+        if self._state == _CANDIDATE:
+            return self._candidate_start_time
+        if self._state == _SEED:
+            return self._seed[3]
+        return None
+
+    def feed(self, analyzed_frame: TrackFrame) -> None:
+        """
+        Scan the next points of the analyzed track.
+
+        :param analyzed_frame: Analyzed points, providing the dx, dy and speed_xy (or dt) columns.
+        :type analyzed_frame: TrackFrame
+        """
+        self._scan(_to_scan_columns(analyzed_frame), None)
+
+    def feed_until_idle(self, analyzed_frame: TrackFrame, idle_ranges: List[Tuple[int, int]]) -> Optional[int]:
+        """
+        Scan the next points of the analyzed track until the scanner is idle at one of the given positions.
+
+        Used to join the scan of a part of the track which was started idle at the first point of the part: once
+        this scanner is idle at a position at which that scan was idle as well, both scan the remaining points
+        alike, so the closed rests of that scan from the position on can be taken over.
+
+        :param analyzed_frame: Analyzed points, providing the dx, dy and speed_xy (or dt) columns.
+        :param idle_ranges: Sorted [start, stop) ranges of positions, counted from the first point of the frame.
+        :return: The position within the frame at which the scanner stopped idle, the points from it on are not
+            scanned, or None if all points were scanned without reaching such a position.
+        """
+        return self._scan(_to_scan_columns(analyzed_frame), idle_ranges)
+
+    def _scan(self, columns: '_ScanColumns', stop_ranges: Optional[List[Tuple[int, int]]]) -> Optional[int]:
+        low_indices = np.flatnonzero(columns.low)
+        stop_range_starts = np.array([start for start, _ in stop_ranges or []], dtype=np.int64)
+        stop_range_stops = np.array([stop for _, stop in stop_ranges or []], dtype=np.int64)
+
+        i = 0
+        stopped_at: Optional[int] = None
+        while i < len(columns.low):
+            if self._state == _IDLE:
+                # The scanner is idle at every position up to and including the start of the next low speed run
+                run_position = np.searchsorted(low_indices, i)
+                next_low = len(columns.low) if run_position == len(low_indices) else int(low_indices[run_position])
+                range_position = int(np.searchsorted(stop_range_stops, i, side='right'))
+                if range_position < len(stop_range_starts) and stop_range_starts[range_position] <= next_low:
+                    stopped_at = max(i, int(stop_range_starts[range_position]))
+                    break
+                if self._record_positions:
+                    self._idle_ranges.append((self._position + i, self._position + next_low + 1))
+                if run_position == len(low_indices):
+                    break
+                i = self._start_candidate(columns, next_low)
+            elif self._state == _CANDIDATE:
+                i = self._grow_candidate(columns, i)
+            else:
+                i = self._follow_seed(columns, i)
+
+        self._position += len(columns.low) if stopped_at is None else stopped_at
+        return stopped_at
+
+    def _start_candidate(self, columns: '_ScanColumns', index: int) -> int:
+        self._state = _CANDIDATE
+        self._candidate_start_time = int(columns.time[index])
+        self._candidate_count = 1
+        self._candidate_sums = (float(columns.lat[index]), float(columns.lon[index]), float(columns.elev[index]))
+        self._candidate_tot_delta = (0.0, 0.0)
+        return index + 1
+
+    def _grow_candidate(self, columns: '_ScanColumns', start: int) -> int:
+        """
+        Add the points from `start` on to the candidate until the first point which drops it or turns it into a seed.
+
+        :return: The index to continue scanning from.
+        """
+        search_window = _INITIAL_SEARCH_WINDOW
+        while start < len(columns.low):
+            stop = min(start + search_window, len(columns.low))
+            search_window *= 2
+
+            # Points which are neither slow nor fast (unknown speed) are skipped like the state machine does
+            indices = start + np.flatnonzero(columns.low[start:stop] | columns.high[start:stop])
+            low = columns.low[indices]
+
+            # Drift accumulated before every point, summed in point order starting from the current total
+            drift_x = np.cumsum(np.concatenate(([self._candidate_tot_delta[0]], columns.dx[indices])))
+            drift_y = np.cumsum(np.concatenate(([self._candidate_tot_delta[1]], columns.dy[indices])))
+            drifted = (drift_x[:-1] > REST_DRIFT_LIMIT) | (drift_y[:-1] > REST_DRIFT_LIMIT)
+
+            elapsed = _timedelta_seconds(columns.time[indices] - self._candidate_start_time)
+            count_before = self._candidate_count + np.arange(len(indices))
+
+            drop = (low & drifted) | (~low & ((count_before < 2) | (elapsed < REST_MIN_DURATION)))
+            seed = low & ~drifted & (elapsed > REST_MIN_DURATION)
+            breaking = np.flatnonzero(drop | seed)
+
+            added = len(indices) if len(breaking) == 0 else int(breaking[0])
+            self._add_to_candidate(columns, indices[:added], drift_x[added], drift_y[added])
+
+            if len(breaking) == 0:
+                start = stop
+                continue
+
+            if seed[added]:
+                sum_lat, sum_lon, sum_elev = self._candidate_sums
+                count = self._candidate_count
+                self._seed = (sum_lat / count, sum_lon / count, sum_elev / count, self._candidate_start_time)
+                self._state = _SEED
+            else:
+                self._state = _IDLE
+            return int(indices[added]) + 1
+
+        return start
+
+    def _add_to_candidate(self, columns: '_ScanColumns', indices: NDArray[np.intp], tot_delta_x: float, tot_delta_y: float):
+        if len(indices) == 0:
+            return
+        self._candidate_count += len(indices)
+        self._candidate_tot_delta = (float(tot_delta_x), float(tot_delta_y))
+        sum_lat, sum_lon, sum_elev = self._candidate_sums
+        self._candidate_sums = (
+            _sequential_sum(sum_lat, columns.lat[indices]),
+            _sequential_sum(sum_lon, columns.lon[indices]),
+            _sequential_sum(sum_elev, columns.elev[indices]),
+        )
+
+    def _follow_seed(self, columns: '_ScanColumns', start: int) -> int:
+        """
+        Look for the first fast point from `start` on which is 20 meters or more away from the seed.
+
+        :return: The index to continue scanning from.
+        """
+        seed_lat, seed_lon, seed_elev, seed_start_time = self._seed
+        search_window = _INITIAL_SEARCH_WINDOW
+        while start < len(columns.low):
+            stop = min(start + search_window, len(columns.low))
+            search_window *= 2
+
+            x_shift, y_shift = seed_displacements(
+                seed_lat, seed_lon, columns.lat[start:stop], columns.lon[start:stop], self._geodesic_mode
+            )
+            x_shift, y_shift = np.fabs(x_shift), np.fabs(y_shift)
+            leaving = np.flatnonzero(
+                columns.high[start:stop] & ~((x_shift < REST_DRIFT_LIMIT) & (y_shift < REST_DRIFT_LIMIT))
+            )
+            if len(leaving) == 0:
+                start = stop
+                continue
+
+            index = start + int(leaving[0])
+            self._closed_rests.append(
+                ClosedRest(seed_start_time, seed_lat, seed_lon, seed_elev, int(columns.time[index]))
+            )
+            if self._record_positions:
+                self._closed_positions.append(self._position + index)
+            self._state = _IDLE
+            return index + 1
+
+        return start
+
+
+class _ScanColumns(NamedTuple):
+    low: NDArray[np.bool_]
+    high: NDArray[np.bool_]
+    dx: NDArray[np.float64]
+    dy: NDArray[np.float64]
+    lat: NDArray[np.float64]
+    lon: NDArray[np.float64]
+    elev: NDArray[np.float64]
+    time: NDArray[np.int64]
+
+
+def _to_scan_columns(analyzed_frame: TrackFrame) -> _ScanColumns:
+    if analyzed_frame.has_column('speed_xy'):
+        speed = analyzed_frame.get_column('speed_xy')
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = np.hypot(analyzed_frame.get_column('dx'), analyzed_frame.get_column('dy')) / \
+                analyzed_frame.get_column('dt')
+
+    return _ScanColumns(
+        low=speed < REST_SPEED_THRESHOLD,
+        high=speed >= REST_SPEED_THRESHOLD,
+        dx=analyzed_frame.get_column('dx'),
+        dy=analyzed_frame.get_column('dy'),
+        lat=analyzed_frame.lat,
+        lon=analyzed_frame.lon,
+        elev=analyzed_frame.elev,
+        time=analyzed_frame.get_epoch_time(),
+    )
+
+
+def merge_rest_events(closed_rests: List[ClosedRest]) -> List[RestTrkPoint]:
+    """
+    Turn closed rests into RestTrkPoints, applying the 120 s merge rule.
+
+    A rest starting less than 120 seconds after the end of the previous rest point is treated as the same rest,
+    the previous rest point is extended to its end time instead, see `is_rest_merge_gap`.
+
+    :param closed_rests: The closed rests in track order.
+    :return: The rest points.
+    """
+    rest_point_list: List[RestTrkPoint] = []
+    last_end_time = 0
+    for closed_rest in closed_rests:
+        if rest_point_list and is_rest_merge_gap(closed_rest.start_time - last_end_time):
+            rest_point_list[-1].update_end_time(epoch_us_to_datetime(closed_rest.end_time))
+        else:
+            start_time = epoch_us_to_datetime(closed_rest.start_time)
+            rest_point_list.append(
+                RestTrkPoint(
+                    start_time,
+                    closed_rest.lat,
+                    closed_rest.lon,
+                    closed_rest.elev,
+                    start_time,
+                    epoch_us_to_datetime(closed_rest.end_time)
+                )
+            )
+        last_end_time = closed_rest.end_time
+    return rest_point_list
+
+
+def find_rest_point_rle(analyzed_frame: TrackFrame, geodesic_mode: str = DEFAULT_GEODESIC_MODE) -> List[RestTrkPoint]:
+    """
+    Find the rest points of an analyzed track with the mask and run based engine.
+
+    :param analyzed_frame: The analyzed track, providing the dx, dy and speed_xy (or dt) columns.
+    :type analyzed_frame: TrackFrame
+    :param geodesic_mode: The distance computation between a point and the seed, see `geodesy.GEODESIC_MODES`.
+    :type geodesic_mode: str
+    :return: The rest points, the same as `track_analyzer.find_rest_point` returns for the track.
+    :rtype: List[RestTrkPoint]
+    """
+    scanner = RestRunScanner(geodesic_mode=geodesic_mode)
+    scanner.feed(analyzed_frame)
+    return merge_rest_events(scanner.get_closed_rests())
@@ -1,9 +1,33 @@
 import datetime
 import math
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
-from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint, RestTrkPoint, RestTrkPointCandidate
-from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint, RestTrkPointCandidate
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject, AnalyzedTracks
+from src.geo_objects.geo_tracks.track_frame import TIME_DTYPE, TrackFrame, TrackFramePointList
+from src.geo_objects.geo_tracks.track_distance import add_cumulative_distances
+from src.geo_objects.geo_tracks.track_segment import relayout_segments
+from src.geo_objects.geo_tracks.track_statistics import TrackStatistics
+from src.geo_objects.point_vector.geodesy import (
+    DEFAULT_GEODESIC_MODE, LEGACY_METERS_PER_DEGREE, check_geodesic_mode, seed_displacements, step_displacements
+)
+from src.geoanalyzer.tracks.track_smoothing import smooth_track_frame, smooth_values
+from src.geoanalyzer.tracks.rest_point_engine import (
+    REST_MERGE_GAP, RestRunScanner, epoch_us_to_datetime, find_rest_point_rle, is_rest_merge_gap
+)
+from src.geoanalyzer.tracks.turn_detection import (
+    DEFAULT_TURN_ANGLE, DEFAULT_TURN_LOOK_BACK_DISTANCE, find_great_turns, set_great_turns
+)
+from src.instrumentation.profiling import span
+
+# Engines available for finding the rest points: the per-point state machine `find_rest_point`,
+# and the mask and run based `rest_point_engine.find_rest_point_rle`. Both return the same rest points.
+REST_POINT_ENGINES = ('state_machine', 'rle')
 
 #
 # def sum_delta_between_every_element(input_list: List[Union[float, datetime.timedelta]]) -> float:
@@ -79,88 +103,105 @@ def sum_timedelta_deltas(input_list: List[datetime.timedelta]) -> float:
     return sum((input_list[i + 1] - input_list[i]).total_seconds() for i in range(len(input_list) - 1))
 
 
-def smoothing_tracks(input_track_point_list: List[RawTrkPoint]) -> List[RawTrkPoint]:
+def smoothing_tracks(input_track_point_list: List[RawTrkPoint], kernel: str = 'box', window: int = 5) -> List[RawTrkPoint]:
     """
     Smooths the GPS track data by averaging the latitude, longitude, and elevation values over a sliding window of track points.
 
+    The points are smoothed column wise by the vectorized engine in `track_smoothing`, one point is returned for
+    every complete window, taking the time of the point at the window centre.
+
     :param input_track_point_list: A list of RawTrkPoint objects representing the GPS track points.
     :type input_track_point_list: List[RawTrkPoint]
+    :param kernel: The smoothing kernel, one of 'box' (default), 'gaussian', 'savgol' or 'median'.
+    :type kernel: str
+    :param window: The window size, a positive odd integer. Default is 5.
+    :type window: int
     :return: A list of RawTrkPoint objects representing the smoothed GPS track points.
     :rtype: List[RawTrkPoint]
     """
-    def average(input_list: List[float]) -> float:
-        """
-        Calculates the average of a list of numbers.
+    smoothed_frame = smooth_track_frame(TrackFrame.from_points(input_track_point_list), kernel, window)
+    return cast(List[RawTrkPoint], smoothed_frame.to_points(RawTrkPoint))
 
-        :param input_list: A list of numbers.
-        :type input_list: List[float]
-        :return: The average of the input list.
-        :rtype: float
-        """
-        return sum(input_list) / len(input_list)
 
-    averaged_tracks_list: List[RawTrkPoint] = []
+def central_differences(values: NDArray[Any]) -> NDArray[np.float64]:
+    """
+    Average displacement per step over the 3-point window around every inner value.
 
-    for i in range(len(input_track_point_list) - 5):
-        track_point_list_segment = input_track_point_list[i:i+5]
-        track_point_time = track_point_list_segment[2].time
+    Equivalent to `sum_numeric_deltas(values[i-1:i+2]) / 2` for every inner index i, computed for the whole array
+    at once. The result has `len(values) - 2` values.
 
-        list_segment_lat = list(map(lambda x: x.lat, track_point_list_segment))
-        list_segment_lon = list(map(lambda x: x.lon, track_point_list_segment))
-        list_segment_ele = list(map(lambda x: x.elev, track_point_list_segment))
+    :param values: 1-D array of values.
+    :return: The central differences.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return np.empty(0, dtype=np.float64)
+    return ((values[1:-1] - values[:-2]) + (values[2:] - values[1:-1])) / 2
 
-        average_lat = average(list_segment_lat)
-        average_lon = average(list_segment_lon)
-        average_elev = average(list_segment_ele)
 
-        averaged_tracks_list.append(
-            RawTrkPoint(
-                track_point_time,
-                average_lat,
-                average_lon,
-                average_elev
-            )
+def analyze_track_frame(input_track_frame: TrackFrame, geodesic_mode: str = DEFAULT_GEODESIC_MODE) -> TrackFrame:
+    """
+    Compute the displacement and speed of every inner point of a track in one pass.
+
+    For every point with a neighbour on both sides, the central differences dx, dy (meters), dz (meters) and
+    dt (seconds) are computed from the two neighbours, and the speeds speed_x, speed_y, speed_z and speed_xy
+    derived from them. The first and last point have no complete window and are not part of the output.
+    dx and dy are the mean of the east and north displacements of the steps to and from the point, in the
+    'legacy' mode the central differences of the degrees scaled by the fixed lengths of a degree.
+
+    :param input_track_frame: The (smoothed) track points.
+    :type input_track_frame: TrackFrame
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :type geodesic_mode: str
+    :return: The inner points with the dx, dy, dz, dt, speed_x, speed_y, speed_z and speed_xy columns.
+    :rtype: TrackFrame
+    """
+    if geodesic_mode == 'legacy':
+        # 1 degree is 101751 meters in Lon direction and 110757 meters in Lat direction
+        delta_x = central_differences(input_track_frame.lon) * LEGACY_METERS_PER_DEGREE[0]
+        delta_y = central_differences(input_track_frame.lat) * LEGACY_METERS_PER_DEGREE[1]
+    else:
+        step_x, step_y = step_displacements(input_track_frame.lat, input_track_frame.lon, geodesic_mode)
+        delta_x = (step_x[:-1] + step_x[1:]) / 2
+        delta_y = (step_y[:-1] + step_y[1:]) / 2
+    delta_z = central_differences(input_track_frame.elev)
+    epoch_time = input_track_frame.get_epoch_time()
+    delta_t = ((epoch_time[1:-1] - epoch_time[:-2]) / 1e6 + (epoch_time[2:] - epoch_time[1:-1]) / 1e6) / 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inner_frame = input_track_frame.slice(1, len(delta_x) + 1)
+        return inner_frame.with_columns(
+            dx=delta_x,
+            dy=delta_y,
+            dz=delta_z,
+            dt=delta_t,
+            speed_x=delta_x / delta_t,
+            speed_y=delta_y / delta_t,
+            speed_z=delta_z / delta_t,
+            speed_xy=np.sqrt(delta_x * delta_x + delta_y * delta_y) / delta_t,
         )
-    return averaged_tracks_list
 
 
-def do_analyzing(input_track_point_list):
+def do_analyzing(input_track_point_list, geodesic_mode: str = DEFAULT_GEODESIC_MODE) -> AnalyzedTrackObject:
+    """
+    Analyze a list of (smoothed) track points, see `analyze_track_frame`.
 
-    target_analyzing_track_object = AnalyzedTrackObject()
-    raw_track_point_list = input_track_point_list
-
-    for i in range(len(raw_track_point_list)-3):
-        track_point_list_segment = raw_track_point_list[i:i+3]
-
-        list_segment_lat = list(map(lambda x: x.lat, track_point_list_segment))
-        list_segment_lon = list(map(lambda x: x.lon, track_point_list_segment))
-        list_segment_elev = list(map(lambda x: x.elev, track_point_list_segment))
-        list_segment_time = list(map(lambda x: x.time, track_point_list_segment))
-
-        # 1 degree is 101751 meters in Lon direction
-        delta_x = sum_numeric_deltas(list_segment_lon)/(len(list_segment_lon)-1) * 101751
-        # 1 degree is 110757 meters in Lat direction
-        delta_y = sum_numeric_deltas(list_segment_lat)/(len(list_segment_lat)-1) * 110757
-        delta_z = sum_numeric_deltas(list_segment_elev)/(len(list_segment_elev)-1)
-        delta_t = sum_timedelta_deltas(list_segment_time)/(len(list_segment_time)-1)
-
-        target_analyzing_track_object.add_track_point(
-            AnalyzedTrkPoint(
-                track_point_list_segment[1].time,
-                track_point_list_segment[1].lat,
-                track_point_list_segment[1].lon,
-                track_point_list_segment[1].elev,
-                delta_x,
-                delta_y,
-                delta_z,
-                delta_t
-            )
-        )
+    :param input_track_point_list: The track points, a list of point objects or the point list of a track wrapping a TrackFrame.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The analyzed track object, its main tracks wrap the analyzed TrackFrame.
+    :rtype: AnalyzedTrackObject
+    """
+    if isinstance(input_track_point_list, TrackFramePointList):
+        input_track_frame = input_track_point_list.get_track_frame()
+    else:
+        input_track_frame = TrackFrame.from_points(input_track_point_list)
 
+    target_analyzing_track_object = AnalyzedTrackObject()
+    target_analyzing_track_object.set_track_frame(analyze_track_frame(input_track_frame, geodesic_mode))
     return target_analyzing_track_object
 
 
-def find_rest_point(input_list):
+def find_rest_point(input_list, geodesic_mode: str = DEFAULT_GEODESIC_MODE):
 
     """ finding the rest point from the gpx tracks!
 
@@ -196,6 +237,7 @@ def find_rest_point(input_list):
         (SeedPoint lat, SeedPoint lon, SeedPoint elev, RestPointCandidate StartTime, LastPoint's time as end time)
 
     :param input_list:
+    :param geodesic_mode: The distance computation between a point and the seed, see `geodesy.GEODESIC_MODES`.
     :return:
     """
 
@@ -216,7 +258,9 @@ def find_rest_point(input_list):
 
     for i_track_point in input_list:
 
-        if i_track_point.get_speed_xy() < 0.1:
+        speed_xy = i_track_point.get_speed_xy()
+
+        if speed_xy < 0.1:
 
             # ======================= #
             # If SeedPoint is found   #
@@ -264,7 +308,7 @@ def find_rest_point(input_list):
                     print("Peculiar case happen, which I did not considered")
                     raise Exception
 
-        elif i_track_point.get_speed_xy() >= 0.1:
+        elif speed_xy >= 0.1:
 
             if found_seed:
                 """ if rest point seed is found!
@@ -276,15 +320,19 @@ def find_rest_point(input_list):
                 if seed_rest_point is None:
                     raise ValueError("Seed rest point is None when it should have been initialized.")
 
-                x_shift = math.fabs((i_track_point.lon-seed_rest_point.lon)*110751)
-                y_shift = math.fabs((i_track_point.lat-seed_rest_point.lat)*110757)
+                x_shift, y_shift = seed_displacements(
+                    seed_rest_point.lat, seed_rest_point.lon, i_track_point.lat, i_track_point.lon, geodesic_mode
+                )
+                x_shift, y_shift = math.fabs(x_shift), math.fabs(y_shift)
                 if x_shift < 20 and y_shift < 20:
                     pass
                 else:
                     # Stop to collect resting point,
                     # flush and delete all collecting object
 
-                    if len(rest_point_list) > 0 and (seed_rest_point.start_time - rest_point_list[-1].get_end_time()).seconds < 120:
+                    if len(rest_point_list) > 0 and is_rest_merge_gap(
+                            (seed_rest_point.start_time - rest_point_list[-1].get_end_time()) // datetime.timedelta(microseconds=1)
+                    ):
                         # ============================================================================================ #
                         # If the seed rest point's start time is too close to previous rest point's end time           #
                         # The new seeding point maybe the same rest point, Do not append this seed as new rest point   #
@@ -331,32 +379,276 @@ def find_rest_point(input_list):
     return rest_point_list
 
 
+def analyze_segment_frame(
+        raw_frame: TrackFrame,
+        smoothing_kernel: str = 'box',
+        smoothing_window: int = 5,
+        rest_point_engine: str = 'rle',
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[TrackFrame, List[RestTrkPoint]]:
+    """
+    Smooth and analyze the track points of one segment and find its rest points.
+
+    :param raw_frame: The raw track points of the segment.
+    :param smoothing_kernel: The kernel used to smooth the track, see `track_smoothing.SMOOTHING_KERNELS`.
+    :param smoothing_window: The window size of the smoothing kernel.
+    :param rest_point_engine: The engine used to find the rest points, see `REST_POINT_ENGINES`.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The analyzed track points, see `analyze_track_frame`, and the rest points of the segment.
+    """
+    with span('smoothing'):
+        smoothed_frame = smooth_track_frame(raw_frame, smoothing_kernel, smoothing_window)
+
+    with span('analyzing'):
+        analyzed_frame = analyze_track_frame(smoothed_frame, geodesic_mode)
+
+    with span('rest_points'):
+        if rest_point_engine == 'rle':
+            rest_point_list = find_rest_point_rle(analyzed_frame, geodesic_mode)
+        else:
+            rest_point_list = find_rest_point(
+                AnalyzedTracks.from_track_frame(analyzed_frame).get_main_tracks_points_list(), geodesic_mode
+            )
+    return analyzed_frame, rest_point_list
+
+
+def analyze_segment_frame_chunked(
+        raw_frame: TrackFrame,
+        chunk_size: int,
+        smoothing_kernel: str = 'box',
+        smoothing_window: int = 5,
+        keep_analyzed_points: bool = True,
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[TrackFrame, List[RestTrkPoint], TrackStatistics]:
+    """
+    Smooth and analyze the track points of one segment chunk by chunk and find its rest points.
+
+    The chunks are fed to an OnlineTrackAnalyzer, which carries the last raw and smoothed points over to the next
+    chunk, so the smoothing window and the central differences see the same neighbours as for the whole segment,
+    and rests crossing a chunk boundary are found once. The analyzed points and rest points are those of
+    `analyze_segment_frame` with the 'rle' engine, see `OnlineTrackAnalyzer` for the kernels which agree to
+    round-off only. Only one chunk of smoothed and analyzed points exists at
+    a time; with a memory mapped raw frame, only one chunk of raw points is read at a time as well.
+
+    :param raw_frame: The raw track points of the segment.
+    :param chunk_size: Number of raw points analyzed at once.
+    :param smoothing_kernel: The kernel used to smooth the track, see `track_smoothing.SMOOTHING_KERNELS`.
+    :param smoothing_window: The window size of the smoothing kernel.
+    :param keep_analyzed_points: Whether to return the analyzed points, otherwise only their statistics are kept.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The analyzed track points (empty unless kept), the rest points and the statistics of the segment.
+    """
+    online_analyzer = OnlineTrackAnalyzer(smoothing_kernel, smoothing_window, geodesic_mode)
+    analyzed_frames = []
+    statistics_list = []
+    rest_point_list = []
+    for start in range(0, len(raw_frame), chunk_size):
+        chunk = raw_frame.slice(start, start + chunk_size)
+        rest_point_list += online_analyzer.push_many(chunk.lat, chunk.lon, chunk.elev, chunk.time)
+        analyzed_chunk = online_analyzer.get_last_analyzed_frame()
+        statistics_list.append(TrackStatistics.from_track_frame(analyzed_chunk))
+        if keep_analyzed_points and len(analyzed_chunk):
+            analyzed_frames.append(analyzed_chunk)
+    rest_point_list += online_analyzer.close()
+
+    analyzed_frame = TrackFrame.concat(analyzed_frames) if analyzed_frames else analyze_track_frame(_empty_track_frame())
+    return analyzed_frame, rest_point_list, TrackStatistics.combine(statistics_list)
+
+
 class TrackAnalyzer:
     """
     The TrackAnalyzer class is responsible for analyzing raw track data. It smooths the track data, performs analysis,
     and identifies rest points.
 
+    Every segment of the track (see `RawTrackObject.get_segment_list`) is analyzed on its own, so the gap between
+    two segments is neither smoothed over nor taken as a movement or a rest. With `segment_workers`, several
+    segments are analyzed in parallel on a thread pool. The analyzed track object holds the analyzed points of all segments in order, with
+    its segment list marking the points of every segment.
+
     :param input_raw_track_object: The raw track data to be analyzed.
+    :param smoothing_kernel: The kernel used to smooth the track, see `track_smoothing.SMOOTHING_KERNELS`.
+    :param smoothing_window: The window size of the smoothing kernel.
+    :param rest_point_engine: The engine used to find the rest points, see `REST_POINT_ENGINES`.
+    :param segment_workers: Number of threads analyzing the segments, 1 by default. Threads only pay off for many
+        long segments with the 'rle' engine, whose numpy work releases the GIL; the 'state_machine' engine is
+        pure Python and gains nothing. The profiling spans of segments analyzed on worker threads are not
+        recorded, see `profiling.span`.
+    :param chunk_size: Analyze every segment in chunks of this many raw points, see
+        `analyze_segment_frame_chunked`, so the smoothed and analyzed intermediates are bounded by the chunk size
+        instead of the track length. The chunked mode finds the rest points with the 'rle' engine, so it
+        cannot be combined with the 'state_machine' engine.
+    :param keep_analyzed_points: In the chunked mode, whether the analyzed track object keeps the analyzed points.
+        Without them, only the rest points, waypoints and track statistics stay resident.
+    :param partition_workers: Analyze every segment in partitions over this many worker processes, see
+        `partitioned_analysis.analyze_segment_frame_partitioned`. The segments are then analyzed one after the
+        other and the rest points found with the 'rle' engine, so it cannot be combined with the 'state_machine'
+        engine.
+    :param partition_size: Number of analyzed points per partition, see `partition_workers`.
+    :param geodesic_mode: The distance computation of the displacements, speeds and rest points, see
+        `geodesy.GEODESIC_MODES`.
+    :param turn_look_back_distance: The distance along the track over which the heading change at every analyzed
+        point is measured, see `turn_detection.find_great_turns`. The great turns of every segment are set on the
+        analyzed track object; without kept analyzed points there are none.
+    :param turn_angle: The smallest heading change of a great turn in degrees.
     """
 
-    def __init__(self, input_raw_track_object):
+    def __init__(
+            self,
+            input_raw_track_object,
+            smoothing_kernel: str = 'box',
+            smoothing_window: int = 5,
+            rest_point_engine: str = 'rle',
+            segment_workers: int = 1,
+            chunk_size: Optional[int] = None,
+            keep_analyzed_points: bool = True,
+            partition_workers: Optional[int] = None,
+            partition_size: Optional[int] = None,
+            geodesic_mode: str = DEFAULT_GEODESIC_MODE,
+            turn_look_back_distance: float = DEFAULT_TURN_LOOK_BACK_DISTANCE,
+            turn_angle: float = DEFAULT_TURN_ANGLE
+    ):
         """
         Initializes the TrackAnalyzer object with the input raw track data.
 
         :param input_raw_track_object: The raw track data to be analyzed.
         :type input_raw_track_object: RawTrackObject
+        :param smoothing_kernel: The kernel used to smooth the track. Default is 'box'.
+        :type smoothing_kernel: str
+        :param smoothing_window: The window size of the smoothing kernel. Default is 5.
+        :type smoothing_window: int
+        :param rest_point_engine: The engine used to find the rest points, 'rle' (default) or 'state_machine'.
+        :type rest_point_engine: str
+        :param segment_workers: Number of threads analyzing the segments. Default is 1, no threads.
+        :type segment_workers: int
+        :param chunk_size: Number of raw points analyzed at once. Default is None, analyzing every segment at once.
+        :type chunk_size: Optional[int]
+        :param keep_analyzed_points: Whether to keep the analyzed points in the chunked mode. Default is True.
+        :type keep_analyzed_points: bool
+        :param partition_workers: Number of processes analyzing every segment. Default is None, no processes.
+        :type partition_workers: Optional[int]
+        :param partition_size: Number of analyzed points per partition. Default is an even split over the processes.
+        :type partition_size: Optional[int]
+        :param geodesic_mode: The distance computation. Default is 'legacy'.
+        :type geodesic_mode: str
+        :param turn_look_back_distance: The look-back distance of the great turns in meters. Default is 20.
+        :type turn_look_back_distance: float
+        :param turn_angle: The smallest heading change of a great turn in degrees. Default is 60.
+        :type turn_angle: float
         """
         if not input_raw_track_object.get_main_tracks().get_main_tracks_points_list():
             raise ValueError("Input track object is empty.")
 
-        input_raw_track_point_list = input_raw_track_object.get_main_tracks().get_main_tracks_points_list()
-        smooth_track_list = smoothing_tracks(input_raw_track_point_list)
+        if rest_point_engine not in REST_POINT_ENGINES:
+            raise ValueError(
+                f"Invalid rest point engine: {rest_point_engine}. Supported engines are {', '.join(REST_POINT_ENGINES)}."
+            )
 
-        self._analyzed_tracks_object = do_analyzing(smooth_track_list)
+        check_geodesic_mode(geodesic_mode)
+        # Validates the look-back distance and the angle
+        find_great_turns(_empty_track_frame(), turn_look_back_distance, turn_angle, geodesic_mode=geodesic_mode)
+        self._geodesic_mode = geodesic_mode
+
+        if segment_workers < 1:
+            raise ValueError(f"Invalid number of segment workers {segment_workers}. Must be at least 1.")
+
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"Invalid chunk size {chunk_size}. Must be at least 1.")
+
+        if chunk_size is not None and rest_point_engine != 'rle':
+            raise ValueError("The chunked analysis finds the rest points with the 'rle' engine only.")
+
+        if partition_workers is not None and rest_point_engine != 'rle':
+            raise ValueError("The partitioned analysis finds the rest points with the 'rle' engine only.")
+
+        if partition_workers is not None and chunk_size is not None:
+            raise ValueError("The chunked and the partitioned analysis cannot be combined.")
+
+        with span('track_frame'):
+            segment_list = input_raw_track_object.get_segment_list()
+            segment_frames = input_raw_track_object.get_segment_track_frames()
+
+        def analyze(raw_frame: TrackFrame) -> Tuple[TrackFrame, List[RestTrkPoint], Optional[TrackStatistics]]:
+            if chunk_size is not None:
+                return analyze_segment_frame_chunked(
+                    raw_frame, chunk_size, smoothing_kernel, smoothing_window, keep_analyzed_points, geodesic_mode
+                )
+            if partition_workers is not None:
+                from src.geoanalyzer.tracks.partitioned_analysis import analyze_segment_frame_partitioned
+                return (*analyze_segment_frame_partitioned(
+                    raw_frame, partition_workers, smoothing_kernel, smoothing_window, partition_size, geodesic_mode
+                ), None)
+            analyzed_frame, rest_point_list = analyze_segment_frame(
+                raw_frame, smoothing_kernel, smoothing_window, rest_point_engine, geodesic_mode
+            )
+            return analyzed_frame, rest_point_list, None
+
+        # The partitioned analysis runs its own worker processes for every segment
+        workers = 1 if partition_workers is not None else min(segment_workers, len(segment_frames))
+        if workers <= 1:
+            results = [analyze(raw_frame) for raw_frame in segment_frames]
+        else:
+            with span('segments'), ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(analyze, segment_frames))
+
+        analyzed_frames = [analyzed_frame for analyzed_frame, _, _ in results]
+        self._analyzed_tracks_object = AnalyzedTrackObject()
+        # The cumulative distances are summed once over all segments, for the distance queries of the track
+        self._analyzed_tracks_object.set_track_frame(add_cumulative_distances(TrackFrame.concat(analyzed_frames)))
+        analyzed_segment_list = relayout_segments(segment_list, [len(analyzed_frame) for analyzed_frame in analyzed_frames])
+        self._analyzed_tracks_object.set_segment_list(analyzed_segment_list)
         self._analyzed_tracks_object.set_waypoint_list(input_raw_track_object.get_waypoint_list())
+        analyzed_tracks = self._analyzed_tracks_object.get_main_tracks()
+        self._analyzed_tracks_object.set_every_hour_first_point_list(
+            [analyzed_tracks.get_track_point(int(i)) for i in analyzed_tracks.get_time_index().find_period_first_indices()]
+        )
         self._analyzed_tracks_object.set_rest_point_list(
-            find_rest_point(self._analyzed_tracks_object.get_main_tracks().get_main_tracks_points_list())
+            [rest_point for _, rest_point_list, _ in results for rest_point in rest_point_list]
         )
+        with span('great_turns'):
+            great_turns = [
+                great_turn._replace(
+                    before_index=great_turn.before_index + segment.start,
+                    point_index=great_turn.point_index + segment.start,
+                    after_index=great_turn.after_index + segment.start,
+                )
+                for segment, analyzed_frame in zip(analyzed_segment_list, analyzed_frames)
+                for great_turn in find_great_turns(
+                    analyzed_frame, turn_look_back_distance, turn_angle, geodesic_mode=geodesic_mode
+                )
+            ]
+            set_great_turns(self._analyzed_tracks_object, great_turns, geodesic_mode)
+        if chunk_size is not None:
+            self._analyzed_tracks_object.set_track_statistics(
+                TrackStatistics.combine([cast(TrackStatistics, statistics) for _, _, statistics in results])
+            )
+
+    @classmethod
+    def from_analyzed_track_object(
+            cls, analyzed_track_object: AnalyzedTrackObject, geodesic_mode: str = DEFAULT_GEODESIC_MODE
+    ) -> 'TrackAnalyzer':
+        """
+        Create a TrackAnalyzer holding an already analyzed track object, e.g. one loaded from the track cache.
+
+        :param analyzed_track_object: The analyzed track object.
+        :type analyzed_track_object: AnalyzedTrackObject
+        :param geodesic_mode: The distance computation the track was analyzed with.
+        :type geodesic_mode: str
+        :return: The TrackAnalyzer.
+        :rtype: TrackAnalyzer
+        """
+        track_analyzer = cls.__new__(cls)
+        track_analyzer._analyzed_tracks_object = analyzed_track_object
+        track_analyzer._geodesic_mode = geodesic_mode
+        return track_analyzer
+
+    def get_analyzed_track_object(self) -> AnalyzedTrackObject:
+        """
+        Returns the analyzed track object.
+
+        :return: The analyzed track object.
+        :rtype: AnalyzedTrackObject
+        """
+        return self._analyzed_tracks_object
 
     def get_main_track(self):
         """
@@ -393,3 +685,182 @@ class TrackAnalyzer:
         :rtype: List[RestTrkPoint]
         """
         return self._analyzed_tracks_object.get_rest_point_list()
+
+    def get_geodesic_mode(self) -> str:
+        return self._geodesic_mode
+
+    def get_great_turn_list(self):
+        """
+        Returns the great turns of the analyzed track, see `turn_detection.GreatTurn`.
+
+        :return: The great turns in track order.
+        :rtype: List[GreatTurn]
+        """
+        return self._analyzed_tracks_object.get_great_turn_list()
+
+    def get_track_statistics(self) -> TrackStatistics:
+        """
+        Returns the statistics of the analyzed track, see `TrackStatistics`.
+
+        :return: The track statistics.
+        :rtype: TrackStatistics
+        """
+        return self._analyzed_tracks_object.get_track_statistics()
+
+
+class OnlineTrackAnalyzer:
+    """
+    Incremental analyzer of a track which is still being recorded, fed one point or one batch of points at a time.
+
+    It applies the same smoothing, central differences and rest point rules as TrackAnalyzer, but keeps only the
+    state needed for the next points: the last `smoothing_window - 1` raw points, the last 2 smoothed points, the
+    rest candidate or seed of a `rest_point_engine.RestRunScanner`, and the last rest point, which may still be
+    extended by the 120 s merge rule. Every point costs constant work and the memory does not grow with the track.
+
+    A rest point is returned as soon as it is final: when its seed has been left and no later rest can start
+    within 120 s of its end, see `rest_point_engine.is_rest_merge_gap`. For the points of a segment, pushed in
+    order and in any batches, the analyzed points and the rest points equal those of `analyze_segment_frame`, except for the kernels whose
+    sums depend on the surrounding points (box windows above 16, gaussian and savgol), which agree to round-off.
+
+    :param smoothing_kernel: The kernel used to smooth the track, see `track_smoothing.SMOOTHING_KERNELS`.
+    :param smoothing_window: The window size of the smoothing kernel.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :raises ValueError: If the kernel, window or geodesic mode is not supported.
+    """
+
+    def __init__(
+            self, smoothing_kernel: str = 'box', smoothing_window: int = 5, geodesic_mode: str = DEFAULT_GEODESIC_MODE
+    ):
+        # Validates the kernel and the window
+        smooth_values(np.empty(0), smoothing_kernel, smoothing_window)
+        check_geodesic_mode(geodesic_mode)
+        self._smoothing_kernel = smoothing_kernel
+        self._smoothing_window = smoothing_window
+        self._geodesic_mode = geodesic_mode
+
+        self._point_count = 0
+        self._analyzed_point_count = 0
+        self._last_analyzed_frame = _empty_track_frame()
+        self._start_segment_state()
+
+    def _start_segment_state(self) -> None:
+        self._raw_tail = _empty_track_frame()
+        self._smoothed_tail = _empty_track_frame()
+        self._scanner = RestRunScanner(geodesic_mode=self._geodesic_mode)
+        self._pending_rest: Optional[RestTrkPoint] = None
+        self._pending_end_time = 0
+        self._last_time: Optional[int] = None
+
+    def get_point_count(self) -> int:
+        return self._point_count
+
+    def get_analyzed_point_count(self) -> int:
+        return self._analyzed_point_count
+
+    def get_last_analyzed_frame(self) -> TrackFrame:
+        """
+        Return the analyzed points produced by the last push, see `analyze_track_frame`.
+        """
+        return self._last_analyzed_frame
+
+    def push(self, point: RawTrkPoint) -> List[RestTrkPoint]:
+        """
+        Analyze the next point of the track.
+
+        :param point: The raw track point.
+        :return: The rest points which became final with this point.
+        """
+        return self.push_many([point.lat], [point.lon], [point.elev], np.array([point.time], dtype=TIME_DTYPE))
+
+    def push_many(self, lat: Any, lon: Any, elev: Any, time: Any) -> List[RestTrkPoint]:
+        """
+        Analyze the next points of the track, given as columns like the arguments of TrackFrame.
+
+        :param lat: The latitudes.
+        :param lon: The longitudes.
+        :param elev: The elevations.
+        :param time: The local times as datetime64 or int64 microseconds since epoch.
+        :return: The rest points which became final with these points.
+        """
+        new_frame = TrackFrame(
+            np.asarray(lat, dtype=np.float64),
+            np.asarray(lon, dtype=np.float64),
+            np.asarray(elev, dtype=np.float64),
+            time
+        )
+        self._point_count += len(new_frame)
+
+        raw_frame = TrackFrame.concat([self._raw_tail, new_frame])
+        smoothed_frame = TrackFrame.concat([
+            self._smoothed_tail, smooth_track_frame(raw_frame, self._smoothing_kernel, self._smoothing_window)
+        ])
+        analyzed_frame = analyze_track_frame(smoothed_frame, self._geodesic_mode)
+
+        # Copies of the tails, so the state does not keep the arrays of the pushed points alive
+        self._raw_tail = _take_tail(raw_frame, self._smoothing_window - 1)
+        self._smoothed_tail = _take_tail(smoothed_frame, 2)
+
+        self._last_analyzed_frame = analyzed_frame
+        self._analyzed_point_count += len(analyzed_frame)
+        if len(analyzed_frame):
+            self._scanner.feed(analyzed_frame)
+            self._last_time = int(analyzed_frame.get_epoch_time()[-1])
+        return self._collect_rest_points(final=False)
+
+    def start_segment(self) -> List[RestTrkPoint]:
+        """
+        Start a new track segment: the next points are neither smoothed with nor compared to the previous ones,
+        like TrackAnalyzer analyzes every segment on its own. A seed not left yet is dropped.
+
+        :return: The last rest point of the previous segment, if any.
+        """
+        rest_point_list = self.close()
+        self._start_segment_state()
+        return rest_point_list
+
+    def close(self) -> List[RestTrkPoint]:
+        """
+        End the track, returning the last rest point which waited for the merge rule, if any.
+        A seed not left yet is not a rest point, like for the batch engines.
+        """
+        return self._collect_rest_points(final=True)
+
+    def _collect_rest_points(self, final: bool) -> List[RestTrkPoint]:
+        """
+        Apply the 120 s merge rule of `merge_rest_events` to the newly closed rests, returning the rest points
+        no later rest can be merged into.
+        """
+        rest_point_list: List[RestTrkPoint] = []
+        for closed_rest in self._scanner.pop_closed_rests():
+            if self._pending_rest is not None and is_rest_merge_gap(closed_rest.start_time - self._pending_end_time):
+                self._pending_rest.update_end_time(epoch_us_to_datetime(closed_rest.end_time))
+            else:
+                if self._pending_rest is not None:
+                    rest_point_list.append(self._pending_rest)
+                start_time = epoch_us_to_datetime(closed_rest.start_time)
+                self._pending_rest = RestTrkPoint(
+                    start_time, closed_rest.lat, closed_rest.lon, closed_rest.elev, start_time,
+                    epoch_us_to_datetime(closed_rest.end_time)
+                )
+            self._pending_end_time = closed_rest.end_time
+
+        if self._pending_rest is not None:
+            # The next closed rest starts at the open candidate or seed, or at a point after the last one
+            next_start_time = self._scanner.get_open_start_time()
+            if next_start_time is None:
+                next_start_time = self._last_time
+            if final or (
+                    next_start_time is not None and
+                    next_start_time - self._pending_end_time >= REST_MERGE_GAP * 1_000_000
+            ):
+                rest_point_list.append(self._pending_rest)
+                self._pending_rest = None
+        return rest_point_list
+
+
+def _empty_track_frame() -> TrackFrame:
+    return TrackFrame(np.empty(0), np.empty(0), np.empty(0), np.empty(0, dtype=TIME_DTYPE))
+
+
+def _take_tail(frame: TrackFrame, size: int) -> TrackFrame:
+    return frame.take(np.arange(max(len(frame) - size, 0), len(frame)))
@@ -0,0 +1,401 @@
+"""
+Content-addressed on-disk cache of parsed and analyzed tracks.
+
+An entry is keyed by the SHA-256 hash of the GPX file content together with the analyzer parameters, so a
+renamed or copied file still hits the cache and a changed file or changed parameters never do. An entry is
+a numpy `.npz` file holding the parsed track columns, the analyzed track columns (smoothed track, deltas and
+speeds), the track segments of both, the rest points, the great turns and the waypoints. A cached track is loaded without
+parsing or analyzing anything.
+
+The cache directory is bounded in size: after every write the least recently used entries are removed until
+the total size is below the limit. Reading an entry marks it as used by updating its modification time.
+"""
+
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint
+from src.geo_objects.geo_points.raw_geo_points import WayPoint
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
+from src.geo_objects.geo_tracks.track_frame import TIME_DTYPE, TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+from src.geoanalyzer.tracks.gps_parser import GpxParser, GpxPointFilter
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
+from src.geoanalyzer.tracks.track_file import TrackFileReader, is_track_file
+from src.geoanalyzer.tracks.turn_detection import GreatTurn, set_great_turns
+from src.instrumentation.profiling import span
+
+# Bump when the content of the cache entries changes, older entries are then never hit
+CACHE_FORMAT_VERSION = 6
+
+DEFAULT_CACHE_SIZE_LIMIT = 1 << 30  # bytes
+
+_ENTRY_SUFFIX = '.npz'
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(file_path: str, member: Optional[str] = None) -> str:
+    """
+    Return the SHA-256 hex digest of the file content, or of the content of a member of a zip archive.
+    """
+    digest = hashlib.sha256()
+    with contextlib.ExitStack() as stack:
+        f: IO[bytes]
+        if member is None:
+            f = stack.enter_context(open(file_path, 'rb'))
+        else:
+            f = stack.enter_context(stack.enter_context(zipfile.ZipFile(file_path)).open(member))
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash: str, analyzer_params: Dict[str, Any]) -> str:
+    """
+    Combine the content hash and the analyzer parameters into the key of a cache entry.
+
+    :param content_hash: Hash of the GPX file content, see `hash_file`.
+    :param analyzer_params: The keyword arguments of TrackAnalyzer, must be JSON serializable.
+    :return: The cache key.
+    """
+    params = json.dumps({'format': CACHE_FORMAT_VERSION, **analyzer_params}, sort_keys=True)
+    return f"{content_hash}-{hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]}"
+
+
+# ================================= #
+# Conversion to and from the arrays #
+# ================================= #
+def _datetimes_to_array(values: List[Any]) -> NDArray[np.int64]:
+    return np.array(values, dtype=TIME_DTYPE).view(np.int64)
+
+
+def _array_to_datetimes(values: NDArray[np.int64]) -> List[Any]:
+    return [None if np.isnat(t) else t.item() for t in values.view(TIME_DTYPE)]
+
+
+def _frame_to_arrays(prefix: str, frame: TrackFrame) -> Dict[str, NDArray[Any]]:
+    arrays = {f'{prefix}.{name}': frame.get_column(name) for name in frame.get_column_names()}
+    arrays[f'{prefix}.time'] = frame.get_epoch_time()
+    return arrays
+
+
+def _frame_from_arrays(prefix: str, arrays: Dict[str, NDArray[Any]]) -> TrackFrame:
+    columns = {name[len(prefix) + 1:]: values for name, values in arrays.items() if name.startswith(prefix + '.')}
+    return TrackFrame(**columns)
+
+
+def _segments_to_arrays(prefix: str, segments: List[TrackSegment]) -> Dict[str, NDArray[Any]]:
+    return {
+        f'{prefix}_segment.bounds': np.array(
+            [(s.track_index, s.segment_index, s.start, s.stop) for s in segments], dtype=np.int64
+        ).reshape(-1, 4),
+        f'{prefix}_segment.track_name': np.array([s.track_name or '' for s in segments], dtype=np.str_),
+        f'{prefix}_segment.has_track_name': np.array([s.track_name is not None for s in segments], dtype=np.bool_),
+    }
+
+
+def _segments_from_arrays(prefix: str, arrays: Dict[str, NDArray[Any]]) -> List[TrackSegment]:
+    return [
+        TrackSegment(track_index, segment_index, start, stop, track_name if has_track_name else None)
+        for (track_index, segment_index, start, stop), track_name, has_track_name in zip(
+            arrays[f'{prefix}_segment.bounds'].tolist(),
+            arrays[f'{prefix}_segment.track_name'].tolist(),
+            arrays[f'{prefix}_segment.has_track_name'].tolist(),
+        )
+    ]
+
+
+def _rest_points_to_arrays(rest_points: List[RestTrkPoint]) -> Dict[str, NDArray[Any]]:
+    return {
+        'rest.time': _datetimes_to_array([p.time for p in rest_points]),
+        'rest.lat': np.array([p.lat for p in rest_points], dtype=np.float64),
+        'rest.lon': np.array([p.lon for p in rest_points], dtype=np.float64),
+        'rest.elev': np.array([p.elev for p in rest_points], dtype=np.float64),
+        'rest.start_time': _datetimes_to_array([p.get_start_time() for p in rest_points]),
+        'rest.end_time': _datetimes_to_array([p.get_end_time() for p in rest_points]),
+    }
+
+
+def _rest_points_from_arrays(arrays: Dict[str, NDArray[Any]]) -> List[RestTrkPoint]:
+    return [
+        RestTrkPoint(time, lat, lon, elev, start_time, end_time)
+        for time, lat, lon, elev, start_time, end_time in zip(
+            _array_to_datetimes(arrays['rest.time']),
+            arrays['rest.lat'].tolist(),
+            arrays['rest.lon'].tolist(),
+            arrays['rest.elev'].tolist(),
+            _array_to_datetimes(arrays['rest.start_time']),
+            _array_to_datetimes(arrays['rest.end_time']),
+        )
+    ]
+
+
+def _great_turns_to_arrays(great_turns: List[GreatTurn]) -> Dict[str, NDArray[Any]]:
+    return {
+        'turn.indices': np.array(
+            [(t.before_index, t.point_index, t.after_index) for t in great_turns], dtype=np.int64
+        ).reshape(-1, 3),
+        'turn.heading_change': np.array([t.heading_change for t in great_turns], dtype=np.float64),
+        'turn.is_switchback': np.array([t.is_switchback for t in great_turns], dtype=np.bool_),
+    }
+
+
+def _great_turns_from_arrays(arrays: Dict[str, NDArray[Any]]) -> List[GreatTurn]:
+    return [
+        GreatTurn(before_index, index, after_index, heading_change, is_switchback)
+        for (before_index, index, after_index), heading_change, is_switchback in zip(
+            arrays['turn.indices'].tolist(),
+            arrays['turn.heading_change'].tolist(),
+            arrays['turn.is_switchback'].tolist(),
+        )
+    ]
+
+
+def _waypoints_to_arrays(waypoints: List[WayPoint]) -> Dict[str, NDArray[Any]]:
+    return {
+        'waypoint.time': _datetimes_to_array([p.time for p in waypoints]),
+        'waypoint.lat': np.array([np.nan if p.lat is None else p.lat for p in waypoints], dtype=np.float64),
+        'waypoint.lon': np.array([np.nan if p.lon is None else p.lon for p in waypoints], dtype=np.float64),
+        'waypoint.elev': np.array([np.nan if p.elev is None else p.elev for p in waypoints], dtype=np.float64),
+        'waypoint.note': np.array([p.get_note() or '' for p in waypoints], dtype=np.str_),
+        'waypoint.has_note': np.array([p.get_note() is not None for p in waypoints], dtype=np.bool_),
+    }
+
+
+def _waypoints_from_arrays(arrays: Dict[str, NDArray[Any]]) -> List[WayPoint]:
+    def optional(value: float) -> Optional[float]:
+        return None if np.isnan(value) else value
+
+    return [
+        WayPoint(time, optional(lat), optional(lon), optional(elev), note if has_note else None)
+        for time, lat, lon, elev, note, has_note in zip(
+            _array_to_datetimes(arrays['waypoint.time']),
+            arrays['waypoint.lat'].tolist(),
+            arrays['waypoint.lon'].tolist(),
+            arrays['waypoint.elev'].tolist(),
+            arrays['waypoint.note'].tolist(),
+            arrays['waypoint.has_note'].tolist(),
+        )
+    ]
+
+
+class CachedTrack:
+    """
+    The content of a cache entry: the parsed raw track object and the analysis result.
+
+    :param raw_track_object: The parsed track, with its waypoints.
+    :param track_analyzer: The analysis result of the track.
+    """
+
+    def __init__(self, raw_track_object: RawTrackObject, track_analyzer: TrackAnalyzer):
+        self.raw_track_object = raw_track_object
+        self.track_analyzer = track_analyzer
+
+    def to_arrays(self) -> Dict[str, NDArray[Any]]:
+        analyzed_track_object = self.track_analyzer.get_analyzed_track_object()
+        return {
+            **_frame_to_arrays('raw', self.raw_track_object.get_track_frame()),
+            **_frame_to_arrays('analyzed', analyzed_track_object.get_track_frame()),
+            **_segments_to_arrays('raw', self.raw_track_object.get_segment_list()),
+            **_segments_to_arrays('analyzed', analyzed_track_object.get_segment_list()),
+            **_rest_points_to_arrays(analyzed_track_object.get_rest_point_list()),
+            **_great_turns_to_arrays(analyzed_track_object.get_great_turn_list()),
+            **_waypoints_to_arrays(self.raw_track_object.get_waypoint_list()),
+            'analysis.geodesic_mode': np.array(self.track_analyzer.get_geodesic_mode(), dtype=np.str_),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, NDArray[Any]]) -> 'CachedTrack':
+        waypoints = _waypoints_from_arrays(arrays)
+
+        raw_track_object = RawTrackObject()
+        raw_track_object.set_track_frame(_frame_from_arrays('raw', arrays))
+        raw_track_object.set_segment_list(_segments_from_arrays('raw', arrays))
+        for waypoint in waypoints:
+            raw_track_object.add_way_point(waypoint)
+
+        analyzed_track_object = AnalyzedTrackObject()
+        analyzed_track_object.set_track_frame(_frame_from_arrays('analyzed', arrays))
+        analyzed_track_object.set_segment_list(_segments_from_arrays('analyzed', arrays))
+        analyzed_track_object.set_waypoint_list(waypoints)
+        analyzed_track_object.set_rest_point_list(_rest_points_from_arrays(arrays))
+        analyzed_tracks = analyzed_track_object.get_main_tracks()
+        analyzed_track_object.set_every_hour_first_point_list(
+            [analyzed_tracks.get_track_point(int(i)) for i in analyzed_tracks.get_time_index().find_period_first_indices()]
+        )
+        geodesic_mode = str(arrays['analysis.geodesic_mode'])
+        set_great_turns(analyzed_track_object, _great_turns_from_arrays(arrays), geodesic_mode)
+
+        return cls(raw_track_object, TrackAnalyzer.from_analyzed_track_object(analyzed_track_object, geodesic_mode))
+
+
+class TrackCache:
+    """
+    Size bounded cache directory of CachedTracks.
+
+    :param cache_dir: The cache directory, created if missing.
+    :param size_limit: Maximum total size of the cache entries in bytes.
+    :raises ValueError: If the size limit is negative.
+    """
+
+    def __init__(self, cache_dir: str, size_limit: int = DEFAULT_CACHE_SIZE_LIMIT):
+        if size_limit < 0:
+            raise ValueError(f"Invalid cache size limit {size_limit}. Must not be negative.")
+        self._cache_dir = cache_dir
+        self._size_limit = size_limit
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_cache_dir(self) -> str:
+        return self._cache_dir
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[CachedTrack]:
+        """
+        Load the entry of the key and mark it as recently used.
+
+        :param key: The cache key, see `make_cache_key`.
+        :return: The cached track, or None if there is no usable entry.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with np.load(entry_path, allow_pickle=False) as entry:
+                cached_track = CachedTrack.from_arrays({name: entry[name] for name in entry.files})
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            # A damaged or incompatible entry is dropped and treated as a miss
+            self._remove(entry_path)
+            return None
+        return cached_track
+
+    def put(self, key: str, cached_track: CachedTrack) -> None:
+        """
+        Store the entry of the key, then evict the least recently used entries above the size limit.
+        The entry is written to a temporary file first, so readers never see a partial entry.
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as f:
+                np.savez(f, **cached_track.to_arrays())
+            os.replace(temporary_path, self._entry_path(key))
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+        self.evict()
+
+    def get_entries(self) -> List[Tuple[str, int, float]]:
+        """
+        Return the (path, size, last use time) of every entry, least recently used first.
+        """
+        entries = []
+        with os.scandir(self._cache_dir) as scanned:
+            for dir_entry in scanned:
+                if not dir_entry.name.endswith(_ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((dir_entry.path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def get_total_size(self) -> int:
+        return sum(size for _, size, _ in self.get_entries())
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the total size is within the size limit.
+
+        :return: The number of removed entries.
+        """
+        entries = self.get_entries()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total_size <= self._size_limit:
+                break
+            self._remove(path)
+            total_size -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path, _, _ in self.get_entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_track_analyzer(
+        gpx_file: str,
+        cache: Optional[TrackCache] = None,
+        member: Optional[str] = None,
+        time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        **analyzer_params
+) -> Tuple[TrackAnalyzer, bool]:
+    """
+    Return the analysis of the GPX file from the cache, or parse and analyze it and store it in the cache.
+
+    :param gpx_file: Path to the GPX file, which may be compressed or a zip archive, or to a track file
+        (see `track_file`), which is memory mapped instead of parsed.
+    :param cache: The cache, without a cache the file is always parsed and analyzed.
+    :param member: The name of the GPX file in a zip archive, see `gps_parser.open_gpx`.
+    :param time_range: Keep only the points in this local time window, see `gps_parser.GpxPointFilter`.
+    :param bbox: Keep only the points in this (min lat, min lon, max lat, max lon) bounding box.
+    :param analyzer_params: Keyword arguments of TrackAnalyzer, part of the cache key.
+    :return: The track analyzer and whether it was loaded from the cache.
+    :raises ValueError: If the time range or bounding box is invalid, or no track point passes the filter.
+    """
+    point_filter = None if time_range is None and bbox is None else GpxPointFilter(time_range, bbox)
+
+    if cache is not None:
+        with span('cache_lookup'):
+            key_params = dict(analyzer_params)
+            if point_filter is not None:
+                key_params['point_filter'] = {
+                    'time_range': None if time_range is None else [t and t.isoformat() for t in time_range],
+                    'bbox': None if bbox is None else list(bbox),
+                }
+            key = make_cache_key(hash_file(gpx_file, member), key_params)
+            cached_track = cache.get(key)
+        if cached_track is not None:
+            return cached_track.track_analyzer, True
+
+    with span('parse_gpx'):
+        if is_track_file(gpx_file):
+            if member is not None:
+                raise ValueError(f"{gpx_file} is a track file, it has no member {member}.")
+            raw_track_object = TrackFileReader(gpx_file).get_raw_track_object()
+            if point_filter is not None:
+                raw_track_object = point_filter.apply(raw_track_object)
+        else:
+            raw_track_object = GpxParser(gpx_file, member=member, time_range=time_range, bbox=bbox).get_raw_track_object()
+    if point_filter is not None and not raw_track_object.get_main_tracks().get_main_tracks_points_list():
+        raise ValueError(f"No track point of {gpx_file} lies in the time range and bounding box.")
+
+    with span('analyze'):
+        track_analyzer = TrackAnalyzer(raw_track_object, **analyzer_params)
+
+    if cache is not None:
+        with span('cache_store'):
+            cache.put(key, CachedTrack(raw_track_object, track_analyzer))
+    return track_analyzer, False
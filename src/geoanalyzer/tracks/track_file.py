@@ -0,0 +1,288 @@
+"""
+Native binary track file, reloaded by memory mapping instead of parsing.
+
+A track file starts with a fixed header holding the schema version, the point count, the bounding box and
+the time range of the track, followed by a column table naming every column block. The column blocks hold
+the lat, lon, elev (float64) and time (int64 microseconds since epoch, NaT for missing time) columns of the
+track, plus any additional float64 columns, as contiguous little-endian arrays aligned to 64 bytes. The
+waypoints and the track segments follow as a small JSON metadata block.
+
+Opening a track file maps it with `numpy.memmap` and wraps the column blocks in a TrackFrame without
+copying, so loading a track of millions of points costs no more than mapping the file. The mapping is
+read-only: the columns are only read from disk as they are used.
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_points.raw_geo_points import WayPoint
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
+from src.geo_objects.geo_tracks.track_frame import TIME_DTYPE, TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+
+TRACK_FILE_SUFFIX = '.gtrk'
+TRACK_FILE_MAGIC = b'GEOTRK\x00\x00'
+
+# Bump when the layout changes, files of other schema versions are rejected
+TRACK_FILE_SCHEMA_VERSION = 2
+
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('schema_version', '<u4'),
+    ('column_count', '<u4'),
+    ('point_count', '<u8'),
+    ('min_lat', '<f8'),
+    ('min_lon', '<f8'),
+    ('max_lat', '<f8'),
+    ('max_lon', '<f8'),
+    ('start_time', '<i8'),
+    ('end_time', '<i8'),
+    ('metadata_offset', '<u8'),
+    ('metadata_size', '<u8'),
+])
+_COLUMN_ENTRY_DTYPE = np.dtype([
+    ('name', 'S32'),
+    ('dtype', 'S8'),
+    ('offset', '<u8'),
+])
+_BLOCK_ALIGNMENT = 64
+_NAT = np.iinfo(np.int64).min
+
+
+class TrackFileHeader(NamedTuple):
+    """
+    The header of a track file. `bbox` is (min lat, min lon, max lat, max lon), NaN for an empty track, and
+    `time_range` the first and last point time, None if no point has a time.
+    """
+    schema_version: int
+    point_count: int
+    bbox: Tuple[float, float, float, float]
+    time_range: Optional[Tuple[datetime.datetime, datetime.datetime]]
+    columns: List[str]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _BLOCK_ALIGNMENT) * _BLOCK_ALIGNMENT
+
+
+def _column_dtype(name: str) -> np.dtype[Any]:
+    return np.dtype('<i8') if name == 'time' else np.dtype('<f8')
+
+
+def _metadata_to_json(waypoints: List[WayPoint], segments: List[TrackSegment]) -> bytes:
+    return json.dumps({
+        'waypoints': [
+            [None if p.time is None else p.time.isoformat(), p.lat, p.lon, p.elev, p.get_note()]
+            for p in waypoints
+        ],
+        'segments': [list(segment) for segment in segments],
+    }).encode('utf-8')
+
+
+def _metadata_from_json(content: bytes) -> Tuple[List[WayPoint], List[TrackSegment]]:
+    metadata = json.loads(content.decode('utf-8'))
+    waypoints = [
+        WayPoint(None if time is None else datetime.datetime.fromisoformat(time), lat, lon, elev, note)
+        for time, lat, lon, elev, note in metadata['waypoints']
+    ]
+    return waypoints, [TrackSegment(*segment) for segment in metadata['segments']]
+
+
+def write_track_file(
+        output_file: str,
+        track: Union[RawTrackObject, TrackFrame],
+        waypoints: Optional[List[WayPoint]] = None
+) -> TrackFileHeader:
+    """
+    Write a track to a track file.
+
+    :param output_file: Path of the track file.
+    :param track: The track object, whose track points, segments and waypoints are written, or the columnar
+        track points.
+    :param waypoints: The waypoints to write, defaults to the waypoints of the track object.
+    :return: The header of the written file.
+    """
+    if isinstance(track, RawTrackObject):
+        frame = track.get_track_frame()
+        waypoints = track.get_waypoint_list() if waypoints is None else waypoints
+        segments = track.get_segment_list()
+    else:
+        frame = track
+        segments = []
+    waypoints = waypoints or []
+
+    names = frame.get_column_names()
+    columns: Dict[str, NDArray[Any]] = {
+        name: np.ascontiguousarray(
+            frame.get_epoch_time() if name == 'time' else frame.get_column(name), dtype=_column_dtype(name)
+        )
+        for name in names
+    }
+    for name in names:
+        if len(name.encode('utf-8')) > _COLUMN_ENTRY_DTYPE['name'].itemsize:
+            raise ValueError(f"Column name {name} is too long for a track file.")
+
+    offset = _aligned(_HEADER_DTYPE.itemsize + len(names) * _COLUMN_ENTRY_DTYPE.itemsize)
+    column_table = np.zeros(len(names), dtype=_COLUMN_ENTRY_DTYPE)
+    for i, name in enumerate(names):
+        column_table[i] = (name.encode('utf-8'), _column_dtype(name).str.encode('ascii'), offset)
+        offset = _aligned(offset + columns[name].nbytes)
+    metadata_json = _metadata_to_json(waypoints, segments)
+
+    epoch_time = frame.get_epoch_time()
+    timed = epoch_time[~np.isnat(frame.time)]
+    empty = len(frame) == 0
+    header = np.zeros(1, dtype=_HEADER_DTYPE)
+    header[0] = (
+        TRACK_FILE_MAGIC,
+        TRACK_FILE_SCHEMA_VERSION,
+        len(names),
+        len(frame),
+        np.nan if empty else np.nanmin(frame.lat),
+        np.nan if empty else np.nanmin(frame.lon),
+        np.nan if empty else np.nanmax(frame.lat),
+        np.nan if empty else np.nanmax(frame.lon),
+        timed.min() if len(timed) else _NAT,
+        timed.max() if len(timed) else _NAT,
+        offset,
+        len(metadata_json),
+    )
+
+    with open(output_file, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(column_table.tobytes())
+        for i, name in enumerate(names):
+            f.write(b'\x00' * (int(column_table[i]['offset']) - f.tell()))
+            columns[name].tofile(f)
+        f.write(b'\x00' * (offset - f.tell()))
+        f.write(metadata_json)
+
+    return _to_track_file_header(header[0], names)
+
+
+def _to_track_file_header(header: Any, names: List[str]) -> TrackFileHeader:
+    start_time, end_time = int(header['start_time']), int(header['end_time'])
+    return TrackFileHeader(
+        schema_version=int(header['schema_version']),
+        point_count=int(header['point_count']),
+        bbox=(float(header['min_lat']), float(header['min_lon']), float(header['max_lat']), float(header['max_lon'])),
+        time_range=None if start_time == _NAT else (
+            np.int64(start_time).view(TIME_DTYPE).item(), np.int64(end_time).view(TIME_DTYPE).item()
+        ),
+        columns=names,
+    )
+
+
+def is_track_file(input_file: str) -> bool:
+    """
+    Whether the file is a track file, detected from its first bytes.
+    """
+    with open(input_file, 'rb') as f:
+        return f.read(len(TRACK_FILE_MAGIC)) == TRACK_FILE_MAGIC
+
+
+class TrackFileReader:
+    """
+    Reader of a track file, mapping its column blocks into a TrackFrame without copying.
+
+    The reader follows the interface of GpxParser, so `TrackAnalyzer(TrackFileReader(path).get_raw_track_object())`
+    analyzes the mapped columns directly.
+
+    :param track_file: Path of the track file.
+    :raises FileNotFoundError: If the track file does not exist.
+    :raises ValueError: If the file is not a track file, has another schema version or is truncated.
+    """
+
+    def __init__(self, track_file: str):
+        if not os.path.exists(track_file):
+            raise FileNotFoundError("Track file not found")
+        self._infile = track_file
+
+        file_size = os.path.getsize(track_file)
+        if file_size < _HEADER_DTYPE.itemsize:
+            raise ValueError(f"{track_file} is not a track file.")
+        mapped = np.memmap(track_file, dtype=np.uint8, mode='r')
+
+        header = mapped[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)[0]
+        if mapped[:len(TRACK_FILE_MAGIC)].tobytes() != TRACK_FILE_MAGIC:
+            raise ValueError(f"{track_file} is not a track file.")
+        if int(header['schema_version']) != TRACK_FILE_SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported track file schema version {int(header['schema_version'])} in {track_file}, "
+                f"expected {TRACK_FILE_SCHEMA_VERSION}."
+            )
+
+        point_count = int(header['point_count'])
+        table_end = _HEADER_DTYPE.itemsize + int(header['column_count']) * _COLUMN_ENTRY_DTYPE.itemsize
+        metadata_end = int(header['metadata_offset']) + int(header['metadata_size'])
+        if max(table_end, metadata_end) > file_size:
+            raise ValueError(f"Track file {track_file} is truncated.")
+        column_table = mapped[_HEADER_DTYPE.itemsize:table_end].view(_COLUMN_ENTRY_DTYPE)
+
+        columns: Dict[str, NDArray[Any]] = {}
+        for entry in column_table:
+            name = bytes(entry['name']).decode('utf-8')
+            dtype = np.dtype(bytes(entry['dtype']).decode('ascii'))
+            start = int(entry['offset'])
+            stop = start + point_count * dtype.itemsize
+            if stop > file_size:
+                raise ValueError(f"Track file {track_file} is truncated.")
+            columns[name] = mapped[start:stop].view(dtype)
+
+        self._header = _to_track_file_header(header, list(columns))
+        self._track_frame = TrackFrame(**columns)
+        self._waypoints, self._segments = _metadata_from_json(bytes(mapped[int(header['metadata_offset']):metadata_end]))
+
+    def get_header(self) -> TrackFileHeader:
+        return self._header
+
+    def get_track_frame(self) -> TrackFrame:
+        """
+        Return the track points, the columns are read-only views of the mapped file.
+        """
+        return self._track_frame
+
+    def get_waypoint_list(self) -> List[WayPoint]:
+        return self._waypoints
+
+    def get_segment_list(self) -> List[TrackSegment]:
+        return self._segments
+
+    def get_raw_track_object(self) -> RawTrackObject:
+        """
+        Return a RawTrackObject wrapping the mapped track points, with the segments and waypoints of the file.
+        """
+        raw_track_object = RawTrackObject()
+        raw_track_object.set_track_frame(self._track_frame)
+        raw_track_object.set_segment_list(self._segments)
+        for waypoint in self._waypoints:
+            raw_track_object.add_way_point(waypoint)
+        return raw_track_object
+
+
+def read_track_file_header(track_file: str) -> TrackFileHeader:
+    """
+    Read only the header of a track file, e.g. to filter tracks by their bounding box or time range.
+
+    :param track_file: Path of the track file.
+    :return: The header.
+    :raises ValueError: If the file is not a track file or has another schema version.
+    """
+    with open(track_file, 'rb') as f:
+        header = np.frombuffer(f.read(_HEADER_DTYPE.itemsize), dtype=np.uint8)
+        if len(header) < _HEADER_DTYPE.itemsize or header[:8].tobytes() != TRACK_FILE_MAGIC:
+            raise ValueError(f"{track_file} is not a track file.")
+        fields = header.view(_HEADER_DTYPE)[0]
+        if int(fields['schema_version']) != TRACK_FILE_SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported track file schema version {int(fields['schema_version'])} in {track_file}, "
+                f"expected {TRACK_FILE_SCHEMA_VERSION}."
+            )
+        table = np.frombuffer(f.read(int(fields['column_count']) * _COLUMN_ENTRY_DTYPE.itemsize),
+                              dtype=_COLUMN_ENTRY_DTYPE)
+    return _to_track_file_header(fields, [bytes(entry['name']).decode('utf-8') for entry in table])
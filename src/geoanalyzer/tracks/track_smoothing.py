@@ -0,0 +1,176 @@
+"""
+Vectorized smoothing engine for columnar tracks.
+
+Every kernel works on whole numpy arrays in "valid" mode: the output holds one value per complete window,
+i.e. `n - window + 1` values for `n` input values, and the output value `i` belongs to the input point at
+the window centre `i + window // 2`.
+
+Supported kernels:
+    - box: moving average, computed with shifted slice sums for small windows and cumulative sums otherwise.
+    - gaussian: convolution with normalised Gaussian weights.
+    - savgol: Savitzky-Golay filter, the value of a least-squares polynomial fitted to the window.
+    - median: moving median, robust against single outliers.
+"""
+
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+
+SMOOTHING_KERNELS = ('box', 'gaussian', 'savgol', 'median')
+
+# Up to this window size the box average sums shifted slices, which adds the values in the same order as
+# a plain python sum over the window. Larger windows use cumulative sums to stay O(n).
+_BOX_SLICE_SUM_MAX_WINDOW = 16
+
+# Up to this window size the moving median runs a sorting network of element-wise min/max over shifted
+# slices, block by block to stay in cache. Larger windows sort every window with numpy.median.
+_MEDIAN_NETWORK_MAX_WINDOW = 9
+_MEDIAN_NETWORK_BLOCK_SIZE = 4096
+
+
+def _validate_window(window: int) -> None:
+    if not isinstance(window, (int, np.integer)) or window < 1 or window % 2 == 0:
+        raise ValueError(f"Invalid smoothing window {window}. Must be a positive odd integer.")
+
+
+def box_average(values: NDArray[Any], window: int) -> NDArray[np.float64]:
+    """
+    Moving average over `window` values.
+
+    :param values: 1-D array of values.
+    :param window: The window size.
+    :return: The averaged values, `len(values) - window + 1` of them.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out_size = len(values) - window + 1
+    if out_size <= 0:
+        return np.empty(0, dtype=np.float64)
+
+    if window <= _BOX_SLICE_SUM_MAX_WINDOW:
+        window_sum = values[:out_size].copy()
+        for k in range(1, window):
+            window_sum += values[k:k + out_size]
+        return window_sum / window
+
+    # Subtract the first value before the cumulative sum to limit the round-off on long tracks
+    offset = values[0]
+    cumulative = np.concatenate(([0.0], np.cumsum(values - offset)))
+    return (cumulative[window:] - cumulative[:-window]) / window + offset
+
+
+def moving_median(values: NDArray[Any], window: int) -> NDArray[np.float64]:
+    """
+    Moving median over `window` values, `window` must be odd.
+
+    :param values: 1-D array of values.
+    :param window: The window size.
+    :return: The median values, `len(values) - window + 1` of them.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out_size = len(values) - window + 1
+    if out_size <= 0:
+        return np.empty(0, dtype=np.float64)
+
+    if window > _MEDIAN_NETWORK_MAX_WINDOW:
+        return np.median(sliding_window_view(values, window), axis=1)
+
+    medians = np.empty(out_size, dtype=np.float64)
+    for start in range(0, out_size, _MEDIAN_NETWORK_BLOCK_SIZE):
+        stop = min(start + _MEDIAN_NETWORK_BLOCK_SIZE, out_size)
+        rows = [values[start + k:stop + k] for k in range(window)]
+        # Odd-even transposition sort of the window rows
+        for sort_pass in range(window):
+            for i in range(sort_pass % 2, window - 1, 2):
+                rows[i], rows[i + 1] = np.minimum(rows[i], rows[i + 1]), np.maximum(rows[i], rows[i + 1])
+        medians[start:stop] = rows[window // 2]
+    return medians
+
+
+def gaussian_weights(window: int, sigma: float = 0.0) -> NDArray[np.float64]:
+    """
+    Normalised Gaussian weights for a window.
+
+    :param window: The window size.
+    :param sigma: Standard deviation in points, defaults to (window - 1) / 4.
+    :return: The weights, summing to 1.
+    """
+    if not sigma:
+        sigma = max((window - 1) / 4, 1e-6)
+    offsets = np.arange(window) - window // 2
+    weights = np.exp(-0.5 * (offsets / sigma) ** 2)
+    return weights / weights.sum()
+
+
+def savgol_weights(window: int, polyorder: int = 2) -> NDArray[np.float64]:
+    """
+    Savitzky-Golay weights evaluating the least-squares polynomial at the window centre.
+
+    :param window: The window size.
+    :param polyorder: The order of the fitted polynomial, must be less than the window size.
+    :return: The weights.
+    :raises ValueError: If the polynomial order is not less than the window size.
+    """
+    if not 0 <= polyorder < window:
+        raise ValueError(f"Invalid polyorder {polyorder}. Must be non negative and less than the window {window}.")
+    offsets = np.arange(window) - window // 2
+    vandermonde = np.vander(offsets, polyorder + 1, increasing=True)
+    return np.linalg.pinv(vandermonde)[0]
+
+
+def smooth_values(values: NDArray[Any], kernel: str = 'box', window: int = 5, **kernel_options) -> NDArray[np.float64]:
+    """
+    Smooth a 1-D array with the selected kernel.
+
+    :param values: 1-D array of values.
+    :param kernel: One of 'box', 'gaussian', 'savgol' or 'median'.
+    :param window: The window size, a positive odd integer.
+    :param kernel_options: `sigma` for the gaussian kernel, `polyorder` for the savgol kernel.
+    :return: The smoothed values, `len(values) - window + 1` of them.
+    :raises ValueError: If the kernel or window is not supported.
+    """
+    if kernel not in SMOOTHING_KERNELS:
+        raise ValueError(f"Invalid smoothing kernel: {kernel}. Supported kernels are {', '.join(SMOOTHING_KERNELS)}.")
+    _validate_window(window)
+
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return np.empty(0, dtype=np.float64)
+
+    if kernel == 'box':
+        return box_average(values, window)
+    if kernel == 'median':
+        return moving_median(values, window)
+
+    if kernel == 'gaussian':
+        weights = gaussian_weights(window, kernel_options.get('sigma', 0.0))
+    else:
+        weights = savgol_weights(window, kernel_options.get('polyorder', 2))
+    # Both kernels are symmetric, so the convolution equals the correlation with the weights
+    return np.convolve(values, weights[::-1], mode='valid')
+
+
+def smooth_track_frame(frame: TrackFrame, kernel: str = 'box', window: int = 5, **kernel_options) -> TrackFrame:
+    """
+    Smooth latitude, longitude and elevation of a track.
+
+    Every output point takes the time of the point at its window centre. The first and last `window // 2`
+    points, which have no complete window, are not part of the output.
+
+    :param frame: The track to smooth.
+    :param kernel: One of 'box', 'gaussian', 'savgol' or 'median'.
+    :param window: The window size, a positive odd integer.
+    :param kernel_options: `sigma` for the gaussian kernel, `polyorder` for the savgol kernel.
+    :return: The smoothed track.
+    """
+    smoothed_lat = smooth_values(frame.lat, kernel, window, **kernel_options)
+    half_window = window // 2
+    return TrackFrame(
+        smoothed_lat,
+        smooth_values(frame.lon, kernel, window, **kernel_options),
+        smooth_values(frame.elev, kernel, window, **kernel_options),
+        frame.time[half_window:half_window + len(smoothed_lat)],
+    )
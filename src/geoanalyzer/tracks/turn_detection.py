@@ -0,0 +1,143 @@
+"""
+Detection of the great turns of an analyzed track.
+
+The heading change at every point is the angle between the direction from the point a look-back distance
+before it to the point, and the direction from the point to the point the same distance after it. Both points
+are looked up by binary search in the cumulative distance along the track, so the heading changes of the whole
+track are computed with array operations in one pass, independent of the sampling rate of the track.
+
+A turn makes the heading change exceed the turn angle at a run of consecutive points around its apex; the point
+of the run with the largest heading change is the great turn. A turn of at least the switchback angle reverses
+the direction of the track, like the hairpin bends of a trail zigzagging up a slope. Turns are not merged by
+distance: two bends closer to each other than the look-back distance, like the two bends of an S, are two great
+turns as long as the heading change between them drops below the turn angle.
+"""
+
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.point_vector.geodesy import DEFAULT_GEODESIC_MODE, displacements, step_displacements
+from src.geo_objects.point_vector.track_point_vector import TrackPointVector
+
+DEFAULT_TURN_LOOK_BACK_DISTANCE = 20.0  # meters
+DEFAULT_TURN_ANGLE = 60.0  # degrees, smaller heading changes are no great turn
+SWITCHBACK_ANGLE = 135.0  # degrees, larger heading changes are switchbacks
+
+
+class GreatTurn(NamedTuple):
+    """
+    A great turn at the point `point_index`, coming from the point `before_index` and heading to the point `after_index`,
+    the look-back distance along the track before and after it. `heading_change` is in degrees between -180 and
+    180, positive for a turn to the left.
+    """
+    before_index: int
+    point_index: int
+    after_index: int
+    heading_change: float
+    is_switchback: bool
+
+
+def heading_changes(
+        track_frame: TrackFrame,
+        look_back_distance: float = DEFAULT_TURN_LOOK_BACK_DISTANCE,
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> Tuple[NDArray[np.intp], NDArray[np.intp], NDArray[np.float64]]:
+    """
+    Compute the heading change at every point of a track segment.
+
+    :param track_frame: The points of the track segment, e.g. the analyzed points.
+    :param look_back_distance: The distance along the track to the points before and after, in meters.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The indices of the points before and after every point, -1 where the track is shorter than the
+        look-back distance, and the heading changes in degrees, NaN where a point before or after is missing.
+    :raises ValueError: If the look-back distance is not positive.
+    """
+    if not look_back_distance > 0:
+        raise ValueError(f"Invalid look-back distance {look_back_distance}. Must be positive.")
+    step_x, step_y = step_displacements(track_frame.lat, track_frame.lon, geodesic_mode)
+    distance = np.concatenate(([0.0], np.nancumsum(np.hypot(step_x, step_y))))
+
+    # The last point at least the look-back distance before, and the first point at least as far after
+    before = np.searchsorted(distance, distance - look_back_distance, side='right') - 1
+    after = np.searchsorted(distance, distance + look_back_distance, side='left')
+    valid = (before >= 0) & (after < len(distance))
+    before = np.where(valid, before, -1)
+    after = np.where(valid, after, -1)
+
+    changes = np.full(len(distance), np.nan)
+    indices = np.flatnonzero(valid)
+    lat, lon = track_frame.lat, track_frame.lon
+    in_x, in_y = displacements(lat[before[indices]], lon[before[indices]], lat[indices], lon[indices], geodesic_mode)
+    out_x, out_y = displacements(lat[indices], lon[indices], lat[after[indices]], lon[after[indices]], geodesic_mode)
+    changes[indices] = np.degrees(np.arctan2(in_x * out_y - in_y * out_x, in_x * out_x + in_y * out_y))
+    return before, after, changes
+
+
+def find_great_turns(
+        track_frame: TrackFrame,
+        look_back_distance: float = DEFAULT_TURN_LOOK_BACK_DISTANCE,
+        turn_angle: float = DEFAULT_TURN_ANGLE,
+        switchback_angle: float = SWITCHBACK_ANGLE,
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> List[GreatTurn]:
+    """
+    Find the great turns of a track segment, see `heading_changes`.
+
+    :param track_frame: The points of the track segment, e.g. the analyzed points.
+    :param look_back_distance: The distance along the track to the points before and after, in meters.
+    :param turn_angle: The smallest heading change of a great turn in degrees.
+    :param switchback_angle: The smallest heading change of a switchback in degrees.
+    :param geodesic_mode: The distance computation, see `geodesy.GEODESIC_MODES`.
+    :return: The great turns in track order.
+    :raises ValueError: If the look-back distance is not positive or an angle is not in (0, 180].
+    """
+    for name, angle in (('turn', turn_angle), ('switchback', switchback_angle)):
+        if not 0 < angle <= 180:
+            raise ValueError(f"Invalid {name} angle {angle}. Must be in (0, 180] degrees.")
+    before, after, changes = heading_changes(track_frame, look_back_distance, geodesic_mode)
+
+    with np.errstate(invalid='ignore'):
+        turning = np.abs(changes) >= turn_angle
+    turning_indices = np.flatnonzero(turning)
+    if not len(turning_indices):
+        return []
+
+    # The apex of every run of turning points, the first of its largest heading changes
+    run_ids = np.cumsum(np.diff(turning_indices, prepend=turning_indices[0]) != 1)
+    order = np.lexsort((turning_indices, -np.abs(changes[turning_indices]), run_ids))
+    apexes = turning_indices[order[np.flatnonzero(np.diff(run_ids[order], prepend=-1))]]
+    return [
+        GreatTurn(int(before[i]), int(i), int(after[i]), float(changes[i]), bool(abs(changes[i]) >= switchback_angle))
+        for i in apexes
+    ]
+
+
+def set_great_turns(
+        analyzed_track_object: AnalyzedTrackObject,
+        great_turns: List[GreatTurn],
+        geodesic_mode: str = DEFAULT_GEODESIC_MODE
+) -> None:
+    """
+    Set the great turns of an analyzed track object, together with their points and, for every turn, the
+    TrackPointVectors coming into and going out of the turn. Only the vectors of the turns are built.
+
+    :param analyzed_track_object: The analyzed track object, the indices of the turns are those of its points.
+    :param great_turns: The great turns, see `find_great_turns`.
+    :param geodesic_mode: The distance computation of the vectors, see `geodesy.GEODESIC_MODES`.
+    """
+    analyzed_tracks = analyzed_track_object.get_main_tracks()
+    point_list = [analyzed_tracks.get_track_point(great_turn.point_index) for great_turn in great_turns]
+    vector_list = [
+        (
+            TrackPointVector(analyzed_tracks.get_track_point(great_turn.before_index), point, geodesic_mode),
+            TrackPointVector(point, analyzed_tracks.get_track_point(great_turn.after_index), geodesic_mode),
+        )
+        for great_turn, point in zip(great_turns, point_list)
+    ]
+    analyzed_track_object.set_great_turn_list(great_turns)
+    analyzed_track_object.set_great_turn_point_list(point_list)
+    analyzed_track_object.set_great_turn_vector_list(vector_list)
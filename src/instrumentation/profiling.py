@@ -0,0 +1,228 @@
+"""
+Lightweight instrumentation of the processing pipeline with named spans.
+
+Code marks its stages with the `span` context manager:
+
+    with span('smoothing'):
+        ...
+
+Spans only record something while a `Profiler` is active, otherwise `span` returns immediately, so the
+library code can be instrumented without slowing down normal runs. Spans opened inside another span are
+recorded under the path of their parent, e.g. `analyze/smoothing`. Only spans of the thread which entered
+the profiler are recorded, spans opened by worker threads are ignored.
+
+For every span path the profiler records the number of calls and the wall time. With memory tracing enabled
+it also records the net memory allocated by the span and the peak memory reached while the span was open,
+both measured with tracemalloc. The whole profiled run can additionally be recorded with cProfile.
+"""
+
+import contextlib
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional
+
+_active_profiler: Optional['Profiler'] = None
+
+
+class SpanRecord:
+    """
+    Accumulated measurements of one span path.
+    """
+
+    __slots__ = ('path', 'depth', 'calls', 'elapsed', 'memory_net', 'memory_peak')
+
+    def __init__(self, path: str, depth: int):
+        self.path = path
+        self.depth = depth
+        self.calls = 0
+        self.elapsed = 0.0
+        self.memory_net = 0
+        self.memory_peak = 0
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit('/', 1)[-1]
+
+
+class _OpenSpan:
+
+    __slots__ = ('record', 'start_time', 'start_memory', 'peak_memory')
+
+    def __init__(self, record: SpanRecord, start_time: float, start_memory: int):
+        self.record = record
+        self.start_time = start_time
+        self.start_memory = start_memory
+        self.peak_memory = start_memory
+
+
+class Profiler:
+    """
+    Collects the span measurements of a run.
+
+    Use it as a context manager around the code to profile; the spans opened inside are recorded by it.
+
+    :param trace_memory: Record the memory of every span with tracemalloc. This slows down the run.
+    :param use_cprofile: Record the run with cProfile as well, see `dump_cprofile`.
+    """
+
+    def __init__(self, trace_memory: bool = False, use_cprofile: bool = False):
+        self._trace_memory = trace_memory
+        self._cprofile = cProfile.Profile() if use_cprofile else None
+        self._records: Dict[str, SpanRecord] = {}
+        self._open_spans: List[_OpenSpan] = []
+        self._started_tracemalloc = False
+        self._previous_profiler: Optional[Profiler] = None
+        self._start_time = 0.0
+        self._total_elapsed = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._thread_id: Optional[int] = None
+
+    def __enter__(self) -> 'Profiler':
+        global _active_profiler
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._previous_profiler = _active_profiler
+        _active_profiler = self
+        self._thread_id = threading.get_ident()
+        self._start_time = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_profiler
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._total_elapsed = time.perf_counter() - self._start_time
+        _active_profiler = self._previous_profiler
+        if self._trace_memory:
+            self._snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # ============== #
+    # Span handling  #
+    # ============== #
+    def _update_peak_memory(self) -> int:
+        """
+        Propagate the tracemalloc peak since the last update to every open span, and return the current memory.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        for open_span in self._open_spans:
+            open_span.peak_memory = max(open_span.peak_memory, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def enter_span(self, name: str) -> None:
+        parent_path = self._open_spans[-1].record.path + '/' if self._open_spans else ''
+        path = parent_path + name
+        record = self._records.get(path)
+        if record is None:
+            record = self._records[path] = SpanRecord(path, len(self._open_spans))
+
+        start_memory = self._update_peak_memory() if self._trace_memory else 0
+        self._open_spans.append(_OpenSpan(record, time.perf_counter(), start_memory))
+
+    def exit_span(self) -> None:
+        end_time = time.perf_counter()
+        end_memory = self._update_peak_memory() if self._trace_memory else 0
+        open_span = self._open_spans.pop()
+
+        record = open_span.record
+        record.calls += 1
+        record.elapsed += end_time - open_span.start_time
+        if self._trace_memory:
+            record.memory_net += end_memory - open_span.start_memory
+            record.memory_peak = max(record.memory_peak, open_span.peak_memory - open_span.start_memory)
+
+    # ========= #
+    # Results   #
+    # ========= #
+    def get_records(self) -> List[SpanRecord]:
+        """
+        Return the span records in the order the spans were first opened.
+        """
+        return list(self._records.values())
+
+    def get_total_elapsed(self) -> float:
+        return self._total_elapsed
+
+    def format_table(self) -> str:
+        """
+        Format the span records as a table, nested spans are indented below their parent.
+
+        :return: The table text.
+        :rtype: str
+        """
+        header = f"{'stage':<32}{'calls':>7}{'time (s)':>11}{'% run':>8}"
+        if self._trace_memory:
+            header += f"{'net (MB)':>11}{'peak (MB)':>11}"
+        lines = [header, '-' * len(header)]
+
+        total = self._total_elapsed or sum(r.elapsed for r in self._records.values() if r.depth == 0)
+        for record in self._records.values():
+            share = record.elapsed / total if total else 0.0
+            line = f"{'  ' * record.depth + record.name:<32}{record.calls:>7}{record.elapsed:>11.3f}{share:>8.1%}"
+            if self._trace_memory:
+                line += f"{record.memory_net / 2 ** 20:>11.2f}{record.memory_peak / 2 ** 20:>11.2f}"
+            lines.append(line)
+
+        lines.append('-' * len(header))
+        lines.append(f"{'total':<32}{'':>7}{total:>11.3f}")
+        return '\n'.join(lines)
+
+    def dump_cprofile(self, output_file: str) -> None:
+        """
+        Save the cProfile statistics of the run, readable with `pstats` or tools like snakeviz.
+
+        :param output_file: Path of the statistics file.
+        :raises ValueError: If the profiler was created without cProfile.
+        """
+        if self._cprofile is None:
+            raise ValueError("The profiler was created without cProfile, use use_cprofile=True.")
+        pstats.Stats(self._cprofile).dump_stats(output_file)
+
+    def dump_tracemalloc(self, output_file: str, limit: int = 50) -> None:
+        """
+        Save the source lines holding the most memory at the end of the run.
+
+        :param output_file: Path of the text file.
+        :param limit: Number of source lines to save.
+        :raises ValueError: If the profiler was created without memory tracing or has not finished yet.
+        """
+        if self._snapshot is None:
+            raise ValueError("No tracemalloc snapshot, use trace_memory=True and finish the profiled run first.")
+        with open(output_file, 'w') as f:
+            for statistic in self._snapshot.statistics('lineno')[:limit]:
+                f.write(f"{statistic}\n")
+
+
+def get_active_profiler() -> Optional[Profiler]:
+    return _active_profiler
+
+
+@contextlib.contextmanager
+def _profiled_span(profiler: Profiler, name: str) -> Iterator[None]:
+    profiler.enter_span(name)
+    try:
+        yield
+    finally:
+        profiler.exit_span()
+
+
+def span(name: str) -> contextlib.AbstractContextManager[None]:
+    """
+    Mark a stage of the pipeline, measured by the active profiler.
+
+    :param name: The span name, nested spans are recorded under the path of the enclosing span.
+    :return: A context manager around the stage, doing nothing when no profiler is active or the span is
+        opened by another thread than the profiled one.
+    """
+    if _active_profiler is None or _active_profiler._thread_id != threading.get_ident():
+        return contextlib.nullcontext()
+    return _profiled_span(_active_profiler, name)
@@ -0,0 +1,199 @@
+"""
+The processing pipeline of one GPX file: parse => analyze => (parse images) => (report) => map.
+It is shared by the single file CLI and the batch mode.
+"""
+
+import datetime
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTracks
+from src.geoanalyzer.tracks.track_cache import TrackCache, load_track_analyzer
+from src.geoanalyzer.images.image_parser import ImageParser
+from src.visualizartion.map_drawer import FoliumMapDrawer
+from src.visualizartion.report_generator import ReportGenerator
+from src.instrumentation.profiling import span
+
+SUPPORTED_REPORT_FORMATS = ('txt', 'md')
+
+
+def _print(message: str, err: bool = False) -> None:
+    print(message, file=sys.stderr if err else sys.stdout)
+
+
+def pair_map_layers(map_tile: Sequence[str], map_attr: Sequence[str], map_name: Sequence[str]) -> List[Dict[str, str]]:
+    """
+    Pair the map tiles with their attributions and display names.
+    If a map name is not provided for a map tile, the map tile URL is used as its name.
+
+    :param map_tile: The map tile providers or URLs.
+    :param map_attr: The attributions of the map tiles, one per map tile.
+    :param map_name: The display names of the map tiles, at most one per map tile.
+    :return: The map layers as dicts of 'tile', 'attr' and 'name'.
+    :raises ValueError: If the numbers of tiles, attributions and names do not match.
+    """
+    # Validate that the number of map tiles and attributions match
+    if len(map_tile) != len(map_attr):
+        raise ValueError("The number of --map-tile and --map-attr options must be the same.")
+
+    # Validate that the number of map names does not exceed map tiles
+    if len(map_name) > len(map_tile):
+        raise ValueError("The number of --map-name options cannot exceed the number of --map-tile options.")
+
+    return [
+        {
+            'tile': tile,
+            'attr': attr,
+            'name': map_name[i] if i < len(map_name) else tile
+        }
+        for i, (tile, attr) in enumerate(zip(map_tile, map_attr))
+    ]
+
+
+def check_report_file(output_report: str) -> None:
+    """
+    Ensure the report file has a supported extension (e.g., .txt or .md).
+
+    :raises ValueError: If the extension is not supported.
+    """
+    if not output_report.endswith(tuple(f'.{f}' for f in SUPPORTED_REPORT_FORMATS)):
+        raise ValueError("The --output-report file must have a '.txt' or '.md' extension.")
+
+
+def process_gpx_file(
+        gpx_file: str,
+        output_map: str,
+        map_layers: List[Dict[str, str]],
+        output_report: Optional[str] = None,
+        picture_folder: Optional[str] = None,
+        echo: Callable[..., Any] = _print,
+        cache: Optional[TrackCache] = None,
+        member: Optional[str] = None,
+        time_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None
+) -> Dict[str, Any]:
+    """
+    Parse and analyze the GPX file, then generate the map and optionally the report.
+
+    :param gpx_file: Path to the GPX file to load, which may be gzip, bzip2 or xz compressed or a zip archive.
+    :param output_map: Path to save the output map HTML file.
+    :param map_layers: The map layers, see `pair_map_layers`.
+    :param output_report: Path to save the output report (.txt or .md), or None.
+    :param picture_folder: Folder containing pictures to parse, or None.
+    :param echo: Function printing the progress messages, called like `click.echo` with an optional `err` flag.
+    :param cache: Cache of analyzed tracks. An unchanged file found in the cache is neither parsed nor analyzed.
+    :param member: The name of the GPX file in a zip archive, may be left out if it holds only one.
+    :param time_range: Process only the points in this (start, end) local time window, see `GpxParser`.
+    :param bbox: Process only the points in this (min lat, min lon, max lat, max lon) bounding box.
+    :return: Summary of the processed track: number of track points, rest points, waypoints and image points,
+        and whether the analysis was loaded from the cache.
+    :raises ValueError: If the report file has an unsupported extension, the member of a zip archive is
+        missing, or no track point passes the time range and bounding box.
+    """
+    if output_report:
+        check_report_file(output_report)
+
+    # Parsing and analyzing the GPX file, or loading the analysis from the cache
+    tracks_object, cache_hit = load_track_analyzer(gpx_file, cache, member, time_range=time_range, bbox=bbox)
+    tracks = tracks_object.get_main_track()
+    if cache_hit and cache is not None:
+        echo(f"Loaded the analyzed track from the cache in {cache.get_cache_dir()}")
+
+    # If provided, parse images and get image points
+    image_points = []
+    if picture_folder:
+        with span('parse_images'):
+            image_parser = ImageParser(picture_folder)
+            image_points = image_parser.get_image_points()
+        processed_files, skipped_non_jpg, skipped_no_gps, errors = image_parser.get_summary()
+
+        # Display summary to the user
+        echo(f"Processed {processed_files} JPG files.")
+        echo(f"Skipped {skipped_non_jpg} non-JPG files.")
+        echo(f"Skipped {skipped_no_gps} JPG files without GPS data.")
+        if errors:
+            echo("Errors encountered during image parsing:")
+            for error in errors:
+                echo(f"- {error}")
+
+    # Report Generation
+    if output_report:
+        # Ensure the output directory exists
+        file_path, _ = os.path.split(output_report)
+        if not os.path.exists(file_path) and file_path != '':
+            echo(f"Directory {file_path} does not exist. Creating directory...", err=True)
+            os.makedirs(file_path, exist_ok=True)
+
+        with span('report'):
+            reporter = ReportGenerator(tracks_object)
+            reporter.generate_report(saved_file=output_report, saved_format=os.path.splitext(output_report)[1][1:])
+        echo(f"Report successfully generated at {output_report}")
+
+    # Generating map
+    with span('map'):
+        # Extract the starting point from the tracks for centering the map
+        start_point = tracks.get_start_point()
+        map_drawer = FoliumMapDrawer(
+            location_x=start_point.lat,
+            location_y=start_point.lon,
+            zoom_start=15,
+            map_tiles=[layer['tile'] for layer in map_layers],
+            map_attrs=[layer['attr'] for layer in map_layers],
+            map_names=[layer['name'] for layer in map_layers]
+        )
+
+        # Add tracks to the map, one polyline per track segment so the gaps between segments are not drawn
+        with span('add_tracks'):
+            for segment_frame in tracks_object.get_analyzed_track_object().get_segment_track_frames():
+                if len(segment_frame):
+                    map_drawer.add_tracks(AnalyzedTracks.from_track_frame(segment_frame), weight=4, color='blue')
+
+        with span('draw_points'):
+            # Draw rest points as green circles
+            map_drawer.draw_points_on_map(
+                tracks_object.get_rest_point_list(),
+                point_type='circle',
+                point_info='休息點',
+                point_color='green',
+                point_radius=10,
+                alpha=0.3
+            )
+
+            # Draw waypoints as blue markers
+            map_drawer.draw_points_on_map(
+                tracks_object.get_waypoint_list(),
+                point_type='marker',
+                point_info='',
+                point_color='blue',
+                point_radius=None,
+                alpha=None
+            )
+
+            # Add image points to the map as red markers, if any
+            if image_points:
+                map_drawer.draw_points_on_map(
+                    image_points,
+                    point_type='marker',
+                    point_info='',
+                    point_color='red',
+                    point_radius=None,
+                    alpha=None
+                )
+
+        # Save the generated map to the specified output path
+        output_dir = os.path.dirname(output_map)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with span('save'):
+            map_drawer.save(output_map)
+
+    echo(f"Map successfully generated at {output_map}")
+
+    return {
+        'track_points': len(tracks.get_main_tracks_points_list()),
+        'rest_points': len(tracks_object.get_rest_point_list()),
+        'waypoints': len(tracks_object.get_waypoint_list()),
+        'image_points': len(image_points),
+        'cache_hit': cache_hit,
+    }
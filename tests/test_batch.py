@@ -0,0 +1,190 @@
+import gzip
+import lzma
+import os
+import shutil
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+
+from src.batch import find_gpx_files, plan_batch, run_batch, summarize_batch
+from src.cli import main
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
+from src.pipeline import pair_map_layers
+
+STANDARD_GPX_FILE = "standard_test_data/2021-08-29-06.21.16.gpx"
+MAP_LAYERS = [{'tile': 'OpenStreetMap', 'attr': 'Map data © OpenStreetMap contributors', 'name': 'OpenStreetMap'}]
+
+
+@pytest.fixture
+def gpx_tree(tmp_path):
+    input_dir = tmp_path / 'input'
+    (input_dir / 'sub').mkdir(parents=True)
+    shutil.copy(STANDARD_GPX_FILE, input_dir / 'a.gpx')
+    shutil.copy(STANDARD_GPX_FILE, input_dir / 'sub' / 'b.GPX')
+    (input_dir / 'sub' / 'broken.gpx').write_text('<gpx>')
+    (input_dir / 'notes.txt').write_text('not a gpx file')
+    return input_dir
+
+
+def test_plan_batch_mirrors_input_tree(gpx_tree, tmp_path):
+    output_dir = str(tmp_path / 'output')
+    tasks = plan_batch([str(gpx_tree)], output_dir)
+
+    assert [os.path.relpath(t.gpx_file, gpx_tree) for t in tasks] == ['a.gpx', 'sub/b.GPX', 'sub/broken.gpx']
+    assert tasks[1].output_map == os.path.join(output_dir, 'sub', 'b.html')
+    assert tasks[1].output_report == os.path.join(output_dir, 'sub', 'b.txt')
+    assert plan_batch([str(gpx_tree)], output_dir, report_format=None)[0].output_report is None
+
+
+def test_find_gpx_files_with_glob(gpx_tree):
+    files = find_gpx_files([str(gpx_tree / '**' / '*.gpx'), str(gpx_tree / 'a.gpx')])
+    assert [os.path.relpath(f, base) for f, base in files] == ['a.gpx', os.path.join('sub', 'broken.gpx')]
+
+    with pytest.raises(FileNotFoundError):
+        find_gpx_files([str(gpx_tree / '*.kml')])
+
+
+def test_plan_batch_compressed_and_zipped_files(tmp_path):
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+    (input_dir / 'a.gpx.gz').write_bytes(gzip.compress(content))
+    with zipfile.ZipFile(input_dir / 'trip.zip', 'w') as archive:
+        archive.writestr('day1.gpx', content)
+        archive.writestr('day2.gpx.xz', lzma.compress(content))
+    output_dir = tmp_path / 'output'
+
+    tasks = plan_batch([str(input_dir)], str(output_dir))
+    assert [(t.output_map, t.member) for t in tasks] == [
+        (str(output_dir / 'a.html'), None),
+        (str(output_dir / 'trip' / 'day1.html'), 'day1.gpx'),
+        (str(output_dir / 'trip' / 'day2.html'), 'day2.gpx.xz'),
+    ]
+    assert tasks[1].get_source() == f"{input_dir / 'trip.zip'}:day1.gpx"
+
+    results = run_batch(tasks, MAP_LAYERS, workers=1)
+    assert all(r.succeeded for r in results)
+    assert len({r.summary['track_points'] for r in results}) == 1
+
+
+def test_plan_batch_rejects_colliding_outputs(tmp_path):
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+
+    # A plain and a compressed file of the same name
+    compressed_dir = tmp_path / 'compressed'
+    compressed_dir.mkdir()
+    (compressed_dir / 'a.gpx').write_bytes(content)
+    (compressed_dir / 'a.gpx.gz').write_bytes(gzip.compress(content))
+    with pytest.raises(ValueError, match='a.gpx.gz'):
+        plan_batch([str(compressed_dir)], str(tmp_path / 'output'))
+
+    # An archive and a directory of the same name holding the same file name
+    archive_dir = tmp_path / 'archive'
+    (archive_dir / 'trips').mkdir(parents=True)
+    (archive_dir / 'trips' / 'day1.gpx').write_bytes(content)
+    with zipfile.ZipFile(archive_dir / 'trips.zip', 'w') as archive:
+        archive.writestr('day1.gpx', content)
+        archive.writestr('day2.gpx', content)
+    with pytest.raises(ValueError, match='trips.zip:day1.gpx'):
+        plan_batch([str(archive_dir)], str(tmp_path / 'output'))
+
+    # Without the colliding file of the directory every output is distinct
+    (archive_dir / 'trips' / 'day1.gpx').rename(archive_dir / 'trips' / 'day3.gpx')
+    assert len(plan_batch([str(archive_dir)], str(tmp_path / 'output'))) == 3
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_continues_after_failure(gpx_tree, tmp_path, workers):
+    tasks = plan_batch([str(gpx_tree)], str(tmp_path / 'output'))
+    results = run_batch(tasks, MAP_LAYERS, workers=workers)
+
+    assert [r.succeeded for r in results] == [True, True, False]
+    assert results[2].error
+    assert all(os.path.exists(r.task.output_map) and os.path.exists(r.task.output_report) for r in results[:2])
+
+    summary = summarize_batch(results, wall_time=1.0)
+    assert (summary['files'], summary['succeeded'], summary['failed']) == (3, 2, 1)
+    assert summary['track_points'] == 2 * results[0].summary['track_points']
+
+
+def test_cli_batch(gpx_tree, tmp_path):
+    result = CliRunner().invoke(main, ['batch', str(gpx_tree), '--output-dir', str(tmp_path / 'output'), '--workers', '2'])
+
+    assert result.exit_code == 1
+    assert 'Processed 3 files: 2 succeeded, 1 failed.' in result.output
+    assert os.path.exists(tmp_path / 'output' / 'sub' / 'b.html')
+
+
+def test_cli_without_command_runs_single_file(tmp_path):
+    result = CliRunner().invoke(main, ['--gpx-file', STANDARD_GPX_FILE, '--output-map', str(tmp_path / 'map.html')])
+
+    assert result.exit_code == 0
+    assert os.path.exists(tmp_path / 'map.html')
+
+
+def test_cli_gpx_member(tmp_path):
+    archive_path = tmp_path / 'trip.zip'
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.write(STANDARD_GPX_FILE, 'day1.gpx')
+        archive.write(STANDARD_GPX_FILE, 'day2.gpx')
+    arguments = ['--gpx-file', str(archive_path), '--output-map', str(tmp_path / 'map.html')]
+
+    result = CliRunner().invoke(main, arguments)
+    assert 'holds 2 GPX files' in result.output
+    assert not os.path.exists(tmp_path / 'map.html')
+
+    result = CliRunner().invoke(main, arguments + ['--gpx-member', 'day2.gpx'])
+    assert result.exit_code == 0
+    assert os.path.exists(tmp_path / 'map.html')
+
+
+def test_cli_point_filter(tmp_path):
+    arguments = ['--gpx-file', STANDARD_GPX_FILE, '--output-map', str(tmp_path / 'map.html'),
+                 '--output-report', str(tmp_path / 'report.txt')]
+
+    result = CliRunner().invoke(main, arguments + ['--time-range', '2021-08-29T15:00:00', '2021-08-29T13:00:00'])
+    assert 'Invalid time range' in result.output
+    assert not os.path.exists(tmp_path / 'map.html')
+
+    result = CliRunner().invoke(main, arguments + ['--bbox', '0', '0', '1', '1'])
+    assert 'No track point' in result.output
+    assert not os.path.exists(tmp_path / 'map.html')
+
+    result = CliRunner().invoke(main, arguments + ['--time-range', '2021-08-29T13:00:00', '2021-08-29T15:00:00',
+                                                   '--bbox', '24.5', '121.1', '24.7', '121.3'])
+    assert result.exit_code == 0
+    assert os.path.exists(tmp_path / 'map.html')
+
+
+def test_cli_follow(tmp_path):
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+    live_file = tmp_path / 'live.gpx'
+    live_file.write_bytes(content[:len(content) // 2])
+
+    result = CliRunner().invoke(main, ['follow', str(live_file), '--interval', '0', '--max-idle-polls', '1'])
+    assert result.exit_code == 0
+    assert 'track points (+' in result.output
+    assert f'Stopped following {live_file} at byte {len(content) // 2}.' in result.output
+
+    # Once the whole file is recorded, the incrementally found rest points are those of the batch analysis
+    live_file.write_bytes(content)
+    result = CliRunner().invoke(main, ['follow', str(live_file), '--interval', '0', '--max-idle-polls', '1'])
+    assert result.exit_code == 0
+    rest_point_list = TrackAnalyzer(GpxParser(STANDARD_GPX_FILE).get_raw_track_object()).get_rest_point_list()
+    assert rest_point_list
+    assert result.output.count('Rest point ') == len(rest_point_list)
+    assert f'Rest point 1 from {rest_point_list[0].get_start_time()} to {rest_point_list[0].get_end_time()}' in result.output
+
+
+def test_pair_map_layers():
+    assert pair_map_layers(['a', 'b'], ['attr a', 'attr b'], ['name a']) == [
+        {'tile': 'a', 'attr': 'attr a', 'name': 'name a'},
+        {'tile': 'b', 'attr': 'attr b', 'name': 'b'},
+    ]
+    with pytest.raises(ValueError):
+        pair_map_layers(['a'], [], [])
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from benchmarks.suite import compare_results, load_results, run_benchmarks, save_results, select_benchmarks
+from benchmarks.synthetic_gpx import generate_track_frame, write_gpx, write_images
+from src.geoanalyzer.images.image_parser import ImageParser
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
+
+
+def test_synthetic_track_is_deterministic():
+    frame = generate_track_frame(5000, seed=7)
+    same_frame = generate_track_frame(5000, seed=7)
+    other_frame = generate_track_frame(5000, seed=8)
+
+    assert len(frame) == 5000
+    assert np.array_equal(frame.lat, same_frame.lat)
+    assert np.array_equal(frame.time, same_frame.time)
+    assert not np.array_equal(frame.lat, other_frame.lat)
+    # A shorter track is a prefix of a longer one
+    assert np.array_equal(generate_track_frame(1000, seed=7).lon, frame.lon[:1000])
+    assert np.all(np.diff(frame.get_epoch_time()) > 0)
+
+
+def test_synthetic_gpx_is_parsed_and_has_rests(tmp_path):
+    gpx_file = str(tmp_path / 'synthetic.gpx')
+    assert write_gpx(gpx_file, 20000, seed=1, waypoint_interval=1000) == (20000, 20)
+
+    raw_track_object = GpxParser(gpx_file).get_raw_track_object()
+    assert len(raw_track_object.get_main_tracks().get_main_tracks_points_list()) == 20000
+    assert len(raw_track_object.get_waypoint_list()) == 20
+    assert len(TrackAnalyzer(raw_track_object).get_rest_point_list()) > 0
+
+
+def test_synthetic_images_are_parsed(tmp_path):
+    assert write_images(str(tmp_path), 3, seed=1) == 3
+
+    image_points = ImageParser(str(tmp_path)).get_image_points()
+    assert len(image_points) == 3
+    assert all(point.time is not None and 24 < point.lat < 25 for point in image_points)
+
+
+def test_run_and_compare_benchmarks(tmp_path):
+    results = run_benchmarks(select_benchmarks(['gpx_parser', 'find_rest_point_rle']), sizes=[500], repeat=1,
+                             data_dir=str(tmp_path / 'data'))
+    assert [r['benchmark'] for r in results['results']] == \
+        ['gpx_parser.dom', 'gpx_parser.stream', 'gpx_parser.columnar', 'gpx_parser.stream_window', 'find_rest_point_rle']
+    assert all(r['num_points'] == 500 and r['min'] > 0 for r in results['results'])
+
+    results_file = str(tmp_path / 'results.json')
+    save_results(results, results_file)
+    baseline = load_results(results_file)
+    assert {entry['verdict'] for entry in compare_results(baseline, results)} == {'unchanged'}
+
+    slower = {**results, 'results': [{**r, 'min': r['min'] * 2} for r in results['results']]}
+    assert {entry['verdict'] for entry in compare_results(baseline, slower)} == {'regression'}
+
+
+def test_select_unknown_benchmark():
+    with pytest.raises(ValueError):
+        select_benchmarks(['unknown'])
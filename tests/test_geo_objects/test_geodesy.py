@@ -0,0 +1,88 @@
+import datetime
+import math
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.point_vector.geodesy import (
+    EARTH_RADIUS, GEODESIC_MODES, displacements, distances, meters_per_degree, seed_displacements, step_displacements
+)
+from src.geo_objects.point_vector.track_point_vector import TrackPointVector
+
+# WGS84 semi-major axis and first eccentricity squared
+_A = 6378137.0
+_E2 = 6.69437999014e-3
+
+
+def test_ellipsoidal_degree_lengths_match_wgs84_radii():
+    lat = np.linspace(0.0, 85.0, 18)
+    sin_lat_2 = np.sin(np.radians(lat)) ** 2
+    meridian_radius = _A * (1 - _E2) / (1 - _E2 * sin_lat_2) ** 1.5
+    normal_radius = _A / np.sqrt(1 - _E2 * sin_lat_2)
+
+    lon_scale, lat_scale = meters_per_degree(lat, 'ellipsoidal')
+    np.testing.assert_allclose(lat_scale, np.radians(1) * meridian_radius, rtol=1e-6)
+    np.testing.assert_allclose(lon_scale, np.radians(1) * normal_radius * np.cos(np.radians(lat)), rtol=1e-6, atol=1e-3)
+
+
+def test_ellipsoidal_mode_matches_the_legacy_constants_around_taiwan():
+    lon_scale, lat_scale = meters_per_degree(24.0, 'ellipsoidal')
+    assert lon_scale == pytest.approx(101751, abs=1)
+    assert lat_scale == pytest.approx(110757, abs=2)
+
+
+def test_legacy_mode_is_the_default():
+    # The fixed lengths of a degree at any latitude, and the seed check scale of longitude
+    assert [float(scale) for scale in meters_per_degree(60.0)] == [101751, 110757]
+    assert displacements(24.0, 121.0, 24.001, 121.001) == ((121.001 - 121.0) * 101751, (24.001 - 24.0) * 110757)
+    assert seed_displacements(24.0, 121.0, 24.001, 121.001) == ((121.001 - 121.0) * 110751, (24.001 - 24.0) * 110757)
+    assert seed_displacements(24.0, 121.0, 24.001, 121.001, 'ellipsoidal') == \
+        displacements(24.0, 121.0, 24.001, 121.001, 'ellipsoidal')
+
+
+def test_haversine_distances():
+    # A quarter of the equator and from the equator to the pole
+    assert distances(0.0, 0.0, 0.0, 90.0, 'haversine') == pytest.approx(EARTH_RADIUS * math.pi / 2)
+    assert distances(0.0, 0.0, 90.0, 0.0, 'haversine') == pytest.approx(EARTH_RADIUS * math.pi / 2)
+    # The components keep the direction and add up to the great circle distance
+    delta_x, delta_y = displacements(24.0, 121.0, 24.3, 121.4, 'haversine')
+    assert math.hypot(delta_x, delta_y) == pytest.approx(distances(24.0, 121.0, 24.3, 121.4, 'haversine'))
+    assert delta_x > 0 and delta_y > 0
+    assert distances(24.0, 121.0, 24.0, 121.0, 'haversine') == 0.0
+
+
+@pytest.mark.parametrize('geodesic_mode', [mode for mode in GEODESIC_MODES if mode != 'legacy'])
+def test_modes_agree_on_short_steps(geodesic_mode):
+    rng = np.random.default_rng(0)
+    lat = 60.0 + np.cumsum(rng.uniform(-1e-4, 1e-4, 100))
+    lon = 10.0 + np.cumsum(rng.uniform(-1e-4, 1e-4, 100))
+    step_x, step_y = step_displacements(lat, lon, geodesic_mode)
+    reference_x, reference_y = step_displacements(lat, lon, 'ellipsoidal')
+    # The sphere is off by the flattening of the earth
+    np.testing.assert_allclose(np.hypot(step_x, step_y), np.hypot(reference_x, reference_y), rtol=5e-3)
+
+    # Array and scalar results are the same
+    assert distances(lat[0], lon[0], lat[1], lon[1], geodesic_mode) == pytest.approx(np.hypot(step_x[0], step_y[0]))
+    assert len(step_displacements(lat[:1], lon[:1], geodesic_mode)[0]) == 0
+
+
+def test_displacement_across_the_antimeridian():
+    delta_x, delta_y = displacements(0.0, 179.9, 0.0, -179.9)
+    assert delta_x == pytest.approx(0.2 * meters_per_degree(0.0)[0])
+    assert delta_y == 0.0
+
+
+def test_track_point_vector():
+    time = datetime.datetime(2023, 8, 28, 8, 50)
+    vector = TrackPointVector(RawTrkPoint(time, 24.0, 121.0, 0.0), RawTrkPoint(time, 24.001, 120.999, 0.0))
+    lon_scale, lat_scale = meters_per_degree(24.0005)
+    assert vector.get_vector() == pytest.approx([-0.001 * lon_scale, 0.001 * lat_scale])
+    assert vector.get_length() == pytest.approx(math.hypot(0.001 * lon_scale, 0.001 * lat_scale))
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        distances(0.0, 0.0, 1.0, 1.0, 'flat')
+    with pytest.raises(ValueError):
+        step_displacements(np.empty(0), np.empty(0), 'flat')
@@ -0,0 +1,32 @@
+import pytest
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.point_memory import POINT_FACTORIES, measure_point_memory
+from src.geo_objects.geo_tracks.track_frame import AnalyzedTrkPointView, RawTrkPointView, TrackFrame, TrackPointView
+
+
+@pytest.mark.parametrize("point_name", list(POINT_FACTORIES))
+def test_points_have_no_instance_dict(point_name):
+    point = POINT_FACTORIES[point_name](datetime(2023, 8, 31, 12, 34, 56), 37.7749, -122.4194, 15.0)
+
+    assert not hasattr(point, '__dict__')
+    with pytest.raises(AttributeError):
+        point.unknown_attribute = 1
+
+
+@pytest.mark.parametrize("view_class", [TrackPointView, RawTrkPointView, AnalyzedTrkPointView])
+def test_point_views_have_no_instance_dict(view_class):
+    frame = TrackFrame([24.0], [121.0], [1000.0], [np.datetime64('2021-08-29T06:21:16')],
+                       dx=[1.0], dy=[1.0], dz=[0.0], dt=[1.0])
+    view = view_class(frame, 0)
+
+    assert not hasattr(view, '__dict__')
+    assert view.lat == 24.0
+    assert view.time == datetime(2021, 8, 29, 6, 21, 16)
+
+
+def test_slotted_points_use_less_memory():
+    result = measure_point_memory('AnalyzedTrkPoint', 2000)
+    assert result['after'] < result['before']
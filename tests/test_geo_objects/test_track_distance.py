@@ -0,0 +1,69 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.analyzed_geo_points import RestTrkPoint
+from src.geo_objects.geo_points.raw_geo_points import WayPoint
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTrackObject
+from src.geo_objects.geo_tracks.track_distance import TrackDistanceIndex, add_cumulative_distances
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+
+START_TIME = datetime.datetime(2023, 8, 28, 8, 0, 0)
+
+
+@pytest.fixture
+def analyzed_frame():
+    """Five points 10 s apart, each a 3-4-5 m step with 12 m up, except a NaN step."""
+    time = np.datetime64(START_TIME, 'us') + np.arange(5) * np.timedelta64(10, 's')
+    return TrackFrame(
+        np.zeros(5), np.zeros(5), np.zeros(5), time,
+        dx=np.array([3.0, 3.0, np.nan, 3.0, 3.0]), dy=np.full(5, 4.0), dz=np.full(5, 12.0), dt=np.full(5, 10.0),
+    )
+
+
+def test_distance_queries(analyzed_frame):
+    index = TrackDistanceIndex(analyzed_frame)
+    np.testing.assert_array_equal(index.get_cumulative_distances(), [5, 10, 10, 15, 20])
+    np.testing.assert_array_equal(index.get_cumulative_distances('3d'), [13, 26, 26, 39, 52])
+    assert index.get_total_distance() == 20
+    assert index.get_distance(1, 4) == 10
+    assert index.get_distance(0, -1, '3d') == 39
+
+    assert index.get_distance_at_time(START_TIME + datetime.timedelta(seconds=35)) == 17.5
+    assert index.get_distance_at_time(START_TIME - datetime.timedelta(hours=1)) == 5
+    np.testing.assert_array_equal(
+        index.get_distance_at_time([START_TIME, START_TIME + datetime.timedelta(hours=1)]), [5, 20]
+    )
+    assert index.get_distance_between_times(START_TIME, START_TIME + datetime.timedelta(seconds=30)) == 10
+
+    with pytest.raises(ValueError):
+        index.get_total_distance('2d')
+
+
+def test_distance_index_reads_stored_columns(analyzed_frame):
+    stored_frame = add_cumulative_distances(analyzed_frame)
+    stored_frame.get_column('integral_dst')[-1] = 100.0
+    assert TrackDistanceIndex(stored_frame).get_total_distance() == 100.0
+    assert TrackDistanceIndex(TrackFrame.concat([analyzed_frame.slice(0, 0)])).get_total_distance() == 0.0
+
+
+def test_analyzed_track_object_distances(analyzed_frame):
+    analyzed_track_object = AnalyzedTrackObject()
+    analyzed_track_object.set_track_frame(add_cumulative_distances(analyzed_frame))
+    analyzed_track_object.set_waypoint_list([
+        WayPoint(START_TIME + datetime.timedelta(seconds=10), 0.0, 0.0, 0.0, 'a'),
+        WayPoint(None, 0.0, 0.0, 0.0, 'no time'),
+    ])
+    rest_start = START_TIME + datetime.timedelta(seconds=30)
+    analyzed_track_object.set_rest_point_list([
+        RestTrkPoint(rest_start, 0.0, 0.0, 0.0, rest_start, rest_start + datetime.timedelta(minutes=5))
+    ])
+
+    assert analyzed_track_object.get_total_integral_distance() == 20
+    assert analyzed_track_object.get_total_integral_distance('3d') == 52
+    assert analyzed_track_object.get_distance_index() is analyzed_track_object.get_distance_index()
+    assert analyzed_track_object.get_waypoint_distance_list()[0] == 10
+    assert np.isnan(analyzed_track_object.get_waypoint_distance_list()[1])
+    assert analyzed_track_object.get_rest_point_distance_list() == [15]
+    assert analyzed_track_object.get_main_tracks().get_track_point(3).get_point_integral_dst() == 15
@@ -0,0 +1,123 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame, RawTrkPointView, AnalyzedTrkPointView
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTracks, RawTrackObject
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTracks
+from src.geo_objects.geo_tracks.track_statistics import TrackStatistics
+
+
+START_TIME = datetime.datetime(2023, 8, 28, 8, 0, 0)
+
+
+@pytest.fixture
+def raw_points():
+    return [
+        RawTrkPoint(START_TIME + datetime.timedelta(seconds=5 * i), 24.0 + i * 0.001, 121.0 + i * 0.001, 100.0 + i)
+        for i in range(5)
+    ] + [RawTrkPoint(START_TIME + datetime.timedelta(seconds=25), 24.005, 121.005, None)]
+
+
+def _point_tuple(point):
+    return point.time, point.lat, point.lon, point.elev
+
+
+def test_track_frame_from_points_round_trip(raw_points):
+    frame = TrackFrame.from_points(raw_points)
+
+    assert len(frame) == len(raw_points)
+    assert frame.lat.dtype == np.float64
+    assert frame.time.dtype == np.dtype('datetime64[us]')
+    assert np.isnan(frame.elev[-1])
+    assert [_point_tuple(p) for p in frame.to_points()] == [_point_tuple(p) for p in raw_points]
+    assert frame.get_epoch_seconds()[1] - frame.get_epoch_seconds()[0] == 5
+
+
+def test_track_frame_rejects_mismatched_columns():
+    with pytest.raises(ValueError):
+        TrackFrame([1.0, 2.0], [1.0], [1.0, 2.0], np.zeros(2, dtype=np.int64))
+
+
+def test_track_frame_slice_shares_memory(raw_points):
+    frame = TrackFrame.from_points(raw_points)
+    sliced = frame.slice(1, 3)
+    assert len(sliced) == 2
+    assert np.shares_memory(sliced.lat, frame.lat)
+    with pytest.raises(KeyError):
+        frame.get_column('dx')
+
+
+def test_track_frame_concat(raw_points):
+    frame = TrackFrame.from_points(raw_points)
+    joined = TrackFrame.concat([frame.slice(0, 2), frame.slice(2, 2), frame.slice(2, len(frame))])
+    assert [_point_tuple(p) for p in joined.to_points()] == [_point_tuple(p) for p in raw_points]
+
+    with pytest.raises(ValueError):
+        TrackFrame.concat([])
+    with pytest.raises(ValueError):
+        TrackFrame.concat([frame, frame.with_columns(dx=np.zeros(len(frame)))])
+
+
+def test_raw_tracks_wrapping_track_frame(raw_points):
+    tracks = RawTracks.from_track_frame(TrackFrame.from_points(raw_points))
+    point_list = tracks.get_main_tracks_points_list()
+
+    assert len(point_list) == len(raw_points)
+    assert isinstance(tracks.get_track_point(0), RawTrkPoint)
+    assert isinstance(tracks.get_start_point(), RawTrkPointView)
+    assert _point_tuple(tracks.get_end_point()) == _point_tuple(raw_points[-1])
+    assert [_point_tuple(p) for p in point_list[1:3]] == [_point_tuple(p) for p in raw_points[1:3]]
+    assert [_point_tuple(p) for p in tracks] == [_point_tuple(p) for p in raw_points]
+
+    # Appending a point materialises the wrapped frame, the new frame includes the new point
+    tracks.add_track_point(RawTrkPoint(START_TIME + datetime.timedelta(seconds=30), 24.006, 121.006, 106.0))
+    assert len(tracks.get_main_tracks_points_list()) == len(raw_points) + 1
+    assert len(tracks.get_track_frame()) == len(raw_points) + 1
+
+
+def test_raw_track_object_builds_frame_from_points(raw_points):
+    raw_track_object = RawTrackObject()
+    for point in raw_points:
+        raw_track_object.add_track_point(point)
+
+    frame = raw_track_object.get_track_frame()
+    assert frame is raw_track_object.get_track_frame()
+    np.testing.assert_array_equal(frame.lat, [p.lat for p in raw_points])
+
+
+def test_analyzed_tracks_point_views():
+    points = [
+        AnalyzedTrkPoint(START_TIME + datetime.timedelta(seconds=i), 24.0, 121.0, 100.0, 3.0, 4.0, 1.0, 2.0)
+        for i in range(3)
+    ]
+    list_tracks = AnalyzedTracks()
+    for point in points:
+        list_tracks.add_track_point(point)
+
+    tracks = AnalyzedTracks.from_track_frame(list_tracks.get_track_frame())
+    view = tracks.get_track_point(1)
+    assert isinstance(view, AnalyzedTrkPointView)
+    assert isinstance(view, AnalyzedTrkPoint)
+    assert view.get_delta_xy() == 5.0
+    assert view.get_speed_xy() == 2.5
+    assert view.get_velocity_xyx() == [1.5, 2.0, 0.5]
+    assert view.get_point_integral_dst() == 0
+    assert tracks.get_total_integral_xy_displacement() == 15.0
+
+
+def test_track_statistics_combine():
+    time = np.datetime64('2023-08-28T08:00:00', 'us') + np.arange(4) * np.timedelta64(10, 's')
+    frame = TrackFrame(
+        np.zeros(4), np.zeros(4), np.zeros(4), time,
+        dx=np.array([3.0, 0.0, 6.0, np.nan]), dy=np.array([4.0, 1.0, 8.0, 0.0]),
+        dz=np.array([2.0, -1.0, 0.5, -3.0]), dt=np.array([10.0, 10.0, 0.0, 10.0]),
+    )
+    statistics = TrackStatistics.from_track_frame(frame)
+    assert statistics == TrackStatistics(4, 16.0, 2.5, 4.0, 0.5)
+    assert TrackStatistics.combine([TrackStatistics.from_track_frame(frame.slice(0, 2)),
+                                    TrackStatistics.from_track_frame(frame.slice(2, 4))]) == statistics
+    assert np.isnan(TrackStatistics.from_track_frame(frame.slice(0, 0)).max_speed_xy)
@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTracks
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_spatial_index import TrackSpatialIndex
+from src.geo_objects.point_vector import geodesy
+
+START_TIME = np.datetime64('2023-08-28T08:50:00', 'us')
+
+
+def _random_frame(seed, num_points=500):
+    """A random walk of steps of up to 10 m, with some points without a position."""
+    rng = np.random.default_rng(seed)
+    lat = 24.0 + np.cumsum(rng.uniform(-9e-5, 9e-5, num_points))
+    lon = 121.0 + np.cumsum(rng.uniform(-9e-5, 9e-5, num_points))
+    lat[rng.choice(num_points, 5, replace=False)] = np.nan
+    time = START_TIME + np.arange(num_points) * np.timedelta64(1, 's')
+    return TrackFrame(lat, lon, np.zeros(num_points), time)
+
+
+def _scan_distances(index, lat, lon):
+    track_x, track_y = index.project(index.get_track_frame().lat, index.get_track_frame().lon)
+    query_x, query_y = index.project(lat, lon)
+    return np.hypot(track_x - query_x, track_y - query_y)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('cell_size', [5.0, 50.0, 1000.0])
+def test_queries_match_full_scan(seed, cell_size):
+    track_frame = _random_frame(seed)
+    index = TrackSpatialIndex(track_frame, cell_size=cell_size)
+    assert len(index) == len(track_frame) - 5
+
+    rng = np.random.default_rng(seed + 100)
+    query_lat = np.nanmean(track_frame.lat) + rng.uniform(-3e-3, 3e-3, 20)
+    query_lon = np.nanmean(track_frame.lon) + rng.uniform(-3e-3, 3e-3, 20)
+    indices, distances = index.find_nearest_many(query_lat, query_lon, k=4)
+    within = index.find_within_many(query_lat, query_lon, radius=60.0)
+    for i in range(20):
+        scan = _scan_distances(index, query_lat[i], query_lon[i])
+        located = np.flatnonzero(~np.isnan(scan))
+        nearest = located[np.lexsort((located, scan[located]))]
+        np.testing.assert_array_equal(indices[i], nearest[:4])
+        np.testing.assert_allclose(distances[i], scan[nearest[:4]])
+
+        within_indices, within_distances = within[i]
+        np.testing.assert_array_equal(within_indices, nearest[scan[nearest] <= 60.0])
+        np.testing.assert_allclose(within_distances, scan[within_indices])
+
+    # The plane distances agree with the geodesic distances around the track
+    track_lat, track_lon = track_frame.lat[indices[:, 0]], track_frame.lon[indices[:, 0]]
+    np.testing.assert_allclose(distances[:, 0], geodesy.distances(query_lat, query_lon, track_lat, track_lon), rtol=1e-3)
+
+
+def test_single_queries_and_edge_cases():
+    # Two points 1 m east and west of a third one
+    lat = np.full(3, 24.0)
+    lon = 121.0 + np.array([-1, 0, 1]) / geodesy.meters_per_degree(24.0)[0]
+    index = TrackSpatialIndex(TrackFrame(lat, lon, np.zeros(3), np.full(3, START_TIME)))
+
+    indices, distances = index.find_nearest(24.0, 121.0, k=2)
+    np.testing.assert_array_equal(indices, [1, 0])
+    np.testing.assert_allclose(distances, [0.0, 1.0])
+    # Fewer points than asked for
+    assert len(index.find_nearest(24.0, 121.0, k=10)[0]) == 3
+    # Far away from the track
+    assert index.find_nearest(25.0, 119.0)[0][0] == 0
+    assert len(index.find_within(25.0, 119.0, radius=float('inf'))[0]) == 3
+    np.testing.assert_array_equal(index.find_within(24.0, 121.0, radius=0.5)[0], [1])
+
+    indices, distances = index.find_nearest_many([24.0, np.nan], [121.0, 121.0])
+    np.testing.assert_array_equal(indices[:, 0], [1, -1])
+    assert np.isnan(distances[1, 0])
+
+    with pytest.raises(ValueError):
+        index.find_nearest(24.0, 121.0, k=0)
+    with pytest.raises(ValueError):
+        index.find_within(24.0, 121.0, radius=-1.0)
+    with pytest.raises(ValueError):
+        TrackSpatialIndex(TrackFrame.from_points([]), cell_size=0.0)
+
+
+def test_empty_track():
+    index = TrackSpatialIndex(TrackFrame.from_points([]))
+    assert index.find_nearest_many([24.0], [121.0])[0].shape == (1, 0)
+    assert len(index.find_within(24.0, 121.0, radius=100.0)[0]) == 0
+
+
+def test_tracks_spatial_index_is_rebuilt_after_adding_points():
+    tracks = RawTracks.from_track_frame(_random_frame(0, num_points=50))
+    spatial_index = tracks.get_spatial_index()
+    assert tracks.get_spatial_index() is spatial_index
+
+    tracks.add_track_point(RawTrkPoint(datetime.datetime(2023, 8, 28, 10, 0), 30.0, 130.0, 0.0))
+    assert tracks.get_spatial_index() is not spatial_index
+    assert tracks.get_spatial_index().find_nearest(30.0, 130.0)[0][0] == 50
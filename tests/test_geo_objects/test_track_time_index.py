@@ -0,0 +1,89 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTracks
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_time_index import TrackTimeIndex
+
+START_TIME = datetime.datetime(2023, 8, 28, 8, 50, 0)
+
+
+def _seconds(seconds):
+    return START_TIME + datetime.timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def track_frame():
+    """Points at 0, 10, 20, 1800 and 4000 s, moving north 1e-4 degrees and up 1 m per point."""
+    seconds = np.array([0, 10, 20, 1800, 4000])
+    return TrackFrame(
+        24.0 + np.arange(5) * 1e-4, np.full(5, 121.0), 100.0 + np.arange(5),
+        np.datetime64(START_TIME, 'us') + seconds * np.timedelta64(1, 's'),
+    )
+
+
+def test_nearest_and_bracket(track_frame):
+    index = TrackTimeIndex(track_frame)
+    assert index.find_nearest(_seconds(14)) == 1
+    assert index.find_nearest(_seconds(15)) == 1
+    assert index.find_nearest(_seconds(-100)) == 0
+    assert index.find_nearest(_seconds(10_000)) == 4
+    np.testing.assert_array_equal(index.find_nearest_many([_seconds(16), _seconds(1000)]), [2, 3])
+
+    assert index.find_bracket(_seconds(10)) == (1, 2)
+    assert index.find_bracket(_seconds(900)) == (2, 3)
+    assert index.find_bracket(_seconds(-1)) == (None, 0)
+    assert index.find_bracket(_seconds(4000)) == (4, None)
+    before, after = index.find_bracket_many([_seconds(5), _seconds(5000)])
+    np.testing.assert_array_equal(before, [0, 4])
+    np.testing.assert_array_equal(after, [1, -1])
+
+
+def test_interpolate(track_frame):
+    index = TrackTimeIndex(track_frame)
+    point = index.interpolate(_seconds(15))
+    assert point.lat == pytest.approx(24.00015)
+    assert point.elev == pytest.approx(101.5)
+    assert point.time == _seconds(15)
+    assert index.interpolate(_seconds(20)).elev == 102.0
+    assert index.interpolate(_seconds(-1)) is None
+
+    interpolated = index.interpolate_many([_seconds(0), _seconds(910), _seconds(4001)])
+    np.testing.assert_allclose(interpolated.elev, [100.0, 102.5, np.nan])
+
+
+def test_unsorted_and_untimed_points(track_frame):
+    order = np.array([3, 0, 4, 2, 1])
+    shuffled = track_frame.take(order)
+    time = shuffled.time.copy()
+    time[2] = np.datetime64('NaT')
+    shuffled = TrackFrame(shuffled.lat, shuffled.lon, shuffled.elev, time)
+
+    index = TrackTimeIndex(shuffled)
+    assert len(index) == 4
+    # The indices are those of the shuffled track, the point at 4000 s has no time
+    assert index.find_nearest(_seconds(11)) == 4
+    assert index.find_bracket(_seconds(3000)) == (0, None)
+    assert index.interpolate(_seconds(15)).elev == pytest.approx(101.5)
+
+
+def test_period_first_indices(track_frame):
+    index = TrackTimeIndex(track_frame)
+    # 08:50:00 and 09:20:00 open their hours, 09:56:40 is in the hour of 09:20:00
+    np.testing.assert_array_equal(index.find_period_first_indices(), [0, 3])
+    np.testing.assert_array_equal(index.find_period_first_indices(datetime.timedelta(minutes=30)), [0, 3, 4])
+    with pytest.raises(ValueError):
+        index.find_period_first_indices(datetime.timedelta(0))
+
+
+def test_tracks_time_index_is_rebuilt_after_adding_points(track_frame):
+    tracks = RawTracks.from_track_frame(track_frame)
+    time_index = tracks.get_time_index()
+    assert tracks.get_time_index() is time_index
+
+    tracks.add_track_point(RawTrkPoint(_seconds(5000), 24.1, 121.0, 200.0))
+    assert tracks.get_time_index() is not time_index
+    assert tracks.get_time_index().find_nearest(_seconds(6000)) == 5
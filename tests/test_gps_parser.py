@@ -1,11 +1,24 @@
+import bz2
+import gzip
+import lzma
+import zipfile
+
 import pytest
 import datetime
+import numpy as np
 from unittest.mock import Mock, patch
 from unittest.mock import MagicMock
-from src.geoanalyzer.tracks.gps_parser import parse_gpx, extract_waypoint_from_xmldoc, extract_track_point_from_xmldoc, parse_time, GpxParser
+from src.geoanalyzer.tracks.gps_parser import parse_gpx, extract_waypoint_from_xmldoc, extract_track_point_from_xmldoc, parse_time, GpxParser, \
+    iterparse_gpx, load_gpx_track_frame, iter_gpx_track_objects, list_gpx_members, open_gpx, parse_time_array, \
+    iter_gpx_segments, GpxFollower
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
 
 from src.geoanalyzer.tracks.gps_parser import GpxParser
 from xml.dom.minidom import Document, Node
+from xml.etree import ElementTree
+from xml.parsers.expat import ExpatError
 
 
 
@@ -64,6 +77,39 @@ def test_parse_time():
     with pytest.raises(ValueError):
         parse_time('invalid_time')
 
+
+@pytest.mark.parametrize("input_time, expected", [
+    ('2023-08-28T01:00:00.5Z', datetime.datetime(2023, 8, 28, 9, 0, 0, 500000)),
+    ('2023-08-28T01:00:00.123456789Z', datetime.datetime(2023, 8, 28, 9, 0, 0, 123456)),
+    ('2023-08-28T09:00:00+08:00', datetime.datetime(2023, 8, 28, 9, 0)),
+    ('2023-08-27T22:30:00.250-0230', datetime.datetime(2023, 8, 28, 9, 0, 0, 250000)),
+    ('2023-08-28T03:00:00+02', datetime.datetime(2023, 8, 28, 9, 0)),
+    ('2023-08-28T01:00:00', datetime.datetime(2023, 8, 28, 9, 0)),
+])
+def test_parse_time_fractional_seconds_and_offsets(input_time, expected):
+    assert parse_time(input_time) == expected
+    assert parse_time_array([input_time])[0] == np.datetime64(expected, 'us').view(np.int64)
+
+
+@pytest.mark.parametrize("input_time", ['2023-08-28T01:00:00.Z', '2023-08-28T01:00:00.1x2Z', '2023-02-30T01:00:00Z',
+                                        '2023-08-28T01:00:00+8:00', ''])
+def test_parse_time_invalid(input_time):
+    with pytest.raises(ValueError):
+        parse_time(input_time)
+
+
+def test_parse_time_array():
+    input_times = ['2023-08-28T01:00:00Z', None, '2023-08-28T09:00:00.125+08:00', '', '2023-08-28T01:00:01.5Z']
+    epoch_times = parse_time_array(input_times)
+
+    assert epoch_times.dtype == np.int64
+    assert np.isnat(epoch_times.view('datetime64[us]')[[1, 3]]).all()
+    assert [epoch_times.view('datetime64[us]')[i].item() for i in (0, 2, 4)] == \
+        [parse_time(input_times[i]) for i in (0, 2, 4)]
+
+    with pytest.raises(ValueError):
+        parse_time_array(['2023-08-28T01:00:00Z', 'invalid_time'])
+
 # GpxParser class tests
 def test_GpxParser_init():
     # Create mock XML nodes with time information embedded in 'wpt' and 'trkpt' nodes
@@ -167,3 +213,378 @@ def test_gpx_extract_point_note(note, expected):
     result = GpxParser._gpx_extract_point_note(node)
     assert result == expected, "The extracted note should match the expected result."
 
+
+STANDARD_GPX_FILE = "standard_test_data/2021-08-29-06.21.16.gpx"
+
+
+def _point_tuple(point):
+    return point.time, point.lat, point.lon, point.elev
+
+
+def test_GpxParser_invalid_mode():
+    with pytest.raises(ValueError):
+        GpxParser(STANDARD_GPX_FILE, mode='sax')
+
+
+def test_GpxParser_stream_mode_matches_dom_mode():
+    dom_track_object = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    stream_track_object = GpxParser(STANDARD_GPX_FILE, mode='stream').get_raw_track_object()
+
+    dom_points = dom_track_object.get_main_tracks().get_main_tracks_points_list()
+    stream_points = stream_track_object.get_main_tracks().get_main_tracks_points_list()
+    assert len(stream_points) == len(dom_points) > 0
+    assert [_point_tuple(p) for p in stream_points] == [_point_tuple(p) for p in dom_points]
+
+    dom_waypoints = dom_track_object.get_waypoint_list()
+    stream_waypoints = stream_track_object.get_waypoint_list()
+    assert [_point_tuple(p) + (p.get_note(),) for p in stream_waypoints] == \
+        [_point_tuple(p) + (p.get_note(),) for p in dom_waypoints]
+
+
+def test_iterparse_gpx_releases_elements(tmp_path):
+    gpx_file = tmp_path / "track.gpx"
+    gpx_file.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>'
+        '<trkpt lat="24.1" lon="121.1"><ele>100</ele><time>2023-08-28T00:00:00Z</time></trkpt>'
+        '<trkpt lat="24.2" lon="121.2"><time>2023-08-28T00:00:05Z</time></trkpt>'
+        '</trkseg></trk></gpx>'
+    )
+
+    yielded = []
+    for tag_name, element in iterparse_gpx(str(gpx_file)):
+        yielded.append((tag_name, element.get("lat")))
+    assert yielded == [("trkpt", "24.1"), ("trkpt", "24.2")]
+    # Every yielded element has been cleared once the consumer moved on
+    assert element.attrib == {}
+
+    points = GpxParser(str(gpx_file), mode='stream').get_raw_track_object().get_main_tracks().get_main_tracks_points_list()
+    assert [_point_tuple(p) for p in points] == [
+        (datetime.datetime(2023, 8, 28, 8, 0, 0), 24.1, 121.1, 100.0),
+        (datetime.datetime(2023, 8, 28, 8, 0, 5), 24.2, 121.2, None),
+    ]
+
+
+def test_iterparse_gpx_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        list(iterparse_gpx("not_exist.gpx"))
+
+
+def test_load_gpx_track_frame_matches_parser():
+    frame = load_gpx_track_frame(STANDARD_GPX_FILE)
+    points = GpxParser(STANDARD_GPX_FILE).get_raw_track_object().get_main_tracks().get_main_tracks_points_list()
+
+    assert frame.lat.dtype == np.float64 and frame.get_epoch_time().dtype == np.int64
+    assert [_point_tuple(p) for p in frame.to_points()] == [_point_tuple(p) for p in points]
+
+
+def test_load_gpx_track_frame_from_bytes():
+    frame = load_gpx_track_frame(
+        b'<gpx><trk><trkseg>'
+        b'<trkpt lat="24.1" lon="121.1"><ele>100</ele><time>2023-08-28T00:00:00Z</time></trkpt>'
+        b'<trkpt lat="24.2" lon="121.2"></trkpt>'
+        b'</trkseg></trk></gpx>'
+    )
+    np.testing.assert_array_equal(frame.lat, [24.1, 24.2])
+    assert frame.elev[0] == 100.0 and np.isnan(frame.elev[1])
+    assert frame.time[0] == np.datetime64('2023-08-28T08:00:00')
+    assert np.isnat(frame.time[1])
+
+    with pytest.raises(ValueError):
+        load_gpx_track_frame(b'<gpx><trkpt lat="24.1" lon="121.1"><time>invalid</time></trkpt></gpx>')
+
+
+def test_GpxParser_columnar_mode():
+    dom_track_object = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    columnar_track_object = GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+
+    assert [_point_tuple(p) for p in columnar_track_object.get_main_tracks()] == \
+        [_point_tuple(p) for p in dom_track_object.get_main_tracks()]
+    assert [p.get_note() for p in columnar_track_object.get_waypoint_list()] == \
+        [p.get_note() for p in dom_track_object.get_waypoint_list()]
+
+
+COMPRESSORS = {'.gz': gzip.compress, '.bz2': bz2.compress, '.xz': lzma.compress}
+
+
+@pytest.fixture
+def compressed_gpx_files(tmp_path):
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+    paths = {}
+    for suffix, compress in COMPRESSORS.items():
+        paths[suffix] = tmp_path / f'track.gpx{suffix}'
+        paths[suffix].write_bytes(compress(content))
+    with zipfile.ZipFile(tmp_path / 'tracks.zip', 'w') as archive:
+        archive.write(STANDARD_GPX_FILE, 'day1.gpx')
+        archive.writestr('day2.gpx.gz', gzip.compress(content))
+        archive.writestr('notes.txt', 'not a gpx file')
+    with zipfile.ZipFile(tmp_path / 'single.zip', 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(STANDARD_GPX_FILE, 'day1.gpx')
+    paths['.zip'] = tmp_path / 'tracks.zip'
+    paths['single.zip'] = tmp_path / 'single.zip'
+    return {suffix: str(path) for suffix, path in paths.items()}
+
+
+@pytest.mark.parametrize("suffix", sorted(COMPRESSORS))
+@pytest.mark.parametrize("mode", GpxParser.SUPPORTED_MODES)
+def test_GpxParser_compressed_input(compressed_gpx_files, suffix, mode):
+    expected = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    track_object = GpxParser(compressed_gpx_files[suffix], mode=mode).get_raw_track_object()
+
+    assert [_point_tuple(p) for p in track_object.get_main_tracks()] == \
+        [_point_tuple(p) for p in expected.get_main_tracks()]
+    assert [p.get_note() for p in track_object.get_waypoint_list()] == \
+        [p.get_note() for p in expected.get_waypoint_list()]
+
+
+def test_open_gpx_zip_members(compressed_gpx_files):
+    archive = compressed_gpx_files['.zip']
+    assert list_gpx_members(archive) == ['day1.gpx', 'day2.gpx.gz']
+    assert list_gpx_members(compressed_gpx_files['.gz']) == [None]
+
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+    with open_gpx(archive, 'day2.gpx.gz') as f:
+        assert f.read() == content
+    with open_gpx(compressed_gpx_files['single.zip']) as f:
+        assert f.read() == content
+
+    with pytest.raises(ValueError):
+        with open_gpx(archive):
+            pass
+    with pytest.raises(ValueError):
+        with open_gpx(compressed_gpx_files['.gz'], 'day1.gpx'):
+            pass
+    with pytest.raises(FileNotFoundError):
+        with open_gpx('not_exist.gpx.gz'):
+            pass
+
+
+def test_iter_gpx_track_objects(compressed_gpx_files):
+    expected = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    track_objects = list(iter_gpx_track_objects(compressed_gpx_files['.zip']))
+
+    assert [member for member, _ in track_objects] == ['day1.gpx', 'day2.gpx.gz']
+    for _, track_object in track_objects:
+        assert [_point_tuple(p) for p in track_object.get_main_tracks()] == \
+            [_point_tuple(p) for p in expected.get_main_tracks()]
+    assert [member for member, _ in iter_gpx_track_objects(STANDARD_GPX_FILE)] == [None]
+
+
+def test_GpxParser_columnar_mode_time_offsets(tmp_path):
+    path = tmp_path / 'offsets.gpx'
+    path.write_text(
+        '<gpx><trk><trkseg>'
+        '<trkpt lat="24.1" lon="121.1"><time>2023-08-28T01:00:00.250Z</time></trkpt>'
+        '<trkpt lat="24.2" lon="121.2"><time>2023-08-28T09:00:01+08:00</time></trkpt>'
+        '<trkpt lat="24.3" lon="121.3"><time>2023-08-28T01:00:02.5Z</time></trkpt>'
+        '</trkseg></trk></gpx>'
+    )
+    columnar_points = GpxParser(str(path), mode='columnar').get_raw_track_object().get_main_tracks()
+    dom_points = GpxParser(str(path)).get_raw_track_object().get_main_tracks()
+
+    assert [p.time for p in columnar_points] == [p.time for p in dom_points] == [
+        datetime.datetime(2023, 8, 28, 9, 0, 0, 250000),
+        datetime.datetime(2023, 8, 28, 9, 0, 1),
+        datetime.datetime(2023, 8, 28, 9, 0, 2, 500000),
+    ]
+
+
+def write_segmented_gpx(path, segment_sizes):
+    """Write a GPX file of tracks named 'Day <n>', `segment_sizes` holds the point counts of their segments."""
+    start_time = datetime.datetime(2023, 8, 28, 0, 0, 0)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><gpx xmlns="http://www.topografix.com/GPX/1/1">']
+    point_index = 0
+    for track_index, sizes in enumerate(segment_sizes):
+        parts.append(f'<trk><name>Day {track_index + 1}</name>')
+        for size in sizes:
+            parts.append('<trkseg>')
+            for _ in range(size):
+                time = (start_time + datetime.timedelta(seconds=10 * point_index)).strftime('%Y-%m-%dT%H:%M:%SZ')
+                parts.append(
+                    f'<trkpt lat="{24.0 + point_index * 1e-4}" lon="{121.0 + point_index * 1e-4}">'
+                    f'<ele>{100 + point_index}</ele><time>{time}</time></trkpt>'
+                )
+                point_index += 1
+            parts.append('</trkseg>')
+        parts.append('</trk>')
+    parts.append('</gpx>')
+    path.write_text(''.join(parts))
+    return str(path)
+
+
+def test_GpxParser_segment_list(tmp_path):
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(10, 0, 8), (12,)])
+
+    expected = [
+        TrackSegment(0, 0, 0, 10, 'Day 1'),
+        TrackSegment(0, 2, 10, 18, 'Day 1'),
+        TrackSegment(1, 0, 18, 30, 'Day 2'),
+    ]
+    for mode in GpxParser.SUPPORTED_MODES:
+        raw_track_object = GpxParser(gpx_file, mode=mode).get_raw_track_object()
+        assert raw_track_object.get_segment_list() == expected
+        assert [len(frame) for frame in raw_track_object.get_segment_track_frames()] == [10, 8, 12]
+
+    # A file without trkseg structure around its points is a single segment
+    single = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    assert [(s.start, s.stop) for s in single.get_segment_list()] == \
+        [(0, len(single.get_main_tracks().get_main_tracks_points_list()))]
+
+
+@pytest.mark.parametrize("mode", ['dom', 'columnar'])
+def test_segment_list_covers_appended_points(tmp_path, mode):
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(10, 8)])
+    raw_track_object = GpxParser(gpx_file, mode=mode).get_raw_track_object()
+    assert [s.stop for s in raw_track_object.get_segment_list()] == [10, 18]
+
+    last_time = raw_track_object.get_track_point(17).time
+    for i in range(1, 4):
+        raw_track_object.add_track_point(RawTrkPoint(last_time + datetime.timedelta(seconds=10 * i), 24.1, 121.1, 100.0))
+    assert raw_track_object.get_segment_list() == [
+        TrackSegment(0, 0, 0, 10, 'Day 1'), TrackSegment(0, 1, 10, 21, 'Day 1')
+    ]
+    assert [len(frame) for frame in raw_track_object.get_segment_track_frames()] == [10, 11]
+
+
+def test_iter_gpx_segments(tmp_path):
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(10, 0, 8), (12,)])
+    frame = GpxParser(gpx_file, mode='columnar').get_raw_track_object().get_track_frame()
+
+    segments = list(iter_gpx_segments(gpx_file))
+    assert [(s.track_index, s.segment_index, s.track_name, len(s.track_frame)) for s in segments] == [
+        (0, 0, 'Day 1', 10), (0, 1, 'Day 1', 0), (0, 2, 'Day 1', 8), (1, 0, 'Day 2', 12)
+    ]
+    np.testing.assert_array_equal(segments[2].track_frame.lat, frame.lat[10:18])
+    np.testing.assert_array_equal(segments[3].track_frame.time, frame.time[18:])
+
+    assert [(s.track_index, s.segment_index) for s in iter_gpx_segments(gpx_file, track_index=0)] == \
+        [(0, 0), (0, 1), (0, 2)]
+    assert [(s.track_index, s.segment_index) for s in iter_gpx_segments(gpx_file, segment_index=0)] == \
+        [(0, 0), (1, 0)]
+
+
+def test_iter_gpx_segments_stops_after_selected_segment(tmp_path):
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(5,), (5,)])
+    # Damage the second track, which must not be parsed when only the first is selected
+    with open(gpx_file, 'a') as f:
+        f.write('<trk><trkseg><trkpt lat="invalid"')
+
+    selected = list(iter_gpx_segments(gpx_file, track_index=0, segment_index=0))
+    assert [(s.track_index, s.segment_index, len(s.track_frame)) for s in selected] == [(0, 0, 5)]
+    with pytest.raises(ElementTree.ParseError):
+        list(iter_gpx_segments(gpx_file))
+
+
+def _passes(point, time_range, bbox):
+    (start, end), (min_lat, min_lon, max_lat, max_lon) = time_range, bbox
+    return point.time is not None and start <= point.time <= end and \
+        min_lat <= point.lat <= max_lat and min_lon <= point.lon <= max_lon
+
+
+@pytest.mark.parametrize("mode", GpxParser.SUPPORTED_MODES)
+def test_GpxParser_point_filter(mode):
+    time_range = (datetime.datetime(2021, 8, 29, 13, 0, 0), datetime.datetime(2021, 8, 29, 15, 0, 0))
+    bbox = (24.58, 121.2, 24.6, 121.22)
+    unfiltered = GpxParser(STANDARD_GPX_FILE).get_raw_track_object()
+    filtered = GpxParser(STANDARD_GPX_FILE, mode=mode, time_range=time_range, bbox=bbox).get_raw_track_object()
+
+    expected_points = [_point_tuple(p) for p in unfiltered.get_main_tracks().get_main_tracks_points_list()
+                       if _passes(p, time_range, bbox)]
+    points = [_point_tuple(p) for p in filtered.get_main_tracks().get_main_tracks_points_list()]
+    assert 0 < len(points) < len(unfiltered.get_main_tracks().get_main_tracks_points_list())
+    assert points == expected_points
+    assert [_point_tuple(p) for p in filtered.get_waypoint_list()] == \
+        [_point_tuple(p) for p in unfiltered.get_waypoint_list() if _passes(p, time_range, bbox)]
+    assert sum(segment.get_point_count() for segment in filtered.get_segment_list()) == len(points)
+
+
+@pytest.mark.parametrize("mode", ['dom', 'stream'])
+def test_GpxParser_point_filter_creates_no_filtered_points(mode):
+    time_range = (datetime.datetime(2021, 8, 29, 13, 0, 0), None)
+    with patch('src.geoanalyzer.tracks.gps_parser.RawTrkPoint', wraps=RawTrkPoint) as point_class:
+        track_object = GpxParser(STANDARD_GPX_FILE, mode=mode, time_range=time_range).get_raw_track_object()
+    assert point_class.call_count == len(track_object.get_main_tracks().get_main_tracks_points_list()) > 0
+
+
+@pytest.mark.parametrize("mode", GpxParser.SUPPORTED_MODES)
+def test_GpxParser_point_filter_splits_segments(tmp_path, mode):
+    # The first track leaves the bounding box after 3 points and re-enters it after 6, the second lies outside
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(10,), (5,)])
+    bbox = (24.0, 121.0, 24.00095, 121.00095)
+    with open(gpx_file) as f:
+        content = f.read()
+    for i in (3, 4, 5):
+        content = content.replace(f'lat="{24.0 + i * 1e-4}"', 'lat="25.0"')
+    with open(gpx_file, 'w') as f:
+        f.write(content)
+
+    track_object = GpxParser(gpx_file, mode=mode, bbox=bbox).get_raw_track_object()
+    assert track_object.get_segment_list() == [
+        TrackSegment(0, 0, 0, 3, 'Day 1'), TrackSegment(0, 0, 3, 7, 'Day 1')
+    ]
+
+
+def test_GpxParser_invalid_point_filter():
+    with pytest.raises(ValueError):
+        GpxParser(STANDARD_GPX_FILE, time_range=(datetime.datetime(2021, 8, 30), datetime.datetime(2021, 8, 29)))
+    with pytest.raises(ValueError):
+        GpxParser(STANDARD_GPX_FILE, bbox=(25.0, 121.0, 24.0, 122.0))
+
+
+def test_GpxFollower_parses_appended_bytes(tmp_path):
+    with open(STANDARD_GPX_FILE, 'rb') as f:
+        content = f.read()
+    expected = GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+    live_file = tmp_path / "live.gpx"
+    live_file.write_bytes(b'')
+
+    follower = GpxFollower(str(live_file), read_size=4096)
+    frames, waypoints, offsets = [], [], []
+    for cut in range(0, len(content), 9973):
+        with open(live_file, 'ab') as f:
+            f.write(content[cut:cut + 9973])
+        update = follower.poll()
+        frames.append(update.track_frame)
+        waypoints.extend(update.waypoints)
+        offsets.append(update.offset)
+        if cut == 0:
+            # The unterminated document cannot be parsed as a whole
+            with pytest.raises(ExpatError):
+                parse_gpx(str(live_file))
+
+    assert offsets == [min(cut + 9973, len(content)) for cut in range(0, len(content), 9973)]
+    frame = TrackFrame.concat(frames)
+    for name in frame.get_column_names():
+        np.testing.assert_array_equal(frame.get_column(name), expected.get_track_frame().get_column(name))
+    assert [_point_tuple(p) + (p.get_note(),) for p in waypoints] == \
+        [_point_tuple(p) + (p.get_note(),) for p in expected.get_waypoint_list()]
+    assert follower.get_segment_list() == expected.get_segment_list()
+    assert len(follower.poll().track_frame) == 0
+
+
+def test_GpxFollower_waits_for_complete_track_points(tmp_path):
+    gpx_file = write_segmented_gpx(tmp_path / "segments.gpx", [(3, 2)])
+    with open(gpx_file, 'rb') as f:
+        content = f.read()
+    live_file = tmp_path / "live.gpx"
+    # Cut the file in the middle of the fourth track point, which starts the second segment
+    cut = content.index(b'<trkpt', content.index(b'</trkseg>')) + 20
+    live_file.write_bytes(content[:cut])
+
+    follower = GpxFollower(str(live_file))
+    first = follower.poll()
+    assert len(first.track_frame) == 3
+    assert first.segment_list == [TrackSegment(0, 0, 0, 3, 'Day 1')]
+
+    with open(live_file, 'ab') as f:
+        f.write(content[cut:])
+    second = follower.poll()
+    assert len(second.track_frame) == 2
+    assert second.segment_list == [TrackSegment(0, 1, 0, 2, 'Day 1')]
+    assert follower.get_segment_list() == GpxParser(gpx_file).get_raw_track_object().get_segment_list()
+
+    live_file.write_bytes(content[:10])
+    with pytest.raises(ValueError):
+        follower.poll()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geoanalyzer.tracks.partitioned_analysis import (
+    _PartitionScan, analyze_segment_frame_partitioned, join_partition_scans
+)
+from src.geoanalyzer.tracks.rest_point_engine import RestRunScanner
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer, analyze_segment_frame
+from tests.track_factories import MockTrackObject, generate_hiking_frame, rest_tuples, synthetic_analyzed_frame
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("partition_size", [1, 13, 250, 1000])
+def test_joined_partition_scans_match_single_scan(seed, partition_size):
+    analyzed_frame = synthetic_analyzed_frame(seed)
+    scanner = RestRunScanner()
+    scanner.feed(analyzed_frame)
+
+    partition_starts = list(range(0, len(analyzed_frame), partition_size))
+    partition_scans = []
+    for start in partition_starts:
+        partition_scanner = RestRunScanner(record_positions=True)
+        partition_scanner.feed(analyzed_frame.slice(start, start + partition_size))
+        partition_scans.append(_PartitionScan(partition_scanner.pop_closed_rests(), partition_scanner))
+
+    assert join_partition_scans(analyzed_frame, partition_starts, partition_scans) == scanner.get_closed_rests()
+
+
+@pytest.mark.parametrize("partition_size", [37, 1000])
+def test_partitioned_analysis_matches_serial(partition_size):
+    raw_frame = generate_hiking_frame(5, 3000)
+    expected_frame, expected_rest_points = analyze_segment_frame(raw_frame)
+
+    analyzed_frame, rest_points = analyze_segment_frame_partitioned(raw_frame, 2, partition_size=partition_size)
+    for name in expected_frame.get_column_names():
+        np.testing.assert_array_equal(analyzed_frame.get_column(name), expected_frame.get_column(name))
+    assert rest_tuples(rest_points) == rest_tuples(expected_rest_points)
+
+
+def test_track_analyzer_partition_workers():
+    track_object = MockTrackObject(generate_hiking_frame(6, 1500).to_points(RawTrkPoint))
+    expected = TrackAnalyzer(track_object)
+    partitioned = TrackAnalyzer(track_object, partition_workers=2, partition_size=400)
+
+    np.testing.assert_array_equal(
+        partitioned.get_analyzed_track_object().get_track_frame().get_column('speed_xy'),
+        expected.get_analyzed_track_object().get_track_frame().get_column('speed_xy')
+    )
+    assert rest_tuples(partitioned.get_rest_point_list()) == rest_tuples(expected.get_rest_point_list())
+
+    with pytest.raises(ValueError):
+        TrackAnalyzer(track_object, partition_workers=2, chunk_size=100)
+    with pytest.raises(ValueError):
+        TrackAnalyzer(track_object, partition_workers=2, rest_point_engine='state_machine')
+    with pytest.raises(ValueError):
+        analyze_segment_frame_partitioned(generate_hiking_frame(6, 100), 0)
+
+
+def test_partitioned_analysis_geodesic_mode():
+    raw_frame = generate_hiking_frame(7, 1500)
+    expected_frame, expected_rest_points = analyze_segment_frame(raw_frame, geodesic_mode='haversine')
+
+    analyzed_frame, rest_points = analyze_segment_frame_partitioned(
+        raw_frame, 2, partition_size=400, geodesic_mode='haversine'
+    )
+    np.testing.assert_array_equal(analyzed_frame.get_column('dx'), expected_frame.get_column('dx'))
+    assert rest_tuples(rest_points) == rest_tuples(expected_rest_points)
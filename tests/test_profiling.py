@@ -0,0 +1,100 @@
+import pstats
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from src.cli import main
+from src.instrumentation.profiling import Profiler, get_active_profiler, span
+
+STANDARD_GPX_FILE = "standard_test_data/2021-08-29-06.21.16.gpx"
+
+
+def test_span_without_profiler_does_nothing():
+    assert get_active_profiler() is None
+    with span('stage'):
+        pass
+    assert get_active_profiler() is None
+
+
+def test_nested_spans_are_recorded_by_path():
+    with Profiler() as profiler:
+        assert get_active_profiler() is profiler
+        for _ in range(3):
+            with span('outer'):
+                with span('inner'):
+                    pass
+        with span('other'):
+            pass
+    assert get_active_profiler() is None
+
+    records = {record.path: record for record in profiler.get_records()}
+    assert list(records) == ['outer', 'outer/inner', 'other']
+    assert records['outer'].calls == 3
+    assert records['outer/inner'].depth == 1
+    assert records['outer'].elapsed >= records['outer/inner'].elapsed
+    assert 'inner' in profiler.format_table()
+
+
+def test_span_is_closed_on_error():
+    with Profiler() as profiler:
+        with pytest.raises(RuntimeError):
+            with span('failing'):
+                raise RuntimeError
+        with span('next'):
+            pass
+
+    assert [record.path for record in profiler.get_records()] == ['failing', 'next']
+
+
+def test_spans_of_other_threads_are_ignored():
+    def worker():
+        with span('worker'):
+            pass
+
+    with Profiler() as profiler:
+        with span('main'):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+    assert [record.path for record in profiler.get_records()] == ['main']
+
+
+def test_memory_tracing():
+    with Profiler(trace_memory=True) as profiler:
+        with span('allocate'):
+            data = [bytearray(1024) for _ in range(1000)]
+            with span('temporary'):
+                temporary = bytearray(4 * 2 ** 20)
+                del temporary
+    del data
+
+    records = {record.path: record for record in profiler.get_records()}
+    assert records['allocate'].memory_net >= 1000 * 1024
+    assert records['allocate/temporary'].memory_peak > 3 * 2 ** 20
+    assert records['allocate'].memory_peak >= records['allocate/temporary'].memory_peak
+    assert 'peak (MB)' in profiler.format_table()
+
+
+def test_dump_without_recording_raises(tmp_path):
+    with Profiler() as profiler:
+        pass
+    with pytest.raises(ValueError):
+        profiler.dump_cprofile(str(tmp_path / 'run.prof'))
+    with pytest.raises(ValueError):
+        profiler.dump_tracemalloc(str(tmp_path / 'memory.txt'))
+
+
+def test_cli_profile_output(tmp_path):
+    stats_file = tmp_path / 'run.prof'
+    result = CliRunner().invoke(main, [
+        '--gpx-file', STANDARD_GPX_FILE,
+        '--output-map', str(tmp_path / 'map.html'),
+        '--cprofile-output', str(stats_file),
+    ])
+
+    assert result.exit_code == 0
+    for stage in ('parse_gpx', 'analyze', 'smoothing', 'rest_points', 'map', 'save'):
+        assert stage in result.output
+    assert pstats.Stats(str(stats_file)).total_calls > 0
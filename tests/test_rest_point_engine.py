@@ -0,0 +1,45 @@
+import pytest
+
+from src.geo_objects.geo_tracks.analyzed_geo_tracks import AnalyzedTracks
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.geoanalyzer.tracks.rest_point_engine import RestRunScanner, find_rest_point_rle, merge_rest_events
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer, find_rest_point
+from tests.track_factories import rest_tuples, synthetic_analyzed_frame
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_rle_engine_matches_state_machine(seed):
+    analyzed_frame = synthetic_analyzed_frame(seed)
+    points = AnalyzedTracks.from_track_frame(analyzed_frame).get_main_tracks_points_list()
+
+    expected = rest_tuples(find_rest_point(points))
+    assert len(expected) > 0
+    assert rest_tuples(find_rest_point_rle(analyzed_frame)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 500])
+def test_scanner_chunked_feed_matches_single_feed(chunk_size):
+    analyzed_frame = synthetic_analyzed_frame(42)
+
+    scanner = RestRunScanner()
+    for start in range(0, len(analyzed_frame), chunk_size):
+        scanner.feed(analyzed_frame.slice(start, start + chunk_size))
+
+    assert rest_tuples(merge_rest_events(scanner.get_closed_rests())) == \
+        rest_tuples(find_rest_point_rle(analyzed_frame))
+
+
+def test_rle_engine_matches_state_machine_on_standard_data():
+    raw_track_object = GpxParser("standard_test_data/2021-08-29-06.21.16.gpx").get_raw_track_object()
+
+    state_machine_rest_points = TrackAnalyzer(raw_track_object, rest_point_engine='state_machine').get_rest_point_list()
+    rle_rest_points = TrackAnalyzer(raw_track_object, rest_point_engine='rle').get_rest_point_list()
+
+    assert len(rle_rest_points) > 0
+    assert rest_tuples(rle_rest_points) == rest_tuples(state_machine_rest_points)
+
+
+def test_invalid_rest_point_engine():
+    raw_track_object = GpxParser("standard_test_data/2021-08-29-06.21.16.gpx").get_raw_track_object()
+    with pytest.raises(ValueError):
+        TrackAnalyzer(raw_track_object, rest_point_engine='kmeans')
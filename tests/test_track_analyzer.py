@@ -1,17 +1,16 @@
 import pytest, math
+import numpy as np
 from datetime import datetime, timedelta
 from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
 from src.geo_objects.geo_points.analyzed_geo_points import AnalyzedTrkPoint
-from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
 from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer, smoothing_tracks, find_rest_point, sum_numeric_deltas, sum_timedelta_deltas
-from src.geoanalyzer.tracks.track_analyzer import do_analyzing
-
-
-class MockTrackObject(RawTrackObject):
-    def __init__(self, points):
-        super().__init__()
-        for point in points:
-            self.add_track_point(point)
+from src.geoanalyzer.tracks.track_analyzer import do_analyzing, analyze_track_frame, analyze_segment_frame
+from src.geoanalyzer.tracks.track_analyzer import OnlineTrackAnalyzer
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.instrumentation.profiling import Profiler
+from tests.track_factories import MockTrackObject, generate_hiking_frame, rest_tuples
 
 
 def generate_mock_track_points(num_points, start_lat, start_lon, lat_increment, lon_increment, start_time, time_increment_sec):
@@ -80,11 +79,10 @@ def test_find_rest_point(mock_analyzed_track_points):
     # Add specific assertions based on expected rest points characteristics
 
 
-@pytest.mark.xfail(reason="TrackAnalyzer not designed to handle empty track object input.")
 def test_error_handling_with_empty_input():
     mock_track_points = []  # Empty list of points
     mock_track_object = MockTrackObject(mock_track_points)
-    with pytest.raises(ValueError):
+    with pytest.raises(ValueError, match="Input track object is empty."):
         TrackAnalyzer(mock_track_object)
 
 #
@@ -115,3 +113,312 @@ def test_error_handling_with_empty_input():
 #         assert math.isclose(point.dy, expected_delta_y, abs_tol=0.1), "Delta Y calculation mismatch."
 #         assert math.isclose(point.dt, expected_delta_t, abs_tol=0.1), "Delta T calculation mismatch."
 
+
+
+def legacy_do_analyzing(points):
+    """Reference of the former per-point analyzing loop, returning (time, dx, dy, dz, dt) tuples."""
+    analyzed = []
+    for i in range(len(points) - 2):
+        segment = points[i:i + 3]
+        analyzed.append((
+            segment[1].time,
+            sum_numeric_deltas([p.lon for p in segment]) / 2 * 101751,
+            sum_numeric_deltas([p.lat for p in segment]) / 2 * 110757,
+            sum_numeric_deltas([p.elev for p in segment]) / 2,
+            sum_timedelta_deltas([p.time for p in segment]) / 2,
+        ))
+    return analyzed
+
+
+def test_do_analyzing_matches_per_point_loop():
+    start_time = datetime(2023, 8, 28, 8, 0, 0)
+    points = [
+        RawTrkPoint(start_time + timedelta(seconds=3 * i + (i % 4)), 24.6 + math.sin(i) * 1e-4, 121.2 + i * 1e-5, 1500 + i % 7)
+        for i in range(50)
+    ]
+    analyzed_points = do_analyzing(points).get_main_tracks().get_main_tracks_points_list()
+
+    assert len(analyzed_points) == len(points) - 2
+    assert [
+        (p.time, p.get_delta_x(), p.get_delta_y(), p.get_delta_z(), p.get_point_delta_time()) for p in analyzed_points
+    ] == legacy_do_analyzing(points)
+    for p in analyzed_points:
+        assert p.get_speed_xy() == math.sqrt(math.pow(p.get_delta_x(), 2) + math.pow(p.get_delta_y(), 2)) / p.get_point_delta_time()
+        assert p.get_speed_z() == p.get_delta_z() / p.get_point_delta_time()
+
+
+# The rest points of the standard test track found by the original per-point analysis: start, end, lat, lon
+BASELINE_REST_POINTS = [
+    ('06:40:53', '06:42:48', 24.6315851, 121.1673859),
+    ('06:46:38', '06:51:49', 24.6314213, 121.1684332),
+    ('07:17:55', '07:25:23', 24.6294918, 121.1749450),
+    ('07:56:25', '08:19:26', 24.6319457, 121.1843750),
+    ('08:45:48', '08:49:40', 24.6283268, 121.1930038),
+    ('09:31:39', '09:50:04', 24.6201740, 121.2027992),
+    ('10:16:10', '10:19:48', 24.6169822, 121.2083078),
+    ('10:30:34', '10:38:16', 24.6156094, 121.2085472),
+    ('11:18:50', '11:26:21', 24.6085114, 121.2120284),
+    ('12:14:35', '13:03:58', 24.6018878, 121.2179306),
+    ('13:14:36', '13:28:32', 24.6001016, 121.2201657),
+    ('13:43:27', '13:46:03', 24.5956967, 121.2181118),
+    ('13:53:54', '14:04:55', 24.5947828, 121.2164790),
+    ('14:10:13', '14:14:57', 24.5938876, 121.2144076),
+    ('14:26:36', '14:40:47', 24.5929126, 121.2113127),
+    ('15:02:20', '15:47:21', 24.5880261, 121.2083961),
+    ('16:48:26', '16:51:21', 24.5839477, 121.1937104),
+    ('17:59:10', '18:11:23', 24.5908265, 121.1789000),
+    ('18:49:37', '18:52:30', 24.5988687, 121.1795401),
+    ('19:14:55', '19:19:56', 24.6029116, 121.1766548),
+    ('19:59:47', '20:06:10', 24.6082091, 121.1659806),
+    ('20:41:45', '20:44:42', 24.6114117, 121.1600694),
+]
+
+
+@pytest.mark.parametrize("engine", ['rle', 'state_machine'])
+def test_default_analysis_matches_baseline_rest_points(engine):
+    raw_track_object = GpxParser("standard_test_data/2021-08-29-06.21.16.gpx").get_raw_track_object()
+    rest_points = TrackAnalyzer(raw_track_object, rest_point_engine=engine).get_rest_point_list()
+    assert [
+        (p.get_start_time().strftime('%H:%M:%S'), p.get_end_time().strftime('%H:%M:%S'), round(p.lat, 7), round(p.lon, 7))
+        for p in rest_points
+    ] == BASELINE_REST_POINTS
+
+
+def test_analyze_track_frame_columns(mock_track_points):
+    frame = analyze_track_frame(TrackFrame.from_points(mock_track_points))
+    for column in ('dx', 'dy', 'dz', 'dt', 'speed_x', 'speed_y', 'speed_z', 'speed_xy'):
+        assert len(frame.get_column(column)) == len(mock_track_points) - 2
+    assert np.all(frame.get_column('dt') == 60)
+    assert len(analyze_track_frame(TrackFrame.from_points(mock_track_points[:2]))) == 0
+
+
+@pytest.fixture
+def two_segment_track_object():
+    """Two segments of 20 points, the second starts two hours later where the first ended."""
+    start_time = datetime(2023, 8, 28, 8, 0, 0)
+    points = generate_mock_track_points(20, 24.0, 121.0, 1e-4, 1e-4, start_time, 10)
+    points += generate_mock_track_points(20, 24.0019, 121.0019, 1e-4, 1e-4, start_time + timedelta(hours=2), 10)
+    track_object = MockTrackObject(points)
+    track_object.set_segment_list([TrackSegment(0, 0, 0, 20), TrackSegment(0, 1, 20, 40)])
+    return track_object
+
+
+@pytest.mark.parametrize("engine", ['rle', 'state_machine'])
+def test_segments_are_analyzed_independently(two_segment_track_object, engine):
+    analyzer = TrackAnalyzer(two_segment_track_object, rest_point_engine=engine, segment_workers=1)
+    analyzed_track_object = analyzer.get_analyzed_track_object()
+
+    # The two hour gap between the segments is neither a movement nor a rest
+    assert analyzer.get_rest_point_list() == []
+    assert analyzed_track_object.get_segment_list() == [TrackSegment(0, 0, 0, 14), TrackSegment(0, 1, 14, 28)]
+    for raw_frame, analyzed_frame in zip(
+            two_segment_track_object.get_segment_track_frames(), analyzed_track_object.get_segment_track_frames()
+    ):
+        expected_frame, _ = analyze_segment_frame(raw_frame, rest_point_engine=engine)
+        for name in expected_frame.get_column_names():
+            np.testing.assert_array_equal(analyzed_frame.get_column(name), expected_frame.get_column(name))
+
+    # Without the segments the gap is analyzed as one long rest
+    single_segment = MockTrackObject(two_segment_track_object.get_main_tracks().get_main_tracks_points_list())
+    assert len(TrackAnalyzer(single_segment, rest_point_engine=engine).get_rest_point_list()) == 1
+
+
+def test_parallel_segment_analysis_matches_serial(two_segment_track_object):
+    serial = TrackAnalyzer(two_segment_track_object).get_analyzed_track_object()
+    parallel = TrackAnalyzer(two_segment_track_object, segment_workers=4).get_analyzed_track_object()
+
+    assert parallel.get_segment_list() == serial.get_segment_list()
+    for name in serial.get_track_frame().get_column_names():
+        np.testing.assert_array_equal(parallel.get_track_frame().get_column(name), serial.get_track_frame().get_column(name))
+    with pytest.raises(ValueError):
+        TrackAnalyzer(two_segment_track_object, segment_workers=0)
+
+
+def test_segments_are_profiled_by_default(two_segment_track_object):
+    with Profiler() as profiler:
+        TrackAnalyzer(two_segment_track_object)
+    records = {record.path: record for record in profiler.get_records()}
+    assert records['smoothing'].calls == records['rest_points'].calls == 2
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("chunk_size", [1, 7, 500])
+def test_online_analyzer_matches_batch(seed, chunk_size):
+    raw_frame = generate_hiking_frame(seed)
+    expected_frame, expected_rest_points = analyze_segment_frame(raw_frame)
+    assert expected_rest_points
+
+    online = OnlineTrackAnalyzer()
+    rest_points, analyzed_frames = [], []
+    for start in range(0, len(raw_frame), chunk_size):
+        chunk = raw_frame.slice(start, start + chunk_size)
+        rest_points += online.push_many(chunk.lat, chunk.lon, chunk.elev, chunk.time)
+        analyzed_frames.append(online.get_last_analyzed_frame())
+    rest_points += online.close()
+
+    assert online.get_point_count() == len(raw_frame)
+    assert online.get_analyzed_point_count() == len(expected_frame)
+    analyzed_frame = TrackFrame.concat(analyzed_frames)
+    for name in expected_frame.get_column_names():
+        np.testing.assert_array_equal(analyzed_frame.get_column(name), expected_frame.get_column(name))
+    assert rest_tuples(rest_points) == rest_tuples(expected_rest_points)
+
+
+def generate_two_stop_frame(day_gap):
+    """Two 5 minute stops 100 m apart, walked between in 100 s, optionally with a day passing during the walk."""
+    lon_step = np.concatenate((np.zeros(60), np.full(20, 5.0), np.zeros(60), np.full(40, 5.0))) / 101751
+    rng = np.random.default_rng(0)
+    lon = 121.0 + np.cumsum(lon_step) + rng.normal(0, 1e-6, len(lon_step))
+    lat = 24.0 + rng.normal(0, 1e-6, len(lon_step))
+    time = np.datetime64('2023-08-28T17:00:00', 'us') + np.arange(len(lon_step)) * np.timedelta64(5, 's')
+    if day_gap:
+        time[72:] += np.timedelta64(1, 'D')
+    return TrackFrame(lat, lon, np.full(len(lon_step), 500.0), time)
+
+
+@pytest.mark.parametrize("day_gap", [False, True])
+def test_rest_points_a_day_apart_are_not_merged(day_gap):
+    raw_frame = generate_two_stop_frame(day_gap)
+    _, expected_rest_points = analyze_segment_frame(raw_frame)
+    # The second stop starts 90 s after the first one ends, and a day and 90 s later with the day gap
+    assert len(expected_rest_points) == (2 if day_gap else 1)
+    _, state_machine_rest_points = analyze_segment_frame(raw_frame, rest_point_engine='state_machine')
+    assert rest_tuples(state_machine_rest_points) == rest_tuples(expected_rest_points)
+
+    online = OnlineTrackAnalyzer()
+    rest_points = []
+    for start in range(0, len(raw_frame), 7):
+        chunk = raw_frame.slice(start, start + 7)
+        rest_points += online.push_many(chunk.lat, chunk.lon, chunk.elev, chunk.time)
+    rest_points += online.close()
+    assert rest_tuples(rest_points) == rest_tuples(expected_rest_points)
+
+
+def test_online_analyzer_emits_rest_points_once_final():
+    raw_frame = generate_hiking_frame(3)
+    _, expected_rest_points = analyze_segment_frame(raw_frame)
+
+    online = OnlineTrackAnalyzer()
+    rest_points = []
+    for point in raw_frame.to_points(RawTrkPoint):
+        for rest_point in online.push(point):
+            # A rest point is final 120 s after its end at the latest, the window delays the points by 3
+            assert rest_point.get_end_time() <= point.time
+            assert point.time - rest_point.get_end_time() <= timedelta(seconds=120 + 3 * 5)
+            rest_points.append(rest_point)
+    rest_points += online.close()
+    assert rest_tuples(rest_points) == rest_tuples(expected_rest_points)
+
+
+def test_online_analyzer_segments(two_segment_track_object):
+    expected = TrackAnalyzer(two_segment_track_object, segment_workers=1).get_analyzed_track_object()
+
+    online = OnlineTrackAnalyzer()
+    analyzed_frames = []
+    for raw_frame in two_segment_track_object.get_segment_track_frames():
+        online.start_segment()
+        online.push_many(raw_frame.lat, raw_frame.lon, raw_frame.elev, raw_frame.time)
+        analyzed_frames.append(online.get_last_analyzed_frame())
+
+    assert online.close() == []
+    np.testing.assert_array_equal(TrackFrame.concat(analyzed_frames).lat, expected.get_track_frame().lat)
+
+
+def test_online_analyzer_invalid_options():
+    with pytest.raises(ValueError):
+        OnlineTrackAnalyzer(smoothing_kernel='triangle')
+    with pytest.raises(ValueError):
+        OnlineTrackAnalyzer(smoothing_window=4)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 50, 333, 5000])
+def test_chunked_analysis_matches_whole_segments(chunk_size):
+    track_object = MockTrackObject(generate_hiking_frame(4).to_points(RawTrkPoint))
+    track_object.set_segment_list([TrackSegment(0, 0, 0, 1200), TrackSegment(0, 1, 1200, 2000)])
+    expected = TrackAnalyzer(track_object, segment_workers=1)
+
+    chunked = TrackAnalyzer(track_object, segment_workers=1, chunk_size=chunk_size)
+    expected_frame = expected.get_analyzed_track_object().get_track_frame()
+    chunked_frame = chunked.get_analyzed_track_object().get_track_frame()
+    for name in expected_frame.get_column_names():
+        np.testing.assert_array_equal(chunked_frame.get_column(name), expected_frame.get_column(name))
+    assert chunked.get_analyzed_track_object().get_segment_list() == \
+        expected.get_analyzed_track_object().get_segment_list()
+    assert rest_tuples(chunked.get_rest_point_list()) == rest_tuples(expected.get_rest_point_list())
+    assert chunked.get_track_statistics().point_count == expected.get_track_statistics().point_count
+    np.testing.assert_allclose(chunked.get_track_statistics()[1:], expected.get_track_statistics()[1:])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100])
+def test_chunked_analysis_matches_whole_segments_over_days(chunk_size):
+    # Two days of walking in one segment, with stops a day apart which must not be merged
+    raw_frame = TrackFrame.concat([generate_two_stop_frame(day_gap=True), generate_hiking_frame(5, 500)])
+    raw_frame.time[-500:] += np.timedelta64(2, 'D')
+    track_object = MockTrackObject(raw_frame.to_points(RawTrkPoint))
+    expected = TrackAnalyzer(track_object)
+    assert len(expected.get_rest_point_list()) > 2
+
+    chunked = TrackAnalyzer(track_object, chunk_size=chunk_size)
+    assert rest_tuples(chunked.get_rest_point_list()) == rest_tuples(expected.get_rest_point_list())
+    np.testing.assert_array_equal(
+        chunked.get_analyzed_track_object().get_track_frame().lat, expected.get_analyzed_track_object().get_track_frame().lat
+    )
+    with pytest.raises(ValueError):
+        TrackAnalyzer(track_object, chunk_size=chunk_size, rest_point_engine='state_machine')
+
+
+def test_chunked_analysis_without_analyzed_points(two_segment_track_object):
+    expected = TrackAnalyzer(two_segment_track_object)
+    chunked = TrackAnalyzer(two_segment_track_object, chunk_size=8, keep_analyzed_points=False)
+
+    assert len(chunked.get_analyzed_track_object().get_track_frame()) == 0
+    assert chunked.get_track_statistics().point_count == 28
+    np.testing.assert_allclose(chunked.get_track_statistics()[1:], expected.get_track_statistics()[1:])
+    with pytest.raises(ValueError):
+        TrackAnalyzer(two_segment_track_object, chunk_size=0)
+
+
+def test_analyzer_stores_cumulative_distances(two_segment_track_object):
+    analyzed_track_object = TrackAnalyzer(two_segment_track_object).get_analyzed_track_object()
+    analyzed_frame = analyzed_track_object.get_track_frame()
+
+    steps = np.hypot(analyzed_frame.get_column('dx'), analyzed_frame.get_column('dy'))
+    np.testing.assert_allclose(analyzed_frame.get_column('integral_dst'), np.cumsum(steps))
+    # The two hour gap between the segments adds no distance
+    assert analyzed_track_object.get_total_integral_distance() == pytest.approx(steps.sum())
+    assert analyzed_track_object.get_distance_index().get_distance(13, 14) == pytest.approx(steps[14])
+
+
+def test_analyzer_fills_every_hour_first_points(two_segment_track_object):
+    analyzed_track_object = TrackAnalyzer(two_segment_track_object).get_analyzed_track_object()
+    analyzed_frame = analyzed_track_object.get_track_frame()
+
+    hours = analyzed_frame.time.astype('datetime64[h]')
+    expected = [analyzed_frame.time[i].item() for i in np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])]
+    assert [point.time for point in analyzed_track_object.get_every_hour_first_point_list()] == expected
+    assert len(expected) >= 2
+
+
+@pytest.mark.parametrize("geodesic_mode", ['equirectangular', 'haversine', 'legacy'])
+def test_geodesic_modes_are_used_by_every_analysis_path(geodesic_mode):
+    raw_frame = generate_hiking_frame(6)
+    track_object = MockTrackObject(raw_frame.to_points(RawTrkPoint))
+    expected = TrackAnalyzer(track_object, geodesic_mode=geodesic_mode)
+    expected_frame = expected.get_analyzed_track_object().get_track_frame()
+    ellipsoidal_frame = TrackAnalyzer(track_object, geodesic_mode='ellipsoidal').get_analyzed_track_object().get_track_frame()
+    # The sphere and the fixed lengths of a degree differ from the ellipsoid by a few tenths of a percent at 24 degrees
+    assert not np.array_equal(expected_frame.get_column('dx'), ellipsoidal_frame.get_column('dx'))
+    np.testing.assert_allclose(expected_frame.get_column('speed_xy'), ellipsoidal_frame.get_column('speed_xy'), rtol=5e-3)
+
+    for analyzer in (
+            TrackAnalyzer(track_object, geodesic_mode=geodesic_mode, rest_point_engine='state_machine'),
+            TrackAnalyzer(track_object, geodesic_mode=geodesic_mode, chunk_size=333),
+    ):
+        analyzed_frame = analyzer.get_analyzed_track_object().get_track_frame()
+        np.testing.assert_array_equal(analyzed_frame.get_column('dx'), expected_frame.get_column('dx'))
+        assert rest_tuples(analyzer.get_rest_point_list()) == rest_tuples(expected.get_rest_point_list())
+
+    with pytest.raises(ValueError):
+        TrackAnalyzer(track_object, geodesic_mode='flat')
+    with pytest.raises(ValueError):
+        OnlineTrackAnalyzer(geodesic_mode='flat')
@@ -0,0 +1,169 @@
+import datetime
+import os
+import shutil
+from unittest import mock
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from src.cli import main
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+from src.geoanalyzer.tracks import track_cache
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
+from src.geoanalyzer.tracks.track_cache import CachedTrack, TrackCache, hash_file, load_track_analyzer, make_cache_key
+
+STANDARD_GPX_FILE = "standard_test_data/2021-08-29-06.21.16.gpx"
+
+
+def point_tuples(points):
+    return [(p.time, p.lat, p.lon, p.elev) for p in points]
+
+
+@pytest.fixture
+def gpx_file(tmp_path):
+    path = tmp_path / 'track.gpx'
+    shutil.copy(STANDARD_GPX_FILE, path)
+    return str(path)
+
+
+def test_warm_load_equals_cold_load(gpx_file, tmp_path):
+    cache = TrackCache(str(tmp_path / 'cache'))
+    cold, cold_hit = load_track_analyzer(gpx_file, cache)
+    with mock.patch.object(track_cache, 'GpxParser') as parser, \
+            mock.patch.object(TrackAnalyzer, '__init__', side_effect=AssertionError):
+        warm, warm_hit = load_track_analyzer(gpx_file, cache)
+    parser.assert_not_called()
+
+    assert (cold_hit, warm_hit) == (False, True)
+    assert len(cache.get_entries()) == 1
+    cold_points = cold.get_main_track().get_main_tracks_points_list()
+    warm_points = warm.get_main_track().get_main_tracks_points_list()
+    assert point_tuples(warm_points) == point_tuples(cold_points)
+    assert [(p.get_delta_x(), p.get_delta_z(), p.get_point_delta_time()) for p in warm_points] == \
+        [(p.get_delta_x(), p.get_delta_z(), p.get_point_delta_time()) for p in cold_points]
+    assert [(p.get_start_time(), p.get_end_time()) for p in warm.get_rest_point_list()] == \
+        [(p.get_start_time(), p.get_end_time()) for p in cold.get_rest_point_list()]
+    assert point_tuples(warm.get_rest_point_list()) == point_tuples(cold.get_rest_point_list())
+    assert [(p.get_note(), *t) for p, t in zip(warm.get_waypoint_list(), point_tuples(warm.get_waypoint_list()))] == \
+        [(p.get_note(), *t) for p, t in zip(cold.get_waypoint_list(), point_tuples(cold.get_waypoint_list()))]
+
+
+def test_cached_track_keeps_segments():
+    raw_track_object = GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+    point_count = len(raw_track_object.get_track_frame())
+    raw_track_object.set_segment_list([TrackSegment(0, 0, 0, 100, 'Day 1'), TrackSegment(1, 0, 100, point_count)])
+    analyzer = TrackAnalyzer(raw_track_object)
+
+    loaded = CachedTrack.from_arrays(CachedTrack(raw_track_object, analyzer).to_arrays())
+    assert loaded.raw_track_object.get_segment_list() == raw_track_object.get_segment_list()
+    assert loaded.track_analyzer.get_analyzed_track_object().get_segment_list() == \
+        analyzer.get_analyzed_track_object().get_segment_list()
+
+
+def test_key_depends_on_content_and_params(gpx_file, tmp_path):
+    content_hash = hash_file(gpx_file)
+    copy = tmp_path / 'copy.gpx'
+    shutil.copy(gpx_file, copy)
+    assert hash_file(str(copy)) == content_hash
+    assert make_cache_key(content_hash, {'rest_engine': 'rle'}) != make_cache_key(content_hash, {})
+
+    cache = TrackCache(str(tmp_path / 'cache'))
+    load_track_analyzer(gpx_file, cache)
+    assert load_track_analyzer(str(copy), cache)[1]
+
+    with open(gpx_file, 'a') as f:
+        f.write('\n')
+    assert not load_track_analyzer(gpx_file, cache)[1]
+    assert len(cache.get_entries()) == 2
+
+
+def test_point_filter_is_part_of_key(gpx_file, tmp_path):
+    cache = TrackCache(str(tmp_path / 'cache'))
+    time_range = (datetime.datetime(2021, 8, 29, 13, 0, 0), datetime.datetime(2021, 8, 29, 15, 0, 0))
+    full, _ = load_track_analyzer(gpx_file, cache)
+    filtered, filtered_hit = load_track_analyzer(gpx_file, cache, time_range=time_range)
+    _, warm_hit = load_track_analyzer(gpx_file, cache, time_range=time_range)
+
+    assert (filtered_hit, warm_hit) == (False, True)
+    assert len(cache.get_entries()) == 2
+    points = filtered.get_main_track().get_main_tracks_points_list()
+    assert 0 < len(points) < len(full.get_main_track().get_main_tracks_points_list())
+    assert all(time_range[0] <= p.time <= time_range[1] for p in points)
+
+
+def test_evicts_least_recently_used_entries(gpx_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cached_track = CachedTrack(GpxParser(gpx_file).get_raw_track_object(), None)
+    cached_track.track_analyzer = TrackAnalyzer(cached_track.raw_track_object)
+    TrackCache(cache_dir).put('probe', cached_track)
+    entry_size = TrackCache(cache_dir).get_total_size()
+
+    cache = TrackCache(cache_dir, size_limit=3 * entry_size)
+    cache.clear()
+    for age, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, cached_track)
+        os.utime(os.path.join(cache_dir, key + '.npz'), (1000 + age, 1000 + age))
+    assert cache.get('a') is not None  # 'a' becomes the most recently used entry
+
+    cache.put('d', cached_track)
+
+    assert sorted(os.path.basename(path) for path, _, _ in cache.get_entries()) == ['a.npz', 'c.npz', 'd.npz']
+    assert cache.get_total_size() <= 3 * entry_size
+
+
+def test_damaged_entry_is_a_miss(gpx_file, tmp_path):
+    cache = TrackCache(str(tmp_path / 'cache'))
+    load_track_analyzer(gpx_file, cache)
+    (entry_path, _, _), = cache.get_entries()
+    with open(entry_path, 'wb') as f:
+        f.write(b'not a cache entry')
+
+    assert not load_track_analyzer(gpx_file, cache)[1]
+    assert load_track_analyzer(gpx_file, cache)[1]
+
+
+def test_entry_holds_no_pickled_objects(gpx_file, tmp_path):
+    cache = TrackCache(str(tmp_path / 'cache'))
+    load_track_analyzer(gpx_file, cache)
+    (entry_path, _, _), = cache.get_entries()
+    with np.load(entry_path, allow_pickle=False) as entry:
+        assert all(entry[name].dtype != object for name in entry.files)
+
+
+def test_negative_size_limit():
+    with pytest.raises(ValueError):
+        TrackCache('unused', size_limit=-1)
+
+
+def test_cli_cache_dir(gpx_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    arguments = ['--gpx-file', gpx_file, '--output-map', str(tmp_path / 'map.html'), '--cache-dir', cache_dir]
+
+    cold = CliRunner().invoke(main, arguments)
+    warm = CliRunner().invoke(main, arguments)
+
+    assert cold.exit_code == 0, cold.output
+    assert warm.exit_code == 0, warm.output
+    assert 'from the cache' not in cold.output
+    assert 'from the cache' in warm.output
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_cached_track_keeps_great_turns_and_hour_points():
+    raw_track_object = GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+    analyzer = TrackAnalyzer(raw_track_object, geodesic_mode='haversine')
+    analyzed_track_object = analyzer.get_analyzed_track_object()
+    assert analyzed_track_object.get_great_turn_list()
+
+    loaded = CachedTrack.from_arrays(CachedTrack(raw_track_object, analyzer).to_arrays()).track_analyzer
+    loaded_track_object = loaded.get_analyzed_track_object()
+    assert loaded.get_geodesic_mode() == 'haversine'
+    assert loaded.get_great_turn_list() == analyzer.get_great_turn_list()
+    assert point_tuples(loaded_track_object.get_great_turn_point_list()) == \
+        point_tuples(analyzed_track_object.get_great_turn_point_list())
+    assert [(v.get_vector(), w.get_vector()) for v, w in loaded_track_object.get_great_turn_vector_list()] == \
+        [(v.get_vector(), w.get_vector()) for v, w in analyzed_track_object.get_great_turn_vector_list()]
+    assert point_tuples(loaded_track_object.get_every_hour_first_point_list()) == \
+        point_tuples(analyzed_track_object.get_every_hour_first_point_list())
@@ -0,0 +1,151 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from src.cli import main
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+from src.geoanalyzer.tracks import track_file
+from src.geoanalyzer.tracks.gps_parser import GpxParser
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer, analyze_track_frame
+from src.geoanalyzer.tracks.track_cache import load_track_analyzer
+from src.geoanalyzer.tracks.track_file import TrackFileReader, is_track_file, read_track_file_header, write_track_file
+
+STANDARD_GPX_FILE = "standard_test_data/2021-08-29-06.21.16.gpx"
+
+
+@pytest.fixture(scope='module')
+def raw_track_object():
+    return GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+
+
+def assert_frames_equal(actual, expected):
+    assert actual.get_column_names() == expected.get_column_names()
+    for name in expected.get_column_names():
+        np.testing.assert_array_equal(actual.get_column(name), expected.get_column(name))
+
+
+def test_round_trip(raw_track_object, tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    header = write_track_file(path, raw_track_object)
+    reader = TrackFileReader(path)
+
+    assert is_track_file(path) and not is_track_file(STANDARD_GPX_FILE)
+    assert_frames_equal(reader.get_track_frame(), raw_track_object.get_track_frame())
+    assert [(p.time, p.lat, p.lon, p.elev, p.get_note()) for p in reader.get_waypoint_list()] == \
+        [(p.time, p.lat, p.lon, p.elev, p.get_note()) for p in raw_track_object.get_waypoint_list()]
+
+    frame = raw_track_object.get_track_frame()
+    assert header == reader.get_header() == read_track_file_header(path)
+    assert header.point_count == len(frame)
+    assert header.bbox == (frame.lat.min(), frame.lon.min(), frame.lat.max(), frame.lon.max())
+    assert header.time_range == (frame.time[0].item(), frame.time[-1].item())
+
+
+def test_round_trip_keeps_segments(raw_track_object, tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    point_count = len(raw_track_object.get_track_frame())
+    segmented = GpxParser(STANDARD_GPX_FILE, mode='columnar').get_raw_track_object()
+    segmented.set_segment_list([TrackSegment(0, 0, 0, 100, 'Day 1'), TrackSegment(1, 0, 100, point_count)])
+    write_track_file(path, segmented)
+
+    assert TrackFileReader(path).get_raw_track_object().get_segment_list() == segmented.get_segment_list()
+
+
+def test_columns_are_mapped_without_copy(raw_track_object, tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    write_track_file(path, raw_track_object)
+    frame = TrackFileReader(path).get_track_frame()
+
+    for name in frame.get_column_names():
+        column = frame.get_column(name)
+        assert isinstance(column.base, np.memmap) or isinstance(column.base.base, np.memmap)
+        assert not column.flags.writeable
+        assert column.ctypes.data % 64 == 0
+
+
+def test_track_analyzer_consumes_track_file(raw_track_object, tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    write_track_file(path, raw_track_object)
+
+    expected = TrackAnalyzer(raw_track_object)
+    analyzer = TrackAnalyzer(TrackFileReader(path).get_raw_track_object())
+
+    assert_frames_equal(analyzer.get_analyzed_track_object().get_track_frame(),
+                        expected.get_analyzed_track_object().get_track_frame())
+    assert [(p.get_start_time(), p.get_end_time()) for p in analyzer.get_rest_point_list()] == \
+        [(p.get_start_time(), p.get_end_time()) for p in expected.get_rest_point_list()]
+
+
+def test_point_filter_on_track_file(raw_track_object, tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    write_track_file(path, raw_track_object)
+    bbox = (24.58, 121.2, 24.6, 121.22)
+
+    from_track_file, _ = load_track_analyzer(path, bbox=bbox)
+    from_gpx, _ = load_track_analyzer(STANDARD_GPX_FILE, bbox=bbox)
+    assert_frames_equal(from_track_file.get_analyzed_track_object().get_track_frame(),
+                        from_gpx.get_analyzed_track_object().get_track_frame())
+
+
+def test_extra_columns_and_empty_track(raw_track_object, tmp_path):
+    analyzed_frame = analyze_track_frame(raw_track_object.get_track_frame())
+    path = str(tmp_path / 'analyzed.gtrk')
+    write_track_file(path, analyzed_frame)
+    assert_frames_equal(TrackFileReader(path).get_track_frame(), analyzed_frame)
+
+    empty = TrackFrame([], [], [], np.array([], dtype='datetime64[us]'))
+    path = str(tmp_path / 'empty.gtrk')
+    header = write_track_file(path, empty)
+    assert header.point_count == 0 and header.time_range is None and np.isnan(header.bbox).all()
+    assert len(TrackFileReader(path).get_track_frame()) == 0
+
+
+def test_missing_values(tmp_path):
+    frame = TrackFrame(
+        [24.1, 24.2], [121.1, 121.2], [np.nan, 100.0],
+        np.array(['NaT', '2023-08-28T08:00:00'], dtype='datetime64[us]')
+    )
+    path = str(tmp_path / 'track.gtrk')
+    header = write_track_file(path, frame)
+
+    assert header.time_range == (datetime.datetime(2023, 8, 28, 8, 0),) * 2
+    assert_frames_equal(TrackFileReader(path).get_track_frame(), frame)
+
+
+def test_invalid_files(raw_track_object, tmp_path):
+    path = tmp_path / 'track.gtrk'
+    write_track_file(str(path), raw_track_object)
+    content = path.read_bytes()
+
+    with pytest.raises(FileNotFoundError):
+        TrackFileReader(str(tmp_path / 'missing.gtrk'))
+    with pytest.raises(ValueError):
+        TrackFileReader(STANDARD_GPX_FILE)
+
+    path.write_bytes(content[:len(content) // 2])
+    with pytest.raises(ValueError, match='truncated'):
+        TrackFileReader(str(path))
+
+    path.write_bytes(content)
+    header = np.frombuffer(content, dtype=track_file._HEADER_DTYPE, count=1).copy()
+    header['schema_version'] = track_file.TRACK_FILE_SCHEMA_VERSION + 1
+    path.write_bytes(header.tobytes() + content[header.nbytes:])
+    with pytest.raises(ValueError, match='schema version'):
+        TrackFileReader(str(path))
+    with pytest.raises(ValueError, match='schema version'):
+        read_track_file_header(str(path))
+
+
+def test_cli_convert_and_analyze(tmp_path):
+    path = str(tmp_path / 'track.gtrk')
+    result = CliRunner().invoke(main, ['convert', STANDARD_GPX_FILE, path])
+    assert result.exit_code == 0, result.output
+    assert 'Track file successfully written' in result.output
+
+    result = CliRunner().invoke(main, ['--gpx-file', path, '--output-map', str(tmp_path / 'map.html')])
+    assert result.exit_code == 0, result.output
+    assert os.path.exists(tmp_path / 'map.html')
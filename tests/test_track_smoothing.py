@@ -0,0 +1,92 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geoanalyzer.tracks.track_smoothing import smooth_values, smooth_track_frame, box_average, savgol_weights
+from src.geoanalyzer.tracks.track_analyzer import smoothing_tracks
+
+
+def legacy_box_5(points):
+    """Reference of the former per-window smoothing loop."""
+    smoothed = []
+    for i in range(len(points) - 4):
+        segment = points[i:i + 5]
+        smoothed.append((
+            segment[2].time,
+            sum(p.lat for p in segment) / 5,
+            sum(p.lon for p in segment) / 5,
+            sum(p.elev for p in segment) / 5,
+        ))
+    return smoothed
+
+
+@pytest.fixture
+def noisy_points():
+    rng = np.random.default_rng(0)
+    start_time = datetime.datetime(2023, 8, 28, 8, 0, 0)
+    return [
+        RawTrkPoint(
+            start_time + datetime.timedelta(seconds=5 * i),
+            24.6 + i * 1e-5 + rng.normal(0, 1e-5),
+            121.2 + i * 1e-5 + rng.normal(0, 1e-5),
+            1500 + rng.normal(0, 3)
+        )
+        for i in range(200)
+    ]
+
+
+def test_box_5_matches_legacy_smoothing(noisy_points):
+    smoothed = smoothing_tracks(noisy_points)
+    assert [(p.time, p.lat, p.lon, p.elev) for p in smoothed] == legacy_box_5(noisy_points)
+
+
+def test_box_average_cumulative_sum_path():
+    values = np.random.default_rng(1).normal(24.6, 1e-3, 1000)
+    expected = np.array([values[i:i + 31].mean() for i in range(len(values) - 30)])
+    np.testing.assert_allclose(box_average(values, 31), expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("kernel", ['box', 'gaussian', 'savgol', 'median'])
+def test_kernels_keep_constant_and_output_size(kernel):
+    values = np.full(50, 3.0)
+    smoothed = smooth_values(values, kernel, 7)
+    assert len(smoothed) == 44
+    np.testing.assert_allclose(smoothed, 3.0)
+
+
+def test_savgol_preserves_quadratic():
+    x = np.arange(30, dtype=np.float64)
+    values = 0.5 * x ** 2 - 3 * x + 1
+    np.testing.assert_allclose(smooth_values(values, 'savgol', 7, polyorder=2), values[3:-3])
+    with pytest.raises(ValueError):
+        savgol_weights(5, polyorder=5)
+
+
+def test_median_removes_spike():
+    values = np.ones(20)
+    values[10] = 100.0
+    np.testing.assert_array_equal(smooth_values(values, 'median', 3), np.ones(18))
+
+
+@pytest.mark.parametrize("kernel,window", [('triangle', 5), ('box', 4), ('box', 0)])
+def test_invalid_kernel_or_window(kernel, window):
+    with pytest.raises(ValueError):
+        smooth_values(np.ones(10), kernel, window)
+
+
+def test_smooth_track_frame_time_alignment(noisy_points):
+    frame = TrackFrame.from_points(noisy_points)
+    smoothed = smooth_track_frame(frame, 'gaussian', 9)
+    assert len(smoothed) == len(frame) - 8
+    np.testing.assert_array_equal(smoothed.time, frame.time[4:-4])
+    assert len(smooth_track_frame(frame.slice(0, 3))) == 0
+
+
+@pytest.mark.parametrize("window", [3, 5, 9, 11])
+def test_moving_median_matches_numpy(window):
+    values = np.random.default_rng(2).normal(0, 1, 10000)
+    expected = np.median(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+    np.testing.assert_array_equal(smooth_values(values, 'median', window), expected)
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from src.geo_objects.geo_points.raw_geo_points import RawTrkPoint
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geo_objects.geo_tracks.track_segment import TrackSegment
+from src.geo_objects.point_vector.geodesy import meters_per_degree
+from src.geoanalyzer.tracks.track_analyzer import TrackAnalyzer
+from src.geoanalyzer.tracks.turn_detection import (
+    SWITCHBACK_ANGLE, GreatTurn, find_great_turns, heading_changes
+)
+from tests.track_factories import MockTrackObject, generate_hiking_frame
+
+
+def legs_frame(legs, step=1.0, lat=24.0, lon=121.0):
+    """A track walking the (east, north, meters) legs in steps of `step` meters, one step per second."""
+    x, y = [0.0], [0.0]
+    for east, north, length in legs:
+        for _ in range(int(length / step)):
+            x.append(x[-1] + east * step)
+            y.append(y[-1] + north * step)
+    lon_scale, lat_scale = meters_per_degree(lat)
+    time = np.datetime64('2023-08-28T08:00:00', 'us') + np.arange(len(x)) * np.timedelta64(1, 's')
+    return TrackFrame(lat + np.array(y) / lat_scale, lon + np.array(x) / lon_scale, np.zeros(len(x)), time)
+
+
+def test_heading_changes():
+    # East, then north: a quarter turn to the left
+    before, after, changes = heading_changes(legs_frame([(1, 0, 100), (0, 1, 100)]), look_back_distance=10.5)
+    assert (before[100], after[100]) == (89, 111)
+    assert changes[100] == pytest.approx(90.0)
+    assert changes[50] == pytest.approx(0.0)
+    # No point 10 m before the first points and after the last points
+    assert np.all(np.isnan(changes[:11])) and np.all(before[:11] == -1)
+    assert np.all(np.isnan(changes[-11:])) and np.all(after[-11:] == -1)
+    with pytest.raises(ValueError):
+        heading_changes(legs_frame([(1, 0, 10)]), look_back_distance=0.0)
+
+
+def test_great_turns_and_switchbacks():
+    # Right, left, a hairpin back and forth, and a gentle bend below the turn angle
+    frame = legs_frame([
+        (1, 0, 100), (0, -1, 100), (1, 0, 100), (0, 1, 5), (-1, 0, 100), (-0.9, 0.44, 100)
+    ])
+    great_turns = find_great_turns(frame, look_back_distance=20.0)
+    assert [(turn.point_index, round(turn.heading_change), turn.is_switchback) for turn in great_turns[:2]] == [
+        (100, -90, False), (200, 90, False)
+    ]
+    assert len(great_turns) == 3 and 300 <= great_turns[2].point_index <= 305
+    assert great_turns[2].heading_change > SWITCHBACK_ANGLE and great_turns[2].is_switchback
+    assert all(turn.before_index < turn.point_index < turn.after_index for turn in great_turns)
+    assert find_great_turns(frame, turn_angle=100.0) == [great_turns[2]]
+
+    with pytest.raises(ValueError):
+        find_great_turns(frame, turn_angle=0.0)
+    with pytest.raises(ValueError):
+        find_great_turns(frame, switchback_angle=181.0)
+    assert find_great_turns(legs_frame([])) == []
+
+
+def test_close_bends_are_separate_turns():
+    # The two bends of an S 15 m apart, closer than the look-back distance
+    great_turns = find_great_turns(legs_frame([(1, 0, 100), (0, 1, 15), (1, 0, 100)]), look_back_distance=20.0)
+    assert [round(turn.heading_change) for turn in great_turns] == [72, -72]
+    # A hairpin is one run of turning points, so one turn
+    assert len(find_great_turns(legs_frame([(1, 0, 100), (0, 1, 10), (-1, 0, 100)]), look_back_distance=50.0)) == 1
+
+
+def test_look_back_distance_does_not_depend_on_sampling():
+    legs = [(1, 0, 100), (0, 1, 100), (-1, 0, 100)]
+    dense = find_great_turns(legs_frame(legs, step=1.0))
+    sparse = find_great_turns(legs_frame(legs, step=5.0))
+    assert [(turn.point_index, turn.heading_change) for turn in dense] == \
+        [(turn.point_index * 5, turn.heading_change) for turn in sparse]
+
+
+def test_analyzer_sets_great_turns_per_segment():
+    raw_frame = legs_frame([(1, 0, 200), (0, 1, 200), (-1, 0, 200)], step=2.0)
+    track_object = MockTrackObject(raw_frame.to_points(RawTrkPoint))
+    # The second segment starts at the first turn, so no turn is found across the segment boundary
+    track_object.set_segment_list([TrackSegment(0, 0, 0, 100), TrackSegment(0, 1, 100, len(raw_frame))])
+    analyzer = TrackAnalyzer(track_object, turn_look_back_distance=30.0)
+    analyzed_track_object = analyzer.get_analyzed_track_object()
+    analyzed_frame = analyzed_track_object.get_track_frame()
+
+    great_turns = analyzer.get_great_turn_list()
+    assert len(great_turns) == 1 and great_turns[0].heading_change == pytest.approx(90.0, abs=5.0)
+    start = analyzed_track_object.get_segment_list()[1].start
+    assert great_turns[0].point_index == start + find_great_turns(analyzed_frame.slice(start), 30.0)[0].point_index
+    turn_point = analyzed_track_object.get_great_turn_point_list()[0]
+    assert turn_point.time == analyzed_frame.time[great_turns[0].point_index].item()
+    incoming, outgoing = analyzed_track_object.get_great_turn_vector_list()[0]
+    assert incoming.get_end_point().time == outgoing.get_init_point().time == turn_point.time
+    assert incoming.get_length() == pytest.approx(30.0, abs=2.0)
+    # Heading north into the turn and west out of it
+    assert abs(incoming.get_x_component()) < 3.0 and incoming.get_y_component() > 0
+    assert outgoing.get_x_component() < 0 and abs(outgoing.get_y_component()) < 3.0
+
+    with pytest.raises(ValueError):
+        TrackAnalyzer(track_object, turn_look_back_distance=-1.0)
+
+
+def test_hiking_track_turns_are_unique_apexes():
+    great_turns = find_great_turns(generate_hiking_frame(0, 5000))
+    assert all(isinstance(turn, GreatTurn) for turn in great_turns)
+    indices = [turn.point_index for turn in great_turns]
+    assert indices == sorted(set(indices))
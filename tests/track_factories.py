@@ -0,0 +1,52 @@
+"""
+Track factories shared by the test modules: synthetic raw and analyzed tracks, and comparable rest points.
+"""
+
+import numpy as np
+
+from src.geo_objects.geo_tracks.raw_geo_tracks import RawTrackObject
+from src.geo_objects.geo_tracks.track_frame import TrackFrame
+from src.geoanalyzer.tracks.track_analyzer import analyze_track_frame
+from src.geoanalyzer.tracks.track_smoothing import smooth_track_frame
+
+
+class MockTrackObject(RawTrackObject):
+    def __init__(self, points):
+        super().__init__()
+        for point in points:
+            self.add_track_point(point)
+
+
+def generate_hiking_frame(seed, num_points=2000):
+    """A walk at about 1 m/s every 5 seconds with random stops of 1 to 10 minutes and GPS jitter."""
+    rng = np.random.default_rng(seed)
+    moving = np.ones(num_points, dtype=bool)
+    for stop_start in rng.integers(0, num_points, size=num_points // 150):
+        moving[stop_start:stop_start + rng.integers(12, 120)] = False
+    step = np.where(moving, 5 / 110757, 0.0)
+    lat = 24.0 + np.cumsum(step) + rng.normal(0, 2e-6, num_points)
+    lon = 121.0 + np.cumsum(step * rng.uniform(0.5, 1.0, num_points)) + rng.normal(0, 2e-6, num_points)
+    elev = 500 + np.cumsum(np.where(moving, 0.3, 0.0)) + rng.normal(0, 0.5, num_points)
+    time = np.datetime64('2023-08-28T08:00:00', 'us') + np.arange(num_points) * np.timedelta64(5, 's')
+    return TrackFrame(lat, lon, elev, time)
+
+
+def synthetic_analyzed_frame(seed, num_points=3000):
+    """Hiking-like track alternating walking and resting sections, with GPS noise and irregular sampling."""
+    rng = np.random.default_rng(seed)
+    moving = np.repeat(rng.random(num_points // 50) < 0.6, 50)[:num_points]
+    step_lat = np.where(moving, rng.normal(3e-5, 2e-5, num_points), rng.normal(0, 2e-6, num_points))
+    step_lon = np.where(moving, rng.normal(3e-5, 2e-5, num_points), rng.normal(0, 2e-6, num_points))
+    step_time = rng.choice([0, 5, 10, 20, 40], size=num_points, p=[0.02, 0.5, 0.3, 0.1, 0.08]) * 1_000_000
+    raw_frame = TrackFrame(
+        24.6 + np.cumsum(step_lat),
+        121.2 + np.cumsum(step_lon),
+        1500 + np.cumsum(rng.normal(0, 0.5, num_points)),
+        np.int64(1_630_000_000_000_000) + np.cumsum(step_time),
+    )
+    return analyze_track_frame(smooth_track_frame(raw_frame))
+
+
+def rest_tuples(rest_points):
+    """The position and times of every rest point, to compare the rest points of two analyses."""
+    return [(r.time, r.lat, r.lon, r.elev, r.get_start_time(), r.get_end_time()) for r in rest_points]